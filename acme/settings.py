@@ -134,6 +134,59 @@ STATIC_URL = '/static/'
 MEDIA_ROOT = BASE_DIR / 'src' / 'media'
 MEDIA_URL = '/media/'
 
+
+# Workflow engine
+
+WORKFLOW_MAX_STEPS = env.int('WORKFLOW_MAX_STEPS', default=100_000)
+
+# Reject workflow files larger than this many bytes, or with more steps.
+# Uploads are stopped as soon as their file goes over the size.
+WORKFLOW_MAX_FILE_SIZE = env.int('WORKFLOW_MAX_FILE_SIZE', default=64 * 1024 * 1024)
+WORKFLOW_MAX_DEFINITION_STEPS = env.int('WORKFLOW_MAX_DEFINITION_STEPS', default=100_000)
+
+# Workflow files larger than this many bytes are read in chunks, their steps
+# validated as they are read, and skip the definition cache
+WORKFLOW_STREAMING_FILE_SIZE = env.int('WORKFLOW_STREAMING_FILE_SIZE', default=1024 * 1024)
+
+# Validated and compiled workflow definitions kept per process, 0 disables it
+WORKFLOW_DEFINITION_CACHE_SIZE = env.int('WORKFLOW_DEFINITION_CACHE_SIZE', default=128)
+
+# Recent successful user/PIN checks kept per process, 0 disables it. A PIN
+# change only drops the checks cached by the process that saved it, the
+# other processes accept the old PIN for up to the TTL, in seconds.
+WORKFLOW_PIN_CACHE_SIZE = env.int('WORKFLOW_PIN_CACHE_SIZE', default=0)
+WORKFLOW_PIN_CACHE_TTL = env.float('WORKFLOW_PIN_CACHE_TTL', default=60.0)
+
+# Reject workflows whose longest path runs more steps, cyclic ones included
+WORKFLOW_MAX_PATH_LENGTH = env.int('WORKFLOW_MAX_PATH_LENGTH', default=None)
+
+# Reject workflows with cyclic transitions
+WORKFLOW_REJECT_CYCLES = env.bool('WORKFLOW_REJECT_CYCLES', default=False)
+
+# Run batch uploads of arithmetic-only workflows on NumPy arrays
+WORKFLOW_VECTORIZED_BATCH = env.bool('WORKFLOW_VECTORIZED_BATCH', default=False)
+
+# Run independent transition branches of single uploads on a thread pool
+WORKFLOW_PARALLEL_BRANCHES = env.bool('WORKFLOW_PARALLEL_BRANCHES', default=False)
+
+# Where uploads write their logs as steps finish: memory, ndjson or database
+WORKFLOW_LOG_SINK = env.str('WORKFLOW_LOG_SINK', default='memory')
+WORKFLOW_LOG_DIR = env.str('WORKFLOW_LOG_DIR', default=str(MEDIA_ROOT / 'workflow' / 'logs'))
+WORKFLOW_LOG_BUFFER_SIZE = env.int('WORKFLOW_LOG_BUFFER_SIZE', default=1000)
+WORKFLOW_LOG_FLUSH_INTERVAL = env.float('WORKFLOW_LOG_FLUSH_INTERVAL', default=1.0)
+
+# Log verbosity of single and batch runs: full or summary
+WORKFLOW_LOG_VERBOSITY = env.str('WORKFLOW_LOG_VERBOSITY', default='full')
+WORKFLOW_BATCH_LOG_VERBOSITY = env.str('WORKFLOW_BATCH_LOG_VERBOSITY', default='full')
+
+# Record latency histograms of steps, actions, conditions and authentication
+WORKFLOW_TIMING = env.bool('WORKFLOW_TIMING', default=False)
+
+# Profile every single upload with cProfile, staff users can still ask for
+# one with the X-Workflow-Profile header when it is off
+WORKFLOW_PROFILE_UPLOADS = env.bool('WORKFLOW_PROFILE_UPLOADS', default=False)
+WORKFLOW_PROFILE_TOP_FUNCTIONS = env.int('WORKFLOW_PROFILE_TOP_FUNCTIONS', default=30)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
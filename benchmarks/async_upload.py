@@ -0,0 +1,134 @@
+"""
+Load test of the sync upload view behind the WSGI handler against the async
+upload view behind the ASGI handler, on the stand-in database of
+`benchmarks.standin_settings`.
+
+Both handlers are driven in process, the sync one from a pool of
+`CONCURRENCY` threads as a threaded WSGI server would, the async one from
+`CONCURRENCY` tasks on a single event loop.
+
+    python -m benchmarks.async_upload
+"""
+import asyncio
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks.utils import (
+    create_accounts,
+    setup_django,
+    test_database,
+    upload_body,
+    wsgi_post,
+)
+
+workflow_example_path = Path(__file__).resolve().parent.parent / 'postman' / 'workflow_example.json'
+
+REQUESTS = 200
+CONCURRENCY = 16
+USERS = 50
+
+
+def build_bodies(users):
+    with open(workflow_example_path) as workflow_example_file:
+        workflow_data = json.loads(workflow_example_file.read())
+
+    bodies = []
+    for user in users:
+        workflow_data['trigger']['params'] = {'user_id': user.user_id, 'pin': user.pin}
+        bodies.append(upload_body(workflow_data))
+    return bodies
+
+
+def run_sync(bodies):
+    from acme.wsgi import application
+    from django.test.client import MULTIPART_CONTENT
+
+    def request(body):
+        started_at = time.perf_counter()
+        status_line, _ = wsgi_post(application, '/api/upload/', body, MULTIPART_CONTENT)
+        return time.perf_counter() - started_at, status_line.startswith('201')
+
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as executor:
+        return list(executor.map(request, (bodies[index % len(bodies)] for index in range(REQUESTS))))
+
+
+def run_async(bodies):
+    from acme.asgi import application
+    from django.test.client import MULTIPART_CONTENT
+
+    async def request(body, semaphore):
+        scope = {
+            'type': 'http',
+            'method': 'POST',
+            'path': '/api/upload/async/',
+            'query_string': b'',
+            'headers': [
+                (b'host', b'testserver'),
+                (b'content-type', MULTIPART_CONTENT.encode()),
+                (b'content-length', str(len(body)).encode()),
+            ],
+            'server': ('testserver', 80),
+            'client': ('127.0.0.1', 0),
+        }
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        statuses = []
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await asyncio.Future()
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                statuses.append(message['status'])
+
+        async with semaphore:
+            started_at = time.perf_counter()
+            await application(scope, receive, send)
+            return time.perf_counter() - started_at, statuses[0] == 201
+
+    async def main():
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+        return await asyncio.gather(*(
+            request(bodies[index % len(bodies)], semaphore) for index in range(REQUESTS)
+        ))
+
+    return asyncio.run(main())
+
+
+def report(mode, run, bodies):
+    started_at = time.perf_counter()
+    results = run(bodies)
+    elapsed = time.perf_counter() - started_at
+
+    latencies = [latency for latency, _ in results]
+    quantiles = statistics.quantiles(latencies, n=100)
+    errors = sum(1 for _, success in results if not success)
+    print(
+        f'{mode:>6} {len(results) / elapsed:>8.1f} {quantiles[49] * 1000:>9.1f}'
+        f' {quantiles[98] * 1000:>9.1f} {errors:>7}'
+    )
+
+
+def main():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.standin_settings')
+    setup_django()
+    from django.conf import settings
+
+    with test_database():
+        bodies = build_bodies(create_accounts(USERS))
+        print(
+            f'{REQUESTS} requests, concurrency {CONCURRENCY},'
+            f' {settings.STANDIN_QUERY_LATENCY_MS:g}ms per query'
+        )
+        print(f'{"mode":>6} {"req/s":>8} {"p50 (ms)":>9} {"p99 (ms)":>9} {"errors":>7}')
+        report('sync', run_sync, bodies)
+        report('async', run_async, bodies)
+
+
+if __name__ == '__main__':
+    main()
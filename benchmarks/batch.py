@@ -0,0 +1,78 @@
+"""
+Throughput of BatchWorkflow against one Workflow.run_trigger per trigger,
+both including authentication and balance writes, on a test database.
+
+    python -m benchmarks.batch
+"""
+import json
+from decimal import Decimal
+from pathlib import Path
+
+from benchmarks.utils import measure, setup_django, test_database
+
+workflow_example_path = Path(__file__).resolve().parent.parent / 'postman' / 'workflow_example.json'
+
+SIZES = (100, 1_000)
+
+
+def create_accounts(size):
+    from src.workflow.models import Account, User
+
+    users = User.objects.bulk_create([
+        User(user_id=str(100_000_000 + index), pin=1234) for index in range(size)
+    ])
+    Account.objects.bulk_create([
+        Account(user=user, balance=Decimal(150_000)) for user in users
+    ])
+    return [{'user_id': user.user_id, 'pin': user.pin} for user in users]
+
+
+def run_loop(plan, trigger_params_list):
+    from src.workflow.models import Account
+    from src.workflow.utils.authentication import UserPINAuthenticationClass
+    from src.workflow.utils.workflow import Workflow
+
+    for trigger_params in trigger_params_list:
+        workflow = Workflow(
+            plan=plan.with_trigger_params(trigger_params),
+            authentication_class=UserPINAuthenticationClass,
+        )
+        workflow.run_trigger()
+        if workflow.new_balance:
+            account = Account.objects.get(user__user_id=workflow.user_id)
+            account.balance = workflow.new_balance
+            account.save()
+
+
+def run_batch(plan, trigger_params_list):
+    from src.workflow.utils.authentication import UserPINAuthenticationClass
+    from src.workflow.utils.batch import BatchWorkflow, bulk_update_balances
+
+    batch = BatchWorkflow(plan=plan, authentication_class=UserPINAuthenticationClass)
+    for _ in batch.run(trigger_params_list):
+        pass
+    bulk_update_balances(batch.balances)
+
+
+def main():
+    setup_django()
+    from src.workflow.utils.plan import compile_workflow
+
+    with open(workflow_example_path) as workflow_example_file:
+        plan = compile_workflow(json.loads(workflow_example_file.read()))
+
+    with test_database():
+        print(f'{"triggers":>9} {"loop (trig/s)":>14} {"batch (trig/s)":>15} {"speedup":>9}')
+        for size in SIZES:
+            trigger_params_list = create_accounts(size)
+            loop = measure(lambda: run_loop(plan, trigger_params_list), repeat=1)
+            batch = measure(lambda: run_batch(plan, trigger_params_list), repeat=1)
+            print(f'{size:>9} {size / loop:>14.0f} {size / batch:>15.0f} {loop / batch:>8.1f}x')
+
+            from src.workflow.models import Account, User
+            Account.objects.all().delete()
+            User.objects.all().delete()
+
+
+if __name__ == '__main__':
+    main()
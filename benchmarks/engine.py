@@ -0,0 +1,47 @@
+"""
+Compare the legacy list-scanning engine against the compiled plan engine.
+
+    python -m benchmarks.engine
+"""
+from benchmarks.legacy import LegacyWorkflow
+from benchmarks.utils import InMemoryAuthenticationClass, fan_out_workflow, measure, setup_django
+
+setup_django()
+
+from src.workflow.utils.plan import compile_workflow  # noqa: E402
+from src.workflow.utils.workflow import Workflow  # noqa: E402
+
+SIZES = (10, 1_000, 10_000)
+
+
+def run_legacy(workflow_data):
+    workflow = LegacyWorkflow(
+        workflow_data=workflow_data,
+        authentication_class=InMemoryAuthenticationClass,
+    )
+    workflow.run_trigger()
+    return workflow
+
+
+def run_compiled(workflow_data):
+    workflow = Workflow(
+        plan=compile_workflow(workflow_data),
+        authentication_class=InMemoryAuthenticationClass,
+    )
+    workflow.run_trigger()
+    return workflow
+
+
+def main():
+    print(f'{"steps":>8} {"legacy (s)":>12} {"compiled (s)":>13} {"speedup":>9}')
+    for size in SIZES:
+        workflow_data = fan_out_workflow(size)
+        assert len(run_legacy(workflow_data).logs) == len(run_compiled(workflow_data).logs)
+
+        legacy = measure(lambda: run_legacy(workflow_data), repeat=1 if size > 1_000 else 3)
+        compiled = measure(lambda: run_compiled(workflow_data))
+        print(f'{size:>8} {legacy:>12.4f} {compiled:>13.4f} {legacy / compiled:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
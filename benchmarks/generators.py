@@ -0,0 +1,105 @@
+"""
+Synthetic workflows for the benchmark suite. Every generator returns a
+definition `WorkflowDataSerializer` accepts and the engine runs to the last
+step with `InMemoryAuthenticationClass` or the trigger account.
+"""
+from benchmarks.utils import fan_out_workflow, trigger_data, validate_account_step
+
+
+def chained_steps(size, action, params, conditions=()):
+    """
+    `size` steps with `action` run one after the other, every transition
+    guarded by `conditions` on the step it leaves.
+    """
+    return [
+        {
+            'id': f'step_{index}',
+            'params': params(index),
+            'action': action,
+            'transitions': [
+                {
+                    'target': f'step_{index + 1}',
+                    'condition': [
+                        dict(condition, from_id=f'step_{index}') for condition in conditions
+                    ],
+                }
+            ] if index < size - 1 else [],
+        }
+        for index in range(size)
+    ]
+
+
+def account_params(index):
+    return {
+        'user_id': {'from_id': 'validate_account', 'param_id': 'user_id'},
+        'money': {'from_id': None, 'value': 1},
+    }
+
+
+def wide_workflow(size):
+    """
+    `validate_account` branching to `size - 1` balance reads.
+    """
+    return fan_out_workflow(size)
+
+
+def deep_workflow(size):
+    """
+    `validate_account` followed by a chain of `size - 1` deposits.
+    """
+    steps = chained_steps(size - 1, 'deposit_money', account_params)
+    return {
+        'steps': [validate_account_step([{'target': 'step_0', 'condition': []}])] + steps,
+        'trigger': trigger_data(),
+    }
+
+
+def condition_heavy_workflow(size, conditions=10):
+    """
+    `deep_workflow` with `conditions` passing conditions on every
+    transition, cycling over the comparison operators.
+    """
+    condition_set = [
+        {'field_id': 'balance', 'operator': 'gte', 'value': 0},
+        {'field_id': 'balance', 'operator': 'lt', 'value': 10 ** 12},
+        {'field_id': 'balance', 'operator': 'between', 'value': [0, 10 ** 12]},
+        {'field_id': 'balance', 'operator': 'lte', 'value': 10 ** 12},
+        {'field_id': 'balance', 'operator': 'ne', 'value': -1},
+    ]
+    steps = chained_steps(
+        size - 1,
+        'deposit_money',
+        account_params,
+        conditions=[condition_set[index % len(condition_set)] for index in range(conditions)],
+    )
+    return {
+        'steps': [validate_account_step([{'target': 'step_0', 'condition': []}])] + steps,
+        'trigger': trigger_data(),
+    }
+
+
+def param_chain_workflow(size):
+    """
+    `size` balance reads whose `user_id` and `pin` go through every step
+    before them back to the trigger, the longest chains the compiler has
+    to collapse.
+    """
+    def params(index):
+        from_id = f'step_{index - 1}' if index else 'start'
+        return {
+            'user_id': {'from_id': from_id, 'param_id': 'user_id'},
+            'pin': {'from_id': from_id, 'param_id': 'pin'},
+        }
+
+    return {
+        'steps': chained_steps(size, 'get_account_balance', params),
+        'trigger': trigger_data(targets=('step_0',)),
+    }
+
+
+GENERATORS = {
+    'wide': wide_workflow,
+    'deep': deep_workflow,
+    'conditions': condition_heavy_workflow,
+    'param_chain': param_chain_workflow,
+}
@@ -0,0 +1,160 @@
+"""
+Load test of `WorkflowFileUploadView` behind the WSGI handler, on the
+stand-in database of `benchmarks.standin_settings`.
+
+`--concurrency` threads fire multipart uploads as a threaded WSGI server
+would, mixing workflows that succeed, that withdraw more than the balance
+and that are triggered with a wrong PIN. Reports throughput, latency
+percentiles and database queries per request, per kind and overall, and
+checks every upload ended as its kind should.
+
+    python -m benchmarks.load_test --requests 500 --concurrency 16
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks.utils import (
+    create_accounts,
+    setup_django,
+    test_database,
+    upload_body,
+    wsgi_post,
+)
+
+workflow_example_path = Path(__file__).resolve().parent.parent / 'postman' / 'workflow_example.json'
+
+UPLOAD_PATH = '/api/upload/'
+
+SUCCESS = 'success'
+INSUFFICIENT_BALANCE = 'insufficient_balance'
+INVALID_PIN = 'invalid_pin'
+
+# Share of every kind of upload, in requests out of ten.
+MIX = {
+    SUCCESS: 6,
+    INSUFFICIENT_BALANCE: 2,
+    INVALID_PIN: 2,
+}
+
+
+def build_workflow(kind, user):
+    with open(workflow_example_path) as workflow_example_file:
+        workflow_data = json.loads(workflow_example_file.read())
+
+    workflow_data['trigger']['params'] = {
+        'user_id': user.user_id,
+        'pin': user.pin if kind != INVALID_PIN else user.pin + 1,
+    }
+    if kind == INSUFFICIENT_BALANCE:
+        # Every balance is over 100000, the example withdraws 30 there.
+        withdraw_step = next(step for step in workflow_data['steps'] if step['id'] == 'withdraw_30')
+        withdraw_step['params']['money'] = {'from_id': None, 'value': 10 ** 9}
+    return workflow_data
+
+
+def build_requests(users, requests):
+    kinds = [kind for kind, share in MIX.items() for _ in range(share)]
+    bodies = {
+        (kind, user.user_id): upload_body(build_workflow(kind, user))
+        for kind in MIX
+        for user in users
+    }
+    requests_list = []
+    for index in range(requests):
+        kind = kinds[index % len(kinds)]
+        user = users[index % len(users)]
+        requests_list.append((kind, bodies[(kind, user.user_id)]))
+    return requests_list
+
+
+def run(requests, concurrency):
+    from acme.wsgi import application
+    from django.db import connection
+    from django.test.client import MULTIPART_CONTENT
+
+    def request(kind_and_body):
+        kind, body = kind_and_body
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        started_at = time.perf_counter()
+        with connection.execute_wrapper(count_query):
+            status_line, content = wsgi_post(application, UPLOAD_PATH, body, MULTIPART_CONTENT)
+        elapsed = time.perf_counter() - started_at
+        upload_id = json.loads(content)['id'] if status_line.startswith('201') else None
+        return kind, elapsed, len(queries), upload_id
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(request, requests))
+
+
+def check_outcomes(results):
+    """
+    Number of uploads that didn't end as their kind should, failed
+    requests included.
+    """
+    from src.workflow.models import Upload
+
+    successes = {
+        str(upload_id): success
+        for upload_id, success in Upload.objects.values_list('id', 'success')
+    }
+    errors = 0
+    for kind, _, _, upload_id in results:
+        if successes.get(upload_id) != (kind == SUCCESS):
+            errors += 1
+    return errors
+
+
+def report(name, results, elapsed):
+    latencies = [latency for _, latency, _, _ in results]
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    queries = statistics.mean(query_count for _, _, query_count, _ in results)
+    print(
+        f'{name:<21} {len(results):>8} {len(results) / elapsed:>8.1f} {quantiles[49] * 1000:>9.1f}'
+        f' {quantiles[94] * 1000:>9.1f} {quantiles[98] * 1000:>9.1f} {queries:>8.1f}'
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the upload endpoint.')
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--users', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.standin_settings')
+    setup_django()
+    from django.conf import settings
+
+    with test_database():
+        requests = build_requests(create_accounts(args.users), args.requests)
+        print(
+            f'{args.requests} requests, concurrency {args.concurrency},'
+            f' {settings.STANDIN_QUERY_LATENCY_MS:g}ms per query'
+        )
+        started_at = time.perf_counter()
+        results = run(requests, args.concurrency)
+        elapsed = time.perf_counter() - started_at
+
+        print(
+            f'{"kind":<21} {"requests":>8} {"req/s":>8} {"p50 (ms)":>9}'
+            f' {"p95 (ms)":>9} {"p99 (ms)":>9} {"queries":>8}'
+        )
+        for kind in MIX:
+            # Throughput per kind is its share of the wall time of the run.
+            report(kind, [result for result in results if result[0] == kind], elapsed)
+        report('all', results, elapsed)
+        print(f'unexpected outcomes: {check_outcomes(results)}')
+
+
+if __name__ == '__main__':
+    main()
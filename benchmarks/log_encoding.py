@@ -0,0 +1,47 @@
+"""
+Turning the logs of a run into the JSON compatible data stored in
+`Upload.logs`, with the `json.dumps`/`json.loads` round-trip against the
+single walk of `to_json_data`. Runs are chains of deposits, every entry
+logs the balance left.
+
+    python -m benchmarks.log_encoding
+"""
+import json
+
+from benchmarks.generators import deep_workflow
+from benchmarks.utils import InMemoryAuthenticationClass, measure, setup_django
+
+setup_django()
+
+from src.workflow.utils.logs import StepLogEncoder, to_json_data  # noqa: E402
+from src.workflow.utils.plan import compile_workflow  # noqa: E402
+from src.workflow.utils.workflow import Workflow  # noqa: E402
+
+SIZES = (1_000, 10_000, 100_000)
+
+
+def run_logs(size):
+    workflow = Workflow(
+        plan=compile_workflow(deep_workflow(size)),
+        authentication_class=InMemoryAuthenticationClass,
+    )
+    workflow.run_trigger()
+    return workflow.logs
+
+
+def round_trip(logs):
+    return json.loads(json.dumps(logs, cls=StepLogEncoder))
+
+
+def main():
+    print(f'{"entries":>8} {"round-trip (s)":>15} {"single walk (s)":>16} {"speedup":>8}')
+    for size in SIZES:
+        logs = run_logs(size)
+        assert to_json_data(logs) == round_trip(logs)
+        before = measure(lambda: round_trip(logs))
+        after = measure(lambda: to_json_data(logs))
+        print(f'{size:>8} {before:>15.4f} {after:>16.4f} {before / after:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Peak memory of a run per 10k executed steps, with the dict log entries the
+engine used to build against the slotted `StepLog` records.
+
+    python -m benchmarks.memory
+"""
+import tracemalloc
+
+from benchmarks.utils import InMemoryAuthenticationClass, linear_workflow, setup_django
+
+setup_django()
+
+from src.workflow.utils.plan import compile_workflow  # noqa: E402
+from src.workflow.utils.workflow import Workflow  # noqa: E402
+
+SIZES = (10_000, 100_000)
+
+
+class DictLogWorkflow(Workflow):
+    """
+    Params, secret hiding and log entries as they were built before.
+    """
+
+    def get_params(self, current_step):
+        params = {}
+        for param, source in current_step.params.items():
+            if source.is_literal:
+                params |= {param: source.value}
+            else:
+                params |= {
+                    param: self.extract_param_value(
+                        from_id=source.from_id,
+                        param_id=source.param_id
+                    )
+                }
+        return params
+
+    def hide_secret_params(self, params):
+        for param in params:
+            if param in ['pin']:
+                params |= {param: '****'}
+        return params
+
+    def record_step(self, current_step, params, output):
+        self.outputs[current_step.id] = output
+        self.logs.append({
+            'params': self.hide_secret_params(params),
+            'id': current_step.id,
+            'action': current_step.action,
+            'output': output,
+        })
+
+
+def peak_memory(workflow_class, plan):
+    workflow = workflow_class(plan=plan, authentication_class=InMemoryAuthenticationClass)
+    tracemalloc.start()
+    try:
+        workflow.run_trigger()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def main():
+    print(f'{"steps":>8} {"dict logs (KiB/10k)":>20} {"slotted (KiB/10k)":>18} {"saved":>7}')
+    for size in SIZES:
+        plan = compile_workflow(linear_workflow(size))
+        before = peak_memory(DictLogWorkflow, plan) / size * 10_000 / 1024
+        after = peak_memory(Workflow, plan) / size * 10_000 / 1024
+        print(f'{size:>8} {before:>20.0f} {after:>18.0f} {1 - after / before:>6.0%}')
+
+
+if __name__ == '__main__':
+    main()
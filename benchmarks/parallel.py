@@ -0,0 +1,49 @@
+"""
+Sequential engine against ParallelWorkflow on a fan-out workflow whose
+balance reads are artificially slow, as actions calling external services
+would be.
+
+    python -m benchmarks.parallel
+"""
+import time
+
+from benchmarks.utils import InMemoryAuthenticationClass, fan_out_workflow, measure, setup_django
+
+SIZES = (2, 8, 32)
+
+SLOW_ACTION_SECONDS = 0.01
+
+
+def run(workflow_class, plan):
+    workflow = workflow_class(plan=plan, authentication_class=InMemoryAuthenticationClass)
+    workflow.run_trigger()
+    return workflow
+
+
+def main():
+    setup_django()
+    from src.workflow.utils.actions import action_registry, get_account_balance
+    from src.workflow.utils.parallel import ParallelWorkflow
+    from src.workflow.utils.plan import compile_workflow
+    from src.workflow.utils.workflow import Workflow
+
+    registry = action_registry.copy()
+
+    @registry.register('get_account_balance', writes_account=False)
+    def slow_get_account_balance(workflow, **params):
+        time.sleep(SLOW_ACTION_SECONDS)
+        return get_account_balance(workflow, **params)
+
+    print(f'{SLOW_ACTION_SECONDS * 1000:g}ms per balance read, {ParallelWorkflow.max_workers} workers')
+    print(f'{"branches":>9} {"sequential (s)":>15} {"parallel (s)":>13} {"speedup":>9}')
+    for size in SIZES:
+        plan = compile_workflow(fan_out_workflow(size + 1), registry=registry)
+        assert run(Workflow, plan).logs == run(ParallelWorkflow, plan).logs
+
+        sequential = measure(lambda: run(Workflow, plan))
+        parallel = measure(lambda: run(ParallelWorkflow, plan))
+        print(f'{size:>9} {sequential:>15.4f} {parallel:>13.4f} {sequential / parallel:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
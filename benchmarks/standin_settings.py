@@ -0,0 +1,63 @@
+"""
+Settings for load tests against a local stand-in database.
+
+SQLite replaces MongoDB so the benchmarks run without the docker services,
+`DecimalField` values come back as `Decimal128` as they do through djongo,
+and every query waits `STANDIN_QUERY_LATENCY_MS` to play the network round
+trip of the real database.
+
+    DJANGO_SETTINGS_MODULE=benchmarks.standin_settings python -m benchmarks.async_upload
+"""
+import os
+import tempfile
+import time
+
+from bson.decimal128 import Decimal128
+from django.db.backends.signals import connection_created
+from django.db.models import DecimalField
+
+for name in ('MONGO_INITDB_DATABASE', 'MONGO_HOST', 'MONGO_INITDB_ROOT_USERNAME', 'MONGO_INITDB_ROOT_PASSWORD'):
+    os.environ.setdefault(name, 'standin')
+
+from acme.settings import *  # noqa: E402,F401,F403
+
+STANDIN_DIR = tempfile.mkdtemp(prefix='acme-standin-')
+
+STANDIN_QUERY_LATENCY_MS = float(os.environ.get('STANDIN_QUERY_LATENCY_MS', 2))
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(STANDIN_DIR, 'db.sqlite3'),
+        'OPTIONS': {'timeout': 30},
+        'TEST': {'NAME': os.path.join(STANDIN_DIR, 'test.sqlite3')},
+    }
+}
+
+MEDIA_ROOT = os.path.join(STANDIN_DIR, 'media')
+
+DEBUG = False
+
+ALLOWED_HOSTS = ['*']
+
+
+def _from_db_value(self, value, expression, connection):
+    if value is None:
+        return value
+    return Decimal128(str(self.to_python(value)))
+
+
+DecimalField.from_db_value = _from_db_value
+
+
+def _query_latency(execute, sql, params, many, context):
+    time.sleep(STANDIN_QUERY_LATENCY_MS / 1000)
+    return execute(sql, params, many, context)
+
+
+def _add_query_latency(sender, connection, **kwargs):
+    if STANDIN_QUERY_LATENCY_MS and _query_latency not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_latency)
+
+
+connection_created.connect(_add_query_latency)
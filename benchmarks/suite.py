@@ -0,0 +1,181 @@
+"""
+Benchmark suite over the synthetic workflows of `benchmarks.generators`,
+at three levels:
+
+- engine: compile the definition and run it with
+  `InMemoryAuthenticationClass`
+- validation: `WorkflowFileUploadSerializer` validation, compilation
+  included
+- upload: a full `WorkflowFileUploadView` request on the local stand-in
+  database of `benchmarks.standin_settings`
+
+The definition cache is cleared before every call, so each one pays for a
+cold definition. Results are written as JSON and can be compared with the
+results of another commit, cases slower than the threshold are flagged and
+make the command exit with 1.
+
+    python -m benchmarks.suite --output before.json
+    python -m benchmarks.suite --output after.json --compare before.json --threshold 0.1
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from benchmarks.generators import GENERATORS
+from benchmarks.utils import InMemoryAuthenticationClass, measure, setup_django, test_database
+
+SIZES = (10, 100, 1_000)
+QUICK_SIZES = (10, 100)
+
+LEVELS = ('engine', 'validation', 'upload')
+
+UPLOAD_URL = '/api/upload/'
+
+
+def engine_case(workflow_data):
+    from src.workflow.utils.plan import compile_workflow
+    from src.workflow.utils.workflow import Workflow
+
+    def run():
+        workflow = Workflow(
+            plan=compile_workflow(workflow_data),
+            authentication_class=InMemoryAuthenticationClass,
+        )
+        workflow.run_trigger()
+    return run
+
+
+def validation_case(workflow_data):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from src.workflow.api.serializers import WorkflowFileUploadSerializer
+    from src.workflow.utils.cache import workflow_definition_cache
+
+    content = json.dumps(workflow_data).encode()
+
+    def run():
+        workflow_definition_cache.clear()
+        serializer = WorkflowFileUploadSerializer(data={
+            'file': SimpleUploadedFile('workflow.json', content),
+        })
+        assert serializer.is_valid(), serializer.errors
+    return run
+
+
+def upload_case(workflow_data):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.test import Client
+    from src.workflow.utils.cache import workflow_definition_cache
+
+    client = Client()
+    content = json.dumps(workflow_data).encode()
+
+    def run():
+        workflow_definition_cache.clear()
+        response = client.post(UPLOAD_URL, {'file': SimpleUploadedFile('workflow.json', content)})
+        assert response.status_code == 201, response.content
+    return run
+
+
+CASES = {
+    'engine': engine_case,
+    'validation': validation_case,
+    'upload': upload_case,
+}
+
+
+def create_trigger_account():
+    from src.workflow.models import Account, User
+
+    user = User.objects.create(user_id='105398891', pin=2090)
+    Account.objects.create(user=user, balance=Decimal(1_000_000))
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes, levels, repeat):
+    results = {}
+    for level in levels:
+        for name, generator in GENERATORS.items():
+            for size in sizes:
+                case = f'{level}.{name}.{size}'
+                results[case] = measure(CASES[level](generator(size)), repeat=repeat)
+                print(f'{case:<32} {results[case]:>10.4f}s', flush=True)
+    return results
+
+
+def compare(baseline, current, threshold):
+    """
+    Print every case found in both runs and return the names of the ones
+    slower than `baseline` by more than `threshold`, a fraction.
+    """
+    regressions = []
+    print(f'\n{"case":<32} {"baseline (s)":>13} {"current (s)":>12} {"change":>8}')
+    for case, seconds in current.items():
+        if (baseline_seconds := baseline.get(case)) is None:
+            continue
+        change = seconds / baseline_seconds - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(case)
+            flag = '  REGRESSION'
+        print(f'{case:<32} {baseline_seconds:>13.4f} {seconds:>12.4f} {change:>+8.1%}{flag}')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the workflow benchmark suite.')
+    parser.add_argument('--output', help='Write the results to this JSON file.')
+    parser.add_argument('--compare', help='JSON results of a previous run to compare against.')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Slowdown flagged as a regression, 0.1 is 10%%.')
+    parser.add_argument('--levels', nargs='+', choices=LEVELS, default=LEVELS)
+    parser.add_argument('--repeat', type=int, default=5, help='Best of this many calls per case.')
+    parser.add_argument('--quick', action='store_true', help=f'Only sizes {QUICK_SIZES}.')
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.standin_settings')
+    # Query latency is noise when comparing commits on the same machine.
+    os.environ.setdefault('STANDIN_QUERY_LATENCY_MS', '0')
+    setup_django()
+
+    sizes = QUICK_SIZES if args.quick else SIZES
+    with test_database():
+        create_trigger_account()
+        results = run_suite(sizes, args.levels, args.repeat)
+
+    report = {
+        'commit': get_commit(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'repeat': args.repeat,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(baseline['results'], results, args.threshold)
+        if regressions:
+            print(f'\n{len(regressions)} regressions over {args.threshold:.0%}: {", ".join(regressions)}')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,204 @@
+import io
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+
+from src.workflow.utils.abstracts import AbstractAuthenticationClass
+
+
+class InMemoryAuthenticationClass(AbstractAuthenticationClass):
+    """
+    Accepts any credentials, keeps the database out of engine benchmarks.
+    """
+
+    balance = Decimal(1_000_000)
+
+    @classmethod
+    def authenticate(cls, **credentials):
+        return {
+            'balance': cls.balance,
+            'is_valid': True,
+            'user_id': credentials['user_id'],
+        }
+
+
+def trigger_data(targets=('validate_account',)):
+    return {
+        'params': {
+            'user_id': '105398891',
+            'pin': 2090,
+        },
+        'transitions': [
+            {'target': target, 'condition': []} for target in targets
+        ],
+    }
+
+
+def validate_account_step(transitions):
+    return {
+        'id': 'validate_account',
+        'params': {
+            'user_id': {'from_id': 'start', 'param_id': 'user_id'},
+            'pin': {'from_id': 'start', 'param_id': 'pin'},
+        },
+        'action': 'validate_account',
+        'transitions': transitions,
+    }
+
+
+def fan_out_workflow(size):
+    """
+    `validate_account` followed by `size - 1` balance reads, all targeted
+    from the first step so the depth stays at two.
+    """
+    balance_steps = [
+        {
+            'id': f'account_balance_{index}',
+            'params': {
+                'user_id': {'from_id': 'validate_account', 'param_id': 'user_id'},
+            },
+            'action': 'get_account_balance',
+            'transitions': [],
+        }
+        for index in range(size - 1)
+    ]
+    # Targets are listed last to first, the worst case for list scans.
+    transitions = [
+        {
+            'target': step['id'],
+            'condition': [
+                {
+                    'from_id': 'validate_account',
+                    'field_id': 'is_valid',
+                    'operator': 'eq',
+                    'value': True,
+                }
+            ],
+        }
+        for step in reversed(balance_steps)
+    ]
+    return {
+        'steps': [validate_account_step(transitions)] + balance_steps,
+        'trigger': trigger_data(),
+    }
+
+
+def linear_workflow(size):
+    """
+    `size` balance reads chained one after the other, each logging the
+    trigger credentials.
+    """
+    steps = [
+        {
+            'id': f'account_balance_{index}',
+            'params': {
+                'user_id': {'from_id': 'start', 'param_id': 'user_id'},
+                'pin': {'from_id': 'start', 'param_id': 'pin'},
+            },
+            'action': 'get_account_balance',
+            'transitions': [
+                {'target': f'account_balance_{index + 1}', 'condition': []}
+            ] if index < size - 1 else [],
+        }
+        for index in range(size)
+    ]
+    return {
+        'steps': steps,
+        'trigger': trigger_data(targets=('account_balance_0',)),
+    }
+
+
+def measure(func, repeat=3):
+    """
+    Best wall time of `repeat` calls to `func`, in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started_at)
+    return min(timings)
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'acme.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """
+    Run the block against a freshly created test database, as `manage.py
+    test` does, and destroy it afterwards.
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def create_accounts(users, balance=Decimal(150_000)):
+    """
+    `users` users with a PIN of 1234, each with an account of `balance`.
+    """
+    from src.workflow.models import Account, User
+
+    users = User.objects.bulk_create([
+        User(user_id=str(100_000_000 + index), pin=1234) for index in range(users)
+    ])
+    Account.objects.bulk_create([
+        Account(user=user, balance=balance) for user in users
+    ])
+    return users
+
+
+def upload_body(workflow_data):
+    """
+    Multipart body uploading `workflow_data` as the `file` of the upload
+    views, to send as `MULTIPART_CONTENT`.
+    """
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.test.client import BOUNDARY, encode_multipart
+
+    return encode_multipart(BOUNDARY, {
+        'file': SimpleUploadedFile('workflow.json', json.dumps(workflow_data).encode()),
+    })
+
+
+def wsgi_post(application, path, body, content_type):
+    """
+    POST `body` straight to the WSGI `application`, no server in between.
+    Returns the status line and the response content.
+    """
+    environ = {
+        'REQUEST_METHOD': 'POST',
+        'PATH_INFO': path,
+        'SCRIPT_NAME': '',
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'CONTENT_TYPE': content_type,
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+    }
+    statuses = []
+    response = application(environ, lambda status, headers: statuses.append(status))
+    try:
+        content = b''.join(response)
+    finally:
+        response.close()
+    return statuses[0], content
@@ -0,0 +1,43 @@
+"""
+Validation of workflow definitions with the nested DRF serializers against
+the compiled workflow schema, on the synthetic workflows of
+`benchmarks.generators`.
+
+    python -m benchmarks.validation
+"""
+from benchmarks.generators import GENERATORS
+from benchmarks.utils import measure, setup_django
+
+setup_django()
+
+from src.workflow.api.serializers import (  # noqa: E402
+    WorkflowDataSerializer,
+    workflow_data_validator,
+)
+
+SIZES = (100, 1_000, 10_000)
+
+
+def validate_with_serializers(workflow_data):
+    serializer = WorkflowDataSerializer(data=workflow_data)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+def main():
+    print(
+        f'{"workflow":<12} {"steps":>7} {"serializers (s)":>16}'
+        f' {"schema (s)":>11} {"speedup":>8}'
+    )
+    for name, generator in GENERATORS.items():
+        for size in SIZES:
+            workflow_data = generator(size)
+            validated_data = workflow_data_validator.validate(workflow_data)
+            assert validated_data == validate_with_serializers(workflow_data)
+            before = measure(lambda: validate_with_serializers(workflow_data))
+            after = measure(lambda: workflow_data_validator.validate(workflow_data))
+            print(f'{name:<12} {size:>7} {before:>16.4f} {after:>11.4f} {before / after:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
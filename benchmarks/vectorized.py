@@ -0,0 +1,67 @@
+"""
+Scalar BatchWorkflow against VectorizedBatchWorkflow on the example
+workflow, authentication kept in memory.
+
+    python -m benchmarks.vectorized
+"""
+import json
+from decimal import Decimal
+from pathlib import Path
+
+from benchmarks.utils import measure, setup_django
+
+workflow_example_path = Path(__file__).resolve().parent.parent / 'postman' / 'workflow_example.json'
+
+SIZES = (1_000, 10_000, 100_000)
+
+
+class BalancesAuthenticationClass:
+    """
+    Hands out a spread of balances so every branch of the example runs.
+    """
+
+    @classmethod
+    def authenticate(cls, **credentials):
+        return cls.bulk_authenticate([credentials])[0]
+
+    @classmethod
+    def bulk_authenticate(cls, credentials_list):
+        return [
+            {
+                'balance': Decimal(int(credentials['user_id']) % 300_000).quantize(Decimal('0.01')),
+                'is_valid': True,
+                'user_id': credentials['user_id'],
+            }
+            for credentials in credentials_list
+        ]
+
+
+def run(batch_class, plan, trigger_params_list):
+    batch = batch_class(plan=plan, authentication_class=BalancesAuthenticationClass)
+    for _ in batch.run(trigger_params_list):
+        pass
+
+
+def main():
+    setup_django()
+    from src.workflow.utils.batch import BatchWorkflow
+    from src.workflow.utils.plan import compile_workflow
+    from src.workflow.utils.vectorized import VectorizedBatchWorkflow
+
+    with open(workflow_example_path) as workflow_example_file:
+        plan = compile_workflow(json.loads(workflow_example_file.read()))
+
+    print(f'{"triggers":>9} {"scalar (s)":>11} {"vectorized (s)":>15} {"speedup":>9}')
+    for size in SIZES:
+        trigger_params_list = [
+            {'user_id': str(index * 7_919), 'pin': 1234} for index in range(size)
+        ]
+        scalar = measure(lambda: run(BatchWorkflow, plan, trigger_params_list))
+        vectorized = measure(
+            lambda: run(VectorizedBatchWorkflow, plan, trigger_params_list)
+        )
+        print(f'{size:>9} {scalar:>11.3f} {vectorized:>15.3f} {scalar / vectorized:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
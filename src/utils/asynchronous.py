@@ -0,0 +1,21 @@
+import functools
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+def database_sync_to_async(func):
+    """
+    `sync_to_async` for ORM work that may run on any worker thread, so
+    concurrent coroutines don't queue on a single thread. Stale connections
+    of the worker thread are closed around every call.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(wrapper, thread_sensitive=False)
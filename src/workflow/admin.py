@@ -1,9 +1,15 @@
+import json
+
 from django.db import models
 
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
 from prettyjson import PrettyJSONWidget
 
-from src.workflow.models import Account, User, Upload
+from src.workflow.models import Account, User, Upload, UploadLog
 
 
 @admin.register(User)
@@ -23,11 +29,83 @@ class AccountAdmin(admin.ModelAdmin):
     search_fields = ('user__user_id',)
 
 
+@admin.register(UploadLog)
+class UploadLogAdmin(admin.ModelAdmin):
+
+    list_display = ('id', 'upload', 'position', 'entry',)
+    readonly_fields = ('id', 'upload', 'position', 'entry',)
+    list_select_related = ('upload',)
+    list_per_page = 100
+
+    def has_add_permission(self, request):
+        return False
+
+
 @admin.register(Upload)
 class UploadAdmin(admin.ModelAdmin):
 
     formfield_overrides = {
         models.JSONField: {'widget': PrettyJSONWidget}
     }
-    readonly_fields = ('id', 'file', 'success',)
+    readonly_fields = (
+        'id', 'file', 'success', 'log_entries_preview', 'profile_download', 'profile_summary',
+    )
+    exclude = ('profile', 'profile_top_functions',)
     list_display = ('id', 'file',)
+
+    # Uploads can have millions of log entries, the change page only shows
+    # the first ones and links to the paginated list of all of them.
+    log_entries_preview_size = 20
+
+    def get_urls(self):
+        return [
+            path(
+                '<path:object_id>/profile/',
+                self.admin_site.admin_view(self.download_profile),
+                name='workflow_upload_profile'
+            ),
+        ] + super().get_urls()
+
+    def download_profile(self, request, object_id):
+        upload = self.get_object(request, object_id)
+        if upload is None or not upload.profile:
+            raise Http404
+        if not self.has_view_permission(request, upload):
+            raise PermissionDenied
+        return FileResponse(
+            upload.profile.open('rb'),
+            as_attachment=True,
+            filename='%s.prof' % upload.pk
+        )
+
+    @admin.display(description='log entries')
+    def log_entries_preview(self, upload):
+        entries = upload.log_entries.all()[:self.log_entries_preview_size]
+        if not entries:
+            return '-'
+        rows = format_html_join(
+            '',
+            '<tr><td>{}</td><td><pre>{}</pre></td></tr>',
+            ((entry.position, json.dumps(entry.entry, indent=2)) for entry in entries)
+        )
+        return format_html(
+            '<table>{}</table><a href="{}?upload__id__exact={}">View all</a>',
+            rows,
+            reverse('admin:workflow_uploadlog_changelist'),
+            upload.pk
+        )
+
+    @admin.display(description='profile')
+    def profile_download(self, upload):
+        if not upload.profile:
+            return '-'
+        return format_html(
+            '<a href="{}">Download</a>',
+            reverse('admin:workflow_upload_profile', args=(upload.pk,))
+        )
+
+    @admin.display(description='top functions')
+    def profile_summary(self, upload):
+        if not upload.profile_top_functions:
+            return '-'
+        return format_html('<pre>{}</pre>', upload.profile_top_functions)
@@ -0,0 +1,294 @@
+"""
+Declarative schemas compiled into plain functions that validate data as the
+equivalent DRF serializers do, with the same validated data and the same
+errors, codes included, without building a serializer per node.
+
+    TRIGGER_PARAMS_SCHEMA = Object({
+        'user_id': String(),
+        'pin': Integer(),
+    })
+    trigger_params_validator = SchemaValidator(TRIGGER_PARAMS_SCHEMA)
+
+Every node stands for the DRF field of the same name: `Object` for a
+`Serializer`, `List` for `many=True`. Field hooks passed as `validators`
+play the part of `validate_<field_name>` methods and the `validate` hook of
+`Object` the one of `Serializer.validate`, both raise `ValidationError`.
+"""
+import re
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from django.core.validators import ProhibitNullCharactersValidator
+from rest_framework import fields, serializers
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.settings import api_settings
+from rest_framework.validators import ProhibitSurrogateCharactersValidator
+
+EMPTY = fields.empty
+
+
+class SchemaError(Exception):
+
+    def __init__(self, detail):
+        self.detail = detail
+
+
+def error(message, code, **kwargs):
+    return ErrorDetail(str(message).format(**kwargs) if kwargs else str(message), code=code)
+
+
+class Schema:
+    error_messages = fields.Field.default_error_messages
+
+    def __init__(self, required=True, allow_null=False, validators=()):
+        self.required = required
+        self.allow_null = allow_null
+        self.validators = tuple(validators)
+
+    def compile(self):
+        """
+        Function validating a value of the field that was given, as its
+        `run_validation` followed by the field hooks does.
+        """
+        validate_value = self.compile_value()
+        allow_null = self.allow_null
+        null_detail = [error(self.error_messages['null'], 'null')]
+        validators = self.validators
+
+        def run(data):
+            if data is None:
+                if not allow_null:
+                    raise SchemaError(null_detail)
+                value = None
+            else:
+                value = validate_value(data)
+            for validator in validators:
+                try:
+                    value = validator(value)
+                except serializers.ValidationError as exc:
+                    raise SchemaError(exc.detail)
+            return value
+        return run
+
+    def compile_value(self):
+        """
+        Function validating a value that isn't `None`.
+        """
+        raise NotImplementedError
+
+
+class Any(Schema):
+
+    def compile_value(self):
+        return lambda data: data
+
+
+class String(Schema):
+    error_messages = dict(Schema.error_messages, **fields.CharField.default_error_messages)
+
+    def compile_value(self):
+        invalid_detail = [error(self.error_messages['invalid'], 'invalid')]
+        blank_detail = [error(self.error_messages['blank'], 'blank')]
+        null_characters = error(
+            ProhibitNullCharactersValidator.message,
+            ProhibitNullCharactersValidator.code
+        )
+
+        def check_characters(value):
+            errors = []
+            if '\x00' in value:
+                errors.append(null_characters)
+            try:
+                value.encode()
+            except UnicodeEncodeError:
+                # Only surrogates can't be encoded.
+                errors.append(error(
+                    ProhibitSurrogateCharactersValidator.message,
+                    ProhibitSurrogateCharactersValidator.code,
+                    code_point=next(ord(char) for char in value if 0xD800 <= ord(char) <= 0xDFFF),
+                ))
+            if errors:
+                raise SchemaError(errors)
+
+        def validate_value(data):
+            if type(data) is not str:
+                if str(data).strip() == '':
+                    raise SchemaError(blank_detail)
+                if isinstance(data, bool) or not isinstance(data, (str, int, float)):
+                    raise SchemaError(invalid_detail)
+                data = str(data)
+            value = data.strip()
+            if not value:
+                raise SchemaError(blank_detail)
+            if '\x00' in value or not value.isascii():
+                check_characters(value)
+            return value
+        return validate_value
+
+
+class Integer(Schema):
+    error_messages = dict(Schema.error_messages, **fields.IntegerField.default_error_messages)
+    re_decimal = re.compile(r'\.0*\s*$')
+
+    def compile_value(self):
+        invalid_detail = [error(self.error_messages['invalid'], 'invalid')]
+        max_string_length_detail = [
+            error(self.error_messages['max_string_length'], 'max_string_length')
+        ]
+        re_decimal = self.re_decimal
+
+        def validate_value(data):
+            if type(data) is int:
+                return data
+            if isinstance(data, str) and len(data) > fields.IntegerField.MAX_STRING_LENGTH:
+                raise SchemaError(max_string_length_detail)
+            try:
+                return int(re_decimal.sub('', str(data)))
+            except (ValueError, TypeError):
+                raise SchemaError(invalid_detail)
+        return validate_value
+
+
+class Choice(Schema):
+    error_messages = dict(Schema.error_messages, **fields.ChoiceField.default_error_messages)
+
+    def __init__(self, choices, **kwargs):
+        super().__init__(**kwargs)
+        self.choices = list(choices)
+
+    def compile_value(self):
+        choice_strings_to_values = {str(choice): choice for choice in self.choices}
+        invalid_choice = self.error_messages['invalid_choice']
+
+        def validate_value(data):
+            try:
+                return choice_strings_to_values[data if type(data) is str else str(data)]
+            except KeyError:
+                raise SchemaError([error(invalid_choice, 'invalid_choice', input=data)])
+        return validate_value
+
+
+class Object(Schema):
+    error_messages = dict(Schema.error_messages, **serializers.Serializer.default_error_messages)
+
+    def __init__(self, fields, validate=None, **kwargs):
+        super().__init__(**kwargs)
+        self.fields = fields
+        self.validate = validate
+
+    def compile_value(self):
+        compiled_fields = [
+            (name, field.required, field.compile()) for name, field in self.fields.items()
+        ]
+        required_detail = [error(self.error_messages['required'], 'required')]
+        invalid = self.error_messages['invalid']
+        validate = self.validate
+
+        def validate_value(data):
+            if type(data) is not dict and not isinstance(data, Mapping):
+                raise SchemaError({api_settings.NON_FIELD_ERRORS_KEY: [
+                    error(invalid, 'invalid', datatype=type(data).__name__)
+                ]})
+            value = OrderedDict()
+            errors = None
+            for name, required, run in compiled_fields:
+                field_data = data.get(name, EMPTY)
+                if field_data is EMPTY:
+                    if required:
+                        errors = errors or OrderedDict()
+                        errors[name] = required_detail
+                    continue
+                try:
+                    value[name] = run(field_data)
+                except SchemaError as exc:
+                    errors = errors or OrderedDict()
+                    errors[name] = exc.detail
+            if errors:
+                raise SchemaError(errors)
+            if validate is not None:
+                try:
+                    value = validate(value)
+                except serializers.ValidationError as exc:
+                    raise SchemaError(serializers.as_serializer_error(exc))
+            return value
+        return validate_value
+
+
+class List(Schema):
+    error_messages = dict(
+        Schema.error_messages,
+        **serializers.ListSerializer.default_error_messages
+    )
+
+    def __init__(self, child, **kwargs):
+        super().__init__(**kwargs)
+        self.child = child
+
+    def compile_value(self):
+        run_child = self.child.compile()
+        not_a_list = self.error_messages['not_a_list']
+
+        def validate_value(data):
+            if not isinstance(data, list):
+                raise SchemaError({api_settings.NON_FIELD_ERRORS_KEY: [
+                    error(not_a_list, 'not_a_list', input_type=type(data).__name__)
+                ]})
+            value = []
+            for index, item in enumerate(data):
+                try:
+                    value.append(run_child(item))
+                except SchemaError as exc:
+                    raise SchemaError(self.collect_errors(run_child, data, index, exc.detail))
+            return value
+        return validate_value
+
+    @staticmethod
+    def collect_errors(run_child, data, index, detail):
+        """
+        Errors of every item once the one at `index` failed, `{}` for the
+        valid ones.
+        """
+        errors = [{} for _ in range(index)] + [detail]
+        for item in data[index + 1:]:
+            try:
+                run_child(item)
+                errors.append({})
+            except SchemaError as exc:
+                errors.append(exc.detail)
+        return errors
+
+
+class SchemaValidator:
+    """
+    Validates data against a schema compiled once.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self._run = schema.compile()
+
+    def run_validation(self, data):
+        """
+        Validated data, or `ValidationError` with the errors the field of
+        the schema would raise, as `Serializer.run_validation` does.
+        """
+        try:
+            return self._run(data)
+        except SchemaError as exc:
+            raise serializers.ValidationError(exc.detail)
+
+    def validate(self, data):
+        """
+        Validated data, or `ValidationError` with the errors a serializer
+        with `data` would have after `is_valid`.
+        """
+        try:
+            return self._run(data)
+        except SchemaError as exc:
+            detail = exc.detail
+        if isinstance(detail, list) and len(detail) == 1 and detail[0].code == 'null':
+            # As `Serializer.errors` does when the data is `None`.
+            detail = {api_settings.NON_FIELD_ERRORS_KEY: [
+                ErrorDetail('No data provided', code='null')
+            ]}
+        raise serializers.ValidationError(detail)
@@ -1,12 +1,48 @@
-import json
+import os
 
-from django.core.serializers.json import DjangoJSONEncoder
+from django.conf import settings
 from rest_framework import serializers
 
+from src.utils.asynchronous import database_sync_to_async
+from src.workflow.api.schema import Any, Choice, Integer, List, Object, SchemaValidator, String
 from src.workflow.models import Upload, Account
-from src.workflow.utils.authentication import UserPINAuthenticationClass
-from src.workflow.utils.exceptions import WorkflowException
-from src.workflow.utils.workflow import Workflow
+from src.workflow.utils.actions import action_registry
+from src.workflow.utils.authentication import CachedUserAuthentication, get_authentication_class
+from src.workflow.utils.batch import BatchWorkflow, bulk_update_balances
+from src.workflow.utils.cache import (
+    CachedWorkflowDefinition,
+    definition_cache_key,
+    workflow_definition_cache,
+)
+from src.workflow.utils.conditions import OPERATORS, validate_condition_value
+from src.workflow.utils.exceptions import (
+    InvalidConditionException,
+    InvalidWorkflowException,
+    InvalidWorkflowFileException,
+    WorkflowException,
+)
+from src.workflow.utils.logs import to_json_data
+from src.workflow.utils.parallel import ParallelWorkflow
+from src.workflow.utils.plan import compile_workflow
+from src.workflow.utils.sinks import DatabaseLogSink, MemoryLogSink, NDJSONLogSink
+from src.workflow.utils.streaming import JSONStreamReader, StreamedArray, load_json
+from src.workflow.utils.timing import TimingRecorder, process_timings
+from src.workflow.utils.vectorized import VectorizedBatchWorkflow
+from src.workflow.utils.workflow import AsyncWorkflow, Workflow
+
+
+def validate_condition(attrs):
+    try:
+        validate_condition_value(attrs['operator'], attrs['value'])
+    except InvalidConditionException as exc:
+        raise serializers.ValidationError({'value': [str(exc)]})
+    return attrs
+
+
+def validate_action(value):
+    if value not in action_registry:
+        raise serializers.ValidationError(f'"{value}" is not a valid action.')
+    return value
 
 
 class CustomConditionValueField(serializers.Field):
@@ -17,9 +53,12 @@ class CustomConditionValueField(serializers.Field):
 class ConditionSerializer(serializers.Serializer):
     from_id = serializers.CharField()
     field_id = serializers.CharField()
-    operator = serializers.CharField()
+    operator = serializers.ChoiceField(choices=list(OPERATORS))
     value = CustomConditionValueField()
 
+    def validate(self, attrs):
+        return validate_condition(attrs)
+
 
 class TransitionSerializer(serializers.Serializer):
     target = serializers.CharField()
@@ -54,13 +93,222 @@ class StepSerializer(serializers.Serializer):
     action = serializers.CharField()
     transitions = TransitionSerializer(many=True)
 
+    def validate_action(self, value):
+        return validate_action(value)
+
 
 class WorkflowDataSerializer(serializers.Serializer):
     steps = StepSerializer(many=True)
     trigger = TriggerSerializer()
 
 
-class WorkflowFileUploadSerializer(serializers.ModelSerializer):
+# The serializers above as schemas, validating the same way on the hot path.
+
+CONDITION_SCHEMA = Object(
+    {
+        'from_id': String(),
+        'field_id': String(),
+        'operator': Choice(OPERATORS),
+        'value': Any(),
+    },
+    validate=validate_condition,
+)
+
+TRANSITION_SCHEMA = Object({
+    'target': String(),
+    'condition': List(CONDITION_SCHEMA),
+})
+
+TRIGGER_PARAMS_SCHEMA = Object({
+    'user_id': String(),
+    'pin': Integer(),
+})
+
+
+def param_schema(required=True):
+    return Object(
+        {
+            'from_id': String(allow_null=True),
+            'param_id': String(required=False),
+            'value': Integer(required=False),
+        },
+        required=required,
+    )
+
+
+STEP_SCHEMA = Object({
+    'id': String(),
+    'params': Object({
+        'user_id': param_schema(),
+        'pin': param_schema(required=False),
+        'money': param_schema(required=False),
+    }),
+    'action': String(validators=[validate_action]),
+    'transitions': List(TRANSITION_SCHEMA),
+})
+
+WORKFLOW_DATA_SCHEMA = Object({
+    'steps': List(STEP_SCHEMA),
+    'trigger': Object({
+        'params': TRIGGER_PARAMS_SCHEMA,
+        'transitions': List(TRANSITION_SCHEMA),
+    }),
+})
+
+workflow_data_validator = SchemaValidator(WORKFLOW_DATA_SCHEMA)
+step_validator = SchemaValidator(STEP_SCHEMA)
+trigger_params_validator = SchemaValidator(TRIGGER_PARAMS_SCHEMA)
+# Only the params of a trigger, with the errors `TriggerSerializer` gives
+# for them, missing and null params included.
+trigger_validator = SchemaValidator(Object({'params': TRIGGER_PARAMS_SCHEMA}))
+
+
+class WorkflowDefinitionValidationMixin:
+
+    def read_workflow_file(self, workflow_file):
+        """
+        Validated workflow data and plan of the definition in
+        `workflow_file`, streamed when it is larger than
+        `WORKFLOW_STREAMING_FILE_SIZE`.
+
+        Uploads over `WORKFLOW_MAX_FILE_SIZE` are already stopped by the
+        upload views while they are received, the size is checked again
+        for files read from elsewhere.
+        """
+        max_size = settings.WORKFLOW_MAX_FILE_SIZE
+        size = workflow_file.size
+        if max_size is not None and size is not None and size > max_size:
+            raise serializers.ValidationError({
+                'file': ['Workflow file is larger than %s bytes' % max_size]
+            })
+        try:
+            if size is None or size > settings.WORKFLOW_STREAMING_FILE_SIZE:
+                workflow_data, plan = self.stream_workflow_definition(workflow_file)
+                self.validate_workflow_graph(plan.analysis)
+                return workflow_data, plan
+            json_data = load_json(workflow_file.read())
+        except InvalidWorkflowFileException as exc:
+            raise serializers.ValidationError({'file': [str(exc)]})
+        if isinstance(json_data, dict) and isinstance(json_data.get('steps'), list):
+            self.validate_step_count(len(json_data['steps']))
+        return self.validate_workflow_definition(json_data)
+
+    def stream_workflow_definition(self, workflow_file):
+        """
+        `compile_workflow_definition` reading `workflow_file` in chunks,
+        with its steps validated one at a time as they are read. Errors
+        are the ones `WorkflowDataSerializer` gives.
+
+        The definition cache is skipped, keying it would take the whole
+        parsed definition.
+        """
+        reader = JSONStreamReader(workflow_file, max_size=settings.WORKFLOW_MAX_FILE_SIZE)
+        steps = step_errors = None
+        if reader.peek() != '{':
+            json_data = reader.read_document()
+        else:
+            json_data = {}
+            for key, value in reader.iter_members(streamed_keys=('steps',)):
+                if isinstance(value, StreamedArray):
+                    steps, step_errors = self.validate_streamed_steps(value)
+                    value = []
+                elif key == 'steps':
+                    steps = step_errors = None
+                json_data[key] = value
+
+        try:
+            workflow_data = workflow_data_validator.validate(json_data)
+            errors = {}
+        except serializers.ValidationError as exc:
+            errors = dict(exc.detail)
+        if step_errors is not None and any(step_errors):
+            errors['steps'] = step_errors
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        if steps is not None:
+            workflow_data['steps'] = steps
+        return workflow_data, self.compile_validated_workflow(workflow_data)
+
+    def validate_streamed_steps(self, steps):
+        """
+        Validated steps and their errors, as `StepSerializer(many=True)`
+        gives them.
+        """
+        validated_steps = []
+        errors = []
+        for count, step in enumerate(steps, 1):
+            self.validate_step_count(count)
+            try:
+                validated_steps.append(step_validator.run_validation(step))
+                errors.append({})
+            except serializers.ValidationError as exc:
+                errors.append(exc.detail)
+        return validated_steps, errors
+
+    def validate_step_count(self, count):
+        max_steps = settings.WORKFLOW_MAX_DEFINITION_STEPS
+        if max_steps is not None and count > max_steps:
+            raise serializers.ValidationError({
+                'file': ['Workflow has more than %s steps' % max_steps]
+            })
+
+    def validate_workflow_definition(self, json_data):
+        workflow_data, plan = self.compile_workflow_definition(json_data)
+        self.validate_workflow_graph(plan.analysis)
+        return workflow_data, plan
+
+    def compile_workflow_definition(self, json_data):
+        cache_key = definition_cache_key(json_data)
+        if cached := workflow_definition_cache.get(cache_key):
+            # The rest of the definition is the cached one, only its params
+            # can be invalid and they get the errors of a cache miss.
+            try:
+                trigger_params = trigger_validator.run_validation(json_data['trigger'])['params']
+            except serializers.ValidationError as exc:
+                raise serializers.ValidationError({'trigger': exc.detail})
+            workflow_data = dict(cached.workflow_data)
+            workflow_data['trigger'] = dict(workflow_data['trigger'], params=trigger_params)
+            return workflow_data, cached.plan.with_trigger_params(trigger_params)
+
+        workflow_data = workflow_data_validator.validate(json_data)
+        plan = self.compile_validated_workflow(workflow_data)
+        workflow_definition_cache.set(
+            cache_key,
+            CachedWorkflowDefinition(workflow_data=workflow_data, plan=plan)
+        )
+        return workflow_data, plan
+
+    def compile_validated_workflow(self, workflow_data):
+        try:
+            return compile_workflow(workflow_data)
+        except InvalidWorkflowException as exc:
+            raise serializers.ValidationError({'file': [str(exc)]})
+
+    def validate_workflow_graph(self, analysis):
+        errors = []
+        if analysis.cycles and settings.WORKFLOW_REJECT_CYCLES:
+            errors.append('Workflow has cyclic transitions: %s' % ', '.join(
+                ' -> '.join(cycle) for cycle in analysis.cycles
+            ))
+        max_path_length = settings.WORKFLOW_MAX_PATH_LENGTH
+        if max_path_length is not None and (
+                analysis.max_path_length is None
+                or analysis.max_path_length > max_path_length
+        ):
+            errors.append('Workflow can run more than %s steps in a row' % max_path_length)
+        if errors:
+            raise serializers.ValidationError({'file': errors})
+
+    def validate_trigger_params(self, trigger_params):
+        try:
+            return trigger_params_validator.validate(trigger_params)
+        except serializers.ValidationError as exc:
+            raise serializers.ValidationError({'trigger': {'params': exc.detail}})
+
+
+class WorkflowFileUploadSerializer(WorkflowDefinitionValidationMixin,
+                                   serializers.ModelSerializer):
     class Meta:
         model = Upload
         fields = ('id', 'file', 'logs',)
@@ -72,33 +320,160 @@ class WorkflowFileUploadSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         validated_data = super().validate(attrs)
 
-        json_data = json.loads(validated_data['file'].read())
-        workflow_serializer = WorkflowDataSerializer(data=json_data)
-        workflow_serializer.is_valid(raise_exception=True)
-        self.context['workflow_data'] = workflow_serializer.validated_data
+        workflow_data, plan = self.read_workflow_file(validated_data['file'])
+        self.context['workflow_data'] = workflow_data
+        self.context['workflow_plan'] = plan
 
         return validated_data
 
-    def save(self, **kwargs):
-        upload = super().save(**kwargs)
-        workflow = Workflow(
+    def get_workflow(self, workflow_class=Workflow, log_sink=None):
+        return workflow_class(
             workflow_data=self.context['workflow_data'],
-            authentication_class=UserPINAuthenticationClass
+            authentication_class=CachedUserAuthentication(get_authentication_class()),
+            plan=self.context['workflow_plan'],
+            max_steps=settings.WORKFLOW_MAX_STEPS,
+            log_sink=log_sink,
+            timer=TimingRecorder() if settings.WORKFLOW_TIMING else None,
         )
+
+    def get_analysis(self):
+        return self.context['workflow_plan'].analysis.as_dict()
+
+    def get_log_sink(self, upload):
+        sink_kwargs = {
+            'buffer_size': settings.WORKFLOW_LOG_BUFFER_SIZE,
+            'flush_interval': settings.WORKFLOW_LOG_FLUSH_INTERVAL,
+            'verbosity': settings.WORKFLOW_LOG_VERBOSITY,
+        }
+        if settings.WORKFLOW_LOG_SINK == 'ndjson':
+            os.makedirs(settings.WORKFLOW_LOG_DIR, exist_ok=True)
+            return NDJSONLogSink(
+                os.path.join(settings.WORKFLOW_LOG_DIR, '%s.ndjson' % upload.pk),
+                **sink_kwargs
+            )
+        if settings.WORKFLOW_LOG_SINK == 'database':
+            return DatabaseLogSink(upload, **sink_kwargs)
+        return MemoryLogSink(**sink_kwargs)
+
+    def get_workflow_class(self):
+        return ParallelWorkflow if settings.WORKFLOW_PARALLEL_BRANCHES else Workflow
+
+    def can_run_on_event_loop(self):
+        """
+        Whether `AsyncWorkflow` can run the configured setup: it has no
+        parallel branches and writes to the log sink on the event loop,
+        where the database sink can't reach the ORM.
+        """
+        return not settings.WORKFLOW_PARALLEL_BRANCHES and settings.WORKFLOW_LOG_SINK != 'database'
+
+    def save(self, **kwargs):
+        upload = super().save(analysis=self.get_analysis(), **kwargs)
+        workflow = self.get_workflow(self.get_workflow_class(), log_sink=self.get_log_sink(upload))
         try:
             workflow.run_trigger()
-            if workflow.new_balance:
-                account = Account.objects.get(user__user_id=workflow.user_id)
-                account.balance = workflow.new_balance
-                account.save()
-                upload.success = True
+            self.save_balance(upload, workflow)
         except WorkflowException:
             # handle exception, maybe send to sentry
             pass
-        upload.logs = json.loads(
-            json.dumps(
-                workflow.logs,
-                cls=DjangoJSONEncoder
-            )
-        )
+        self.save_logs(upload, workflow)
+
+    async def asave(self, **kwargs):
+        if not self.can_run_on_event_loop():
+            # The run `save` does, on a worker thread.
+            return await database_sync_to_async(self.save)(**kwargs)
+        upload = await database_sync_to_async(super().save)(analysis=self.get_analysis(), **kwargs)
+        workflow = self.get_workflow(AsyncWorkflow, log_sink=self.get_log_sink(upload))
+        try:
+            await workflow.arun_trigger()
+            await database_sync_to_async(self.save_balance)(upload, workflow)
+        except WorkflowException:
+            # handle exception, maybe send to sentry
+            pass
+        await database_sync_to_async(self.save_logs)(upload, workflow)
+
+    def save_balance(self, upload, workflow):
+        if workflow.new_balance:
+            account = Account.objects.get(user__user_id=workflow.user_id)
+            account.balance = workflow.new_balance
+            account.save()
+            upload.success = True
+
+    def save_logs(self, upload, workflow):
+        upload.logs = to_json_data(workflow.logs)
+        if workflow.timer is not None:
+            upload.timing = workflow.timer.as_dict()
+            process_timings.add(workflow.timer)
         upload.save()
+
+
+class WorkflowBatchUploadSerializer(WorkflowDefinitionValidationMixin,
+                                    serializers.Serializer):
+    file = serializers.FileField(write_only=True)
+    triggers = serializers.FileField(write_only=True)
+    results = serializers.ListField(read_only=True)
+
+    def validate(self, attrs):
+        validated_data = super().validate(attrs)
+
+        _, plan = self.read_workflow_file(validated_data['file'])
+        self.context['workflow_plan'] = plan
+        self.context['trigger_params_list'] = [
+            self.validate_trigger_params(trigger_params)
+            for trigger_params in self.read_triggers(validated_data['triggers'])
+        ]
+
+        return validated_data
+
+    def read_triggers(self, triggers_file):
+        """
+        Trigger params come either as a JSON list or as one JSON object per
+        line.
+        """
+        content = triggers_file.read()
+        try:
+            if content.lstrip().startswith(b'['):
+                return load_json(content)
+            return [load_json(line) for line in content.splitlines() if line.strip()]
+        except InvalidWorkflowFileException as exc:
+            raise serializers.ValidationError({'triggers': [str(exc)]})
+
+    def create(self, validated_data):
+        upload_file = Upload._meta.get_field('file')
+        file_name = upload_file.storage.save(
+            upload_file.generate_filename(None, validated_data['file'].name),
+            validated_data['file']
+        )
+
+        batch_class = (
+            VectorizedBatchWorkflow if settings.WORKFLOW_VECTORIZED_BATCH else BatchWorkflow
+        )
+        batch = batch_class(
+            plan=self.context['workflow_plan'],
+            authentication_class=get_authentication_class(),
+            max_steps=settings.WORKFLOW_MAX_STEPS,
+            log_verbosity=settings.WORKFLOW_BATCH_LOG_VERBOSITY,
+        )
+        results = list(batch.run(self.context['trigger_params_list']))
+        bulk_update_balances(batch.balances)
+        analysis = self.context['workflow_plan'].analysis.as_dict()
+
+        uploads = Upload.objects.bulk_create([
+            Upload(
+                file=file_name,
+                success=result.success,
+                logs=to_json_data(result.logs),
+                analysis=analysis,
+            )
+            for result in results
+        ])
+        return {
+            'results': [
+                {
+                    'id': upload.id,
+                    'user_id': result.trigger_params['user_id'],
+                    'success': upload.success,
+                    'logs': upload.logs,
+                }
+                for upload, result in zip(uploads, results)
+            ]
+        }
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler
+from rest_framework import serializers
+
+
+class WorkflowFileSizeLimitUploadHandler(FileUploadHandler):
+    """
+    Rejects an upload as soon as its `file` part goes over
+    `WORKFLOW_MAX_FILE_SIZE`, before the rest of the body is received and
+    spooled to memory or disk by the handlers after it.
+    """
+
+    limited_field_name = 'file'
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_size = settings.WORKFLOW_MAX_FILE_SIZE
+        self.limited = False
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.limited = field_name == self.limited_field_name and self.max_size is not None
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.limited and start + len(raw_data) > self.max_size:
+            raise serializers.ValidationError({
+                'file': ['Workflow file is larger than %s bytes' % self.max_size]
+            })
+        return raw_data
+
+    def file_complete(self, file_size):
+        # The next handlers build the uploaded file.
+        return None
@@ -9,4 +9,19 @@ urlpatterns = [
         views.WorkflowFileUploadView.as_view(),
         name=views.WorkflowFileUploadView.name
     ),
+    path(
+        'upload/async/',
+        views.WorkflowFileAsyncUploadView.as_view(),
+        name=views.WorkflowFileAsyncUploadView.name
+    ),
+    path(
+        'upload/batch/',
+        views.WorkflowBatchUploadView.as_view(),
+        name=views.WorkflowBatchUploadView.name
+    ),
+    path(
+        'timings/',
+        views.WorkflowTimingsView.as_view(),
+        name=views.WorkflowTimingsView.name
+    ),
 ]
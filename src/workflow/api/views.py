@@ -1,11 +1,155 @@
-from rest_framework.generics import CreateAPIView
+import asyncio
 
-from src.workflow.api.serializers import WorkflowFileUploadSerializer
+from django.conf import settings
+from django.core.files.base import ContentFile
+from rest_framework import status
+from rest_framework.generics import CreateAPIView, GenericAPIView
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from src.utils.asynchronous import database_sync_to_async
+from src.workflow.api.serializers import (
+    WorkflowBatchUploadSerializer,
+    WorkflowFileUploadSerializer,
+)
+from src.workflow.api.upload_handlers import WorkflowFileSizeLimitUploadHandler
 from src.workflow.models import Upload
+from src.workflow.utils.profiling import CallProfiler
+from src.workflow.utils.timing import process_timings
+
+
+class WorkflowFileSizeLimitMixin:
+    """
+    Stops reading uploads whose workflow file goes over
+    `WORKFLOW_MAX_FILE_SIZE` while the body is received.
+    """
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers.insert(0, WorkflowFileSizeLimitUploadHandler(request))
+        return super().initialize_request(request, *args, **kwargs)
 
 
-class WorkflowFileUploadView(CreateAPIView):
+class WorkflowFileUploadView(WorkflowFileSizeLimitMixin, CreateAPIView):
+    """
+    Requests run under cProfile when `WORKFLOW_PROFILE_UPLOADS` is on or
+    when a staff user sends the `X-Workflow-Profile` header, the profile
+    is stored with the created `Upload`.
+    """
 
     name = 'upload'
     queryset = Upload.objects.all()
     serializer_class = WorkflowFileUploadSerializer
+
+    profile_header = 'HTTP_X_WORKFLOW_PROFILE'
+
+    def should_profile(self, request):
+        if settings.WORKFLOW_PROFILE_UPLOADS:
+            return True
+        return bool(request.META.get(self.profile_header)) and request.user.is_staff
+
+    def post(self, request, *args, **kwargs):
+        if not self.should_profile(request):
+            return super().post(request, *args, **kwargs)
+
+        profiler = CallProfiler()
+        response = profiler.runcall(super().post, request, *args, **kwargs)
+        if response.status_code == status.HTTP_201_CREATED:
+            self.save_profile(Upload.objects.get(pk=response.data['id']), profiler)
+        return response
+
+    def save_profile(self, upload, profiler):
+        upload.profile_top_functions = profiler.get_top_functions(
+            limit=settings.WORKFLOW_PROFILE_TOP_FUNCTIONS
+        )
+        upload.profile.save(
+            '%s.prof' % upload.pk,
+            ContentFile(profiler.get_stats_file_content()),
+        )
+
+
+class WorkflowFileAsyncUploadView(WorkflowFileSizeLimitMixin, GenericAPIView):
+    """
+    `WorkflowFileUploadView` for the ASGI entry point, the workflow runs
+    on `AsyncWorkflow` and database work is done off the event loop.
+
+    Django only supports coroutine function views, `as_view` builds one
+    that goes through the steps of `APIView.dispatch`: authentication,
+    permissions, throttles and the exception handler.
+    """
+
+    name = 'upload-async'
+    queryset = Upload.objects.all()
+    serializer_class = WorkflowFileUploadSerializer
+    http_method_names = ['post', 'options']
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Checks the view class and its arguments, as DRF does.
+        super().as_view(**initkwargs)
+
+        async def view(request, *args, **kwargs):
+            self = cls(**initkwargs)
+            self.setup(request, *args, **kwargs)
+            return await self.adispatch(request, *args, **kwargs)
+
+        view.cls = cls
+        view.initkwargs = initkwargs
+        # Like DRF views, rely on the authentication classes and not on the
+        # CSRF middleware, `SessionAuthentication` enforces CSRF itself.
+        view.csrf_exempt = True
+        return view
+
+    async def adispatch(self, request, *args, **kwargs):
+        """
+        `APIView.dispatch` with the handler awaited when it is a coroutine.
+        """
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await database_sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = await database_sync_to_async(self.handle_exception)(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    def get_valid_serializer(self):
+        serializer = self.get_serializer(data=self.request.FILES)
+        serializer.is_valid(raise_exception=True)
+        return serializer
+
+    async def post(self, request, *args, **kwargs):
+        serializer = await database_sync_to_async(self.get_valid_serializer)()
+        await serializer.asave()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class WorkflowBatchUploadView(WorkflowFileSizeLimitMixin, CreateAPIView):
+
+    name = 'upload-batch'
+    serializer_class = WorkflowBatchUploadSerializer
+
+
+class WorkflowTimingsView(APIView):
+    """
+    Latency histograms of every timed run of this process, see
+    `WORKFLOW_TIMING`.
+    """
+
+    name = 'timings'
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, *args, **kwargs):
+        return Response(process_timings.as_dict())
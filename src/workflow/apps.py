@@ -6,3 +6,6 @@ class WorkflowAppConfig(AppConfig):
 
     name = 'src.workflow'
     verbose_name = _('Workflow')
+
+    def ready(self):
+        from src.workflow import signals  # noqa: F401
@@ -0,0 +1,263 @@
+import functools
+import json
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from src.workflow.api.serializers import WorkflowFileUploadSerializer
+from src.workflow.models import Upload
+from src.workflow.utils.authentication import get_authentication_class
+from src.workflow.utils.batch import PrefetchedAuthentication, bulk_update_balances
+from src.workflow.utils.exceptions import InvalidWorkflowFileException, WorkflowException
+from src.workflow.utils.logs import FULL_LOGS, LOG_VERBOSITIES, to_json_data
+from src.workflow.utils.sinks import MemoryLogSink
+from src.workflow.utils.streaming import JSONStreamReader
+from src.workflow.utils.workflow import Workflow
+
+WorkflowFileResult = namedtuple(
+    'WorkflowFileResult',
+    ('path', 'file', 'success', 'logs', 'analysis', 'errors'),
+)
+
+
+def read_user_id(path):
+    """
+    `user_id` of the trigger of the file at `path`, streamed up to the
+    trigger so no more than a step is held in memory at once. `None` when
+    the file is over `WORKFLOW_MAX_FILE_SIZE` or has no readable `user_id`.
+    """
+    max_size = settings.WORKFLOW_MAX_FILE_SIZE
+    try:
+        if max_size is not None and os.path.getsize(path) > max_size:
+            return None
+        with open(path, 'rb') as workflow_file:
+            reader = JSONStreamReader(workflow_file, max_size=max_size)
+            for key, value in reader.iter_members(streamed_keys=('steps',)):
+                if key == 'trigger':
+                    return str(value['params']['user_id'])
+    except (OSError, InvalidWorkflowFileException, KeyError, TypeError):
+        return None
+    return None
+
+
+def group_by_user(paths, user_ids=None):
+    """
+    Files of the same `user_id` in their original order. Files without a
+    readable `user_id` can't touch an account and get a group each.
+
+    `user_ids` are the ones of `paths`, read here one file after another
+    when they aren't given.
+    """
+    if user_ids is None:
+        user_ids = map(read_user_id, paths)
+    groups = {}
+    for path, user_id in zip(paths, user_ids):
+        groups.setdefault(path if user_id is None else user_id, []).append(path)
+    return list(groups.values())
+
+
+def build_tasks(groups, chunk_size):
+    """
+    Pack groups into tasks of about `chunk_size` files. A group is never
+    split, so the runs of one account happen in order in a single process.
+    """
+    tasks = []
+    task = []
+    for group in groups:
+        if task and len(task) + len(group) > chunk_size:
+            tasks.append(task)
+            task = []
+        task.extend(group)
+    if task:
+        tasks.append(task)
+    return tasks
+
+
+def init_worker():
+    # Pool processes started with `spawn` import nothing from the parent.
+    django.setup()
+
+
+def validate_workflow_file(path):
+    with open(path, 'rb') as workflow_file:
+        serializer = WorkflowFileUploadSerializer(
+            data={'file': File(workflow_file, name=os.path.basename(path))}
+        )
+        try:
+            serializer.is_valid()
+        except (ValueError, TypeError) as exc:
+            # Files that aren't a JSON object never reach the serializers.
+            return None, {'file': [str(exc)]}
+    if serializer.errors:
+        return None, to_json_data(serializer.errors)
+    return serializer, None
+
+
+def store_workflow_file(path):
+    upload_file = Upload._meta.get_field('file')
+    with open(path, 'rb') as workflow_file:
+        return upload_file.storage.save(
+            upload_file.generate_filename(None, os.path.basename(path)),
+            File(workflow_file)
+        )
+
+
+def run_workflow_files(paths, log_verbosity=FULL_LOGS):
+    """
+    Validate and run `paths` in order, then write the balances of the
+    updated accounts at once.
+
+    Accounts are authenticated in one round-trip, balances updated by a run
+    are seen by the following runs of the same account. A file whose run
+    raises something else than a `WorkflowException` fails with the error
+    in `errors`, the other files still run.
+    """
+    results = [None] * len(paths)
+    serializers = []
+    for index, path in enumerate(paths):
+        serializer, errors = validate_workflow_file(path)
+        if errors:
+            results[index] = WorkflowFileResult(str(path), None, False, [], None, errors)
+        else:
+            serializers.append((index, path, serializer))
+
+    balances = {}
+    authentication = PrefetchedAuthentication(
+        get_authentication_class(),
+        [
+            dict(serializer.context['workflow_plan'].trigger_params)
+            for _, _, serializer in serializers
+        ],
+        balances
+    )
+    for index, path, serializer in serializers:
+        workflow = Workflow(
+            workflow_data=serializer.context['workflow_data'],
+            authentication_class=authentication,
+            plan=serializer.context['workflow_plan'],
+            max_steps=settings.WORKFLOW_MAX_STEPS,
+            log_sink=MemoryLogSink(verbosity=log_verbosity),
+        )
+        success = False
+        file = None
+        errors = None
+        try:
+            file = store_workflow_file(path)
+            workflow.run_trigger()
+            if success := bool(workflow.new_balance):
+                balances[workflow.user_id] = workflow.new_balance
+        except WorkflowException:
+            pass
+        except Exception as exc:
+            errors = {'run': ['%s: %s' % (type(exc).__name__, exc)]}
+        results[index] = WorkflowFileResult(
+            path=str(path),
+            file=file,
+            success=success,
+            logs=to_json_data(workflow.logs),
+            analysis=serializer.get_analysis(),
+            errors=errors,
+        )
+
+    bulk_update_balances(balances)
+    return results
+
+
+class Command(BaseCommand):
+    help = 'Validate and run every workflow JSON file of a directory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Processes to run the files on, 1 runs them in this process.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=100,
+            help='Files handed to a process at once.',
+        )
+        parser.add_argument(
+            '--log-verbosity',
+            choices=LOG_VERBOSITIES,
+            default=settings.WORKFLOW_BATCH_LOG_VERBOSITY,
+            help='Log every step or only a summary of every file.',
+        )
+
+    def handle(self, *args, **options):
+        directory = Path(options['directory'])
+        if not directory.is_dir():
+            raise CommandError('%s is not a directory' % directory)
+        if options['workers'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--workers and --chunk-size must be positive')
+
+        started_at = time.perf_counter()
+        paths = sorted(directory.glob('*.json'))
+
+        counts = {'succeeded': 0, 'failed': 0, 'invalid': 0}
+        run_task = functools.partial(run_workflow_files, log_verbosity=options['log_verbosity'])
+        with self.pool(options['workers']) as pool_map:
+            # Files are only read up to their trigger here, on the pool too.
+            user_ids = list(pool_map(read_user_id, paths, chunksize=options['chunk_size']))
+            tasks = build_tasks(group_by_user(paths, user_ids), options['chunk_size'])
+            self.save_results(pool_map(run_task, tasks), counts)
+
+        elapsed = time.perf_counter() - started_at
+        self.stdout.write(
+            'Ran %d files in %.2fs (%.1f files/s): %d succeeded, %d failed, %d invalid' % (
+                len(paths),
+                elapsed,
+                len(paths) / elapsed if elapsed else 0,
+                counts['succeeded'],
+                counts['failed'],
+                counts['invalid'],
+            )
+        )
+
+    def save_results(self, task_results, counts):
+        for results in task_results:
+            uploads = []
+            for result in results:
+                if result.errors:
+                    self.stderr.write('%s: %s' % (result.path, json.dumps(result.errors)))
+                # Invalid files are never analysed.
+                if result.analysis is None:
+                    counts['invalid'] += 1
+                    continue
+                counts['succeeded' if result.success else 'failed'] += 1
+                if result.file is None:
+                    continue
+                uploads.append(Upload(
+                    file=result.file,
+                    success=result.success,
+                    logs=result.logs,
+                    analysis=result.analysis,
+                ))
+            Upload.objects.bulk_create(uploads)
+
+    @contextmanager
+    def pool(self, workers):
+        """
+        `map(func, items, chunksize)` running on `workers` processes, or in
+        this one when `workers` is 1.
+        """
+        if workers == 1:
+            yield lambda func, items, chunksize=1: map(func, items)
+            return
+
+        # Forked processes must not share the connections of this one.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+            yield executor.map
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.4 on 2026-10-18 03:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0002_upload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadLog',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('position', models.PositiveIntegerField()),
+                ('entry', models.JSONField(default=dict)),
+                ('upload', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='log_entries', to='workflow.upload')),
+            ],
+            options={
+                'ordering': ('position',),
+            },
+        ),
+    ]
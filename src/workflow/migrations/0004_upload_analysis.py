@@ -0,0 +1,18 @@
+# Generated by Django 3.2.4 on 2026-10-18 03:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0003_uploadlog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='analysis',
+            field=models.JSONField(default=dict),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.4 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0004_upload_analysis'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='timing',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
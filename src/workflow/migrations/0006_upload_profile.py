@@ -0,0 +1,23 @@
+# Generated by Django 3.2.4 on 2026-10-18 03:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0005_upload_timing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='profile',
+            field=models.FileField(blank=True, upload_to='workflow/profiles/'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='profile_top_functions',
+            field=models.TextField(blank=True),
+        ),
+    ]
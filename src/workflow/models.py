@@ -50,3 +50,24 @@ class Upload(ACMEModel):
     )
     success = models.BooleanField(default=False)
     logs = models.JSONField(default=list)
+    analysis = models.JSONField(default=dict)
+    timing = models.JSONField(null=True, blank=True)
+    profile = models.FileField(
+        upload_to='workflow/profiles/',
+        blank=True
+    )
+    profile_top_functions = models.TextField(blank=True)
+
+
+class UploadLog(ACMEModel):
+
+    upload = models.ForeignKey(
+        Upload,
+        on_delete=models.CASCADE,
+        related_name='log_entries'
+    )
+    position = models.PositiveIntegerField()
+    entry = models.JSONField(default=dict)
+
+    class Meta:
+        ordering = ('position',)
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from src.workflow.models import User
+from src.workflow.utils.cache import pin_check_cache
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_pin_checks(sender, instance, **kwargs):
+    pin_check_cache.invalidate(instance.pk)
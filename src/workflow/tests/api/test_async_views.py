@@ -0,0 +1,120 @@
+import json
+from decimal import Decimal
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.test import Client, RequestFactory, TransactionTestCase, override_settings
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.reverse import reverse
+
+from src.utils.asynchronous import database_sync_to_async
+from src.workflow.api.views import WorkflowFileAsyncUploadView
+from src.workflow.models import Upload
+from src.workflow.tests.factories import UserFactory, AccountFactory
+from src.workflow.utils.cache import workflow_definition_cache
+
+workflow_example_path = Path(__file__).resolve().parent.parent / 'workflow_example.json'
+
+
+class WorkflowAsyncAPITestCase(TransactionTestCase):
+
+    def setUp(self):
+        self.user = UserFactory(
+            user_id='105398891',
+            pin=2090
+        )
+        self.account = AccountFactory(
+            user=self.user,
+            balance=Decimal(70_000)
+        )
+
+        self.url = reverse('api:workflow:upload-async')
+        # The async test client of this Django version can't send multipart
+        # bodies, requests are built with the regular factory instead.
+        self.factory = RequestFactory()
+        self.view = WorkflowFileAsyncUploadView.as_view()
+
+        workflow_definition_cache.clear()
+        self.addCleanup(workflow_definition_cache.clear)
+
+    async def test_process_workflow_path_2(self):
+        with open(workflow_example_path) as workflow_example_file:
+            request = self.factory.post(self.url, data={'file': workflow_example_file})
+        res = (await self.view(request)).render()
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res_data = json.loads(res.content)
+        self.assertEqual(len(res_data['logs']), 6)
+        self.assertEqual(res_data['logs'][-1]['output']['balance'], '220000.00')
+
+    async def test_invalid_file(self):
+        res = (await self.view(self.factory.post(self.url, data={}))).render()
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('file', json.loads(res.content))
+
+    def test_upload_is_saved(self):
+        with open(workflow_example_path) as workflow_example_file:
+            res = self.client.post(self.url, data={'file': workflow_example_file})
+
+        upload = Upload.objects.get(pk=res.json()['id'])
+        self.assertTrue(upload.success)
+        self.assertEqual(len(upload.logs), 6)
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance.to_decimal(), Decimal(220_000))
+
+    @override_settings(WORKFLOW_LOG_SINK='database', WORKFLOW_LOG_BUFFER_SIZE=3)
+    def test_database_log_sink(self):
+        with open(workflow_example_path) as workflow_example_file:
+            res = self.client.post(self.url, data={'file': workflow_example_file})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        upload = Upload.objects.get(pk=res.json()['id'])
+        self.assertEqual(upload.logs, [])
+        self.assertEqual(upload.log_entries.count(), 6)
+
+    @override_settings(WORKFLOW_LOG_VERBOSITY='summary')
+    def test_log_sink_settings(self):
+        with open(workflow_example_path) as workflow_example_file:
+            res = self.client.post(self.url, data={'file': workflow_example_file})
+
+        upload = Upload.objects.get(pk=res.json()['id'])
+        self.assertEqual(len(upload.logs), 1)
+        self.assertEqual(upload.logs[0]['summary']['steps'], 6)
+
+    @override_settings(WORKFLOW_PARALLEL_BRANCHES=True)
+    def test_parallel_branches(self):
+        with open(workflow_example_path) as workflow_example_file:
+            res = self.client.post(self.url, data={'file': workflow_example_file})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        upload = Upload.objects.get(pk=res.json()['id'])
+        self.assertTrue(upload.success)
+        self.assertEqual(len(upload.logs), 6)
+
+    async def test_method_not_allowed(self):
+        res = (await self.view(self.factory.get(self.url))).render()
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        self.assertEqual(res['Allow'], 'POST, OPTIONS')
+
+    async def test_permissions_are_checked(self):
+        view = WorkflowFileAsyncUploadView.as_view(permission_classes=[IsAuthenticated])
+        with open(workflow_example_path) as workflow_example_file:
+            request = self.factory.post(self.url, data={'file': workflow_example_file})
+        res = (await view(request)).render()
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(await database_sync_to_async(Upload.objects.exists)())
+
+    def test_session_authentication_enforces_csrf(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(get_user_model().objects.create_user('admin', password='admin'))
+        with open(workflow_example_path) as workflow_example_file:
+            res = client.post(self.url, data={'file': workflow_example_file})
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertIn('CSRF', res.json()['detail'])
@@ -0,0 +1,201 @@
+import copy
+import json
+import random
+from collections import OrderedDict
+from pathlib import Path
+
+from django.test import SimpleTestCase
+from rest_framework import serializers
+
+from src.workflow.api.schema import Integer, List, Object, SchemaValidator, String
+from src.workflow.api.serializers import (
+    StepSerializer,
+    TriggerParamsSerializer,
+    WorkflowDataSerializer,
+    step_validator,
+    trigger_params_validator,
+    workflow_data_validator,
+)
+
+workflow_example_path = Path(__file__).resolve().parent.parent / 'workflow_example.json'
+
+MUTATIONS = (
+    None, '', '   ', ' padded ', 0, 1, -1, 10 ** 30, 1.0, 1.5, True, False, [], {}, [0, 10],
+    'abc', '12', ' 12 ', '1.00', '1.5', '1_000', '\x00', 'a\x00b', '\ud800', 'a\ud800\x00',
+    '9' * 1001, 'run_trigger', 'validate_account', 'between', 'in', 'contains', 'start',
+    {'from_id': None, 'value': 5}, {'from_id': 'start', 'param_id': 'pin'},
+    {'target': 'account_balance', 'condition': []},
+)
+
+
+def paths(data, path=()):
+    yield path
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from paths(value, path + (key,))
+    elif isinstance(data, list):
+        for index, value in enumerate(data):
+            yield from paths(value, path + (index,))
+
+
+def mutate(data, rng):
+    """
+    `data` with a random node below the top deleted, replaced, duplicated
+    or given an extra key.
+    """
+    path = rng.choice([path for path in paths(data) if path])
+    parent = data
+    for key in path[:-1]:
+        parent = parent[key]
+    key = path[-1]
+    kind = rng.random()
+    if kind < 0.2:
+        del parent[key]
+    elif kind < 0.3 and isinstance(parent, list):
+        parent.insert(key, copy.deepcopy(parent[key]))
+    elif kind < 0.35 and isinstance(parent[key], dict):
+        parent[key]['extra'] = rng.choice(MUTATIONS)
+    else:
+        parent[key] = copy.deepcopy(rng.choice(MUTATIONS))
+    return data
+
+
+def serializer_result(serializer):
+    if serializer.is_valid():
+        return serializer.validated_data, None
+    return None, serializer.errors
+
+
+def validator_result(validator, data):
+    try:
+        return validator.validate(data), None
+    except serializers.ValidationError as exc:
+        return None, exc.detail
+
+
+class SchemaValidatorDifferentialTestCase(SimpleTestCase):
+    """
+    The schemas give the data and errors of the serializers they replace.
+    """
+
+    def setUp(self):
+        with open(workflow_example_path) as workflow_example_file:
+            self.workflow_data = json.loads(workflow_example_file.read())
+
+    def assertSameResult(self, serializer, validator, data):
+        expected_data, expected_errors = serializer_result(serializer)
+        validated_data, errors = validator_result(validator, data)
+
+        self.assertEqual(validated_data, expected_data)
+        self.assertEqual(errors, expected_errors)
+        # Same order and same codes, which plain equality doesn't check.
+        self.assertEqual(json.dumps(errors), json.dumps(expected_errors))
+        self.assertEqual(error_codes(errors), error_codes(expected_errors))
+
+    def test_valid_workflow(self):
+        self.assertSameResult(
+            WorkflowDataSerializer(data=self.workflow_data),
+            workflow_data_validator,
+            self.workflow_data
+        )
+        self.assertIsInstance(workflow_data_validator.validate(self.workflow_data), OrderedDict)
+
+    def test_mutated_workflows(self):
+        rng = random.Random(24)
+        for index in range(600):
+            data = copy.deepcopy(self.workflow_data)
+            for _ in range(rng.randint(1, 3)):
+                if data:
+                    mutate(data, rng)
+            with self.subTest(index=index, data=data):
+                self.assertSameResult(
+                    WorkflowDataSerializer(data=data),
+                    workflow_data_validator,
+                    data
+                )
+
+    def test_mutated_steps(self):
+        rng = random.Random(25)
+        for index in range(300):
+            data = mutate(copy.deepcopy(rng.choice(self.workflow_data['steps'])), rng)
+            with self.subTest(index=index, data=data):
+                try:
+                    expected = StepSerializer().run_validation(data), None
+                except serializers.ValidationError as exc:
+                    expected = None, exc.detail
+                try:
+                    result = step_validator.run_validation(data), None
+                except serializers.ValidationError as exc:
+                    result = None, exc.detail
+                self.assertEqual(result, expected)
+                self.assertEqual(error_codes(result[1]), error_codes(expected[1]))
+
+    def test_documents_that_are_not_objects(self):
+        for data in (None, [], [self.workflow_data], 'workflow', 1, True):
+            with self.subTest(data=data):
+                self.assertSameResult(
+                    WorkflowDataSerializer(data=data),
+                    workflow_data_validator,
+                    data
+                )
+
+    def test_trigger_params(self):
+        for data in (
+                {'user_id': '105398891', 'pin': 2090},
+                {'user_id': 105398891, 'pin': '2090'},
+                {'user_id': ' 105398891 ', 'pin': 2090.0},
+                {'user_id': '', 'pin': 'pin'},
+                {'user_id': None},
+                {},
+                None,
+                [],
+        ):
+            with self.subTest(data=data):
+                self.assertSameResult(
+                    TriggerParamsSerializer(data=data),
+                    trigger_params_validator,
+                    data
+                )
+
+
+class SchemaValidatorTestCase(SimpleTestCase):
+
+    def test_hooks(self):
+        def validate_name(value):
+            if value == 'admin':
+                raise serializers.ValidationError('Reserved name.')
+            return value.title()
+
+        def validate(attrs):
+            if attrs['age'] < 18:
+                raise serializers.ValidationError({'age': 'Too young.'})
+            return attrs
+
+        validator = SchemaValidator(List(Object(
+            {'name': String(validators=[validate_name]), 'age': Integer()},
+            validate=validate,
+        )))
+
+        self.assertEqual(
+            validator.validate([{'name': 'ada', 'age': '36'}]),
+            [OrderedDict(name='Ada', age=36)]
+        )
+        with self.assertRaises(serializers.ValidationError) as context:
+            validator.validate([
+                {'name': 'ada', 'age': 36},
+                {'name': 'admin', 'age': 36},
+                {'name': 'bob', 'age': 12},
+            ])
+        self.assertEqual(context.exception.detail, [
+            {},
+            {'name': ['Reserved name.']},
+            {'age': ['Too young.']},
+        ])
+
+
+def error_codes(detail):
+    if isinstance(detail, dict):
+        return {key: error_codes(value) for key, value in detail.items()}
+    if isinstance(detail, list):
+        return [error_codes(value) for value in detail]
+    return getattr(detail, 'code', None)
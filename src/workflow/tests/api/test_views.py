@@ -1,13 +1,21 @@
 import json
+import marshal
+import pstats
 from decimal import Decimal
 from pathlib import Path
 
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, override_settings
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
-from src.workflow.models import Upload
+from src.workflow.api.views import WorkflowBatchUploadView, WorkflowFileUploadView
+from src.workflow.models import Upload, UploadLog
 from src.workflow.tests.factories import UserFactory, AccountFactory
+from src.workflow.utils.cache import workflow_definition_cache
+from src.workflow.utils.timing import process_timings
 
 workflow_example_path = Path(__file__).resolve().parent.parent / 'workflow_example.json'
 
@@ -26,6 +34,9 @@ class WorkflowAPITestCase(APITestCase):
 
         self.url = reverse('api:workflow:upload')
 
+        workflow_definition_cache.clear()
+        self.addCleanup(workflow_definition_cache.clear)
+
     def test_process_workflow_path_1(self):
         with open(workflow_example_path) as workflow_example_file:
             self.account.balance = Decimal(150_000)
@@ -138,3 +149,453 @@ class WorkflowAPITestCase(APITestCase):
             self.account.refresh_from_db()
             self.assertEqual(self.account.balance.to_decimal(), Decimal(220_000))
 
+    def test_reject_workflow_with_cyclic_param_reference(self):
+        with open(workflow_example_path) as workflow_example_file:
+            workflow_input_data = json.loads(workflow_example_file.read())
+
+        account_balance_step = workflow_input_data['steps'][1]
+        account_balance_step['params']['user_id'] = {
+            'from_id': 'account_balance',
+            'param_id': 'user_id',
+        }
+        payload = {
+            'file': SimpleUploadedFile(
+                'workflow.json',
+                json.dumps(workflow_input_data).encode(),
+                content_type='application/json'
+            ),
+        }
+        res = self.client.post(self.url, data=payload, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('cyclic reference', res.json()['file'][0])
+        self.assertFalse(Upload.objects.exists())
+
+    def test_reject_workflow_with_unknown_condition_operator(self):
+        with open(workflow_example_path) as workflow_example_file:
+            workflow_input_data = json.loads(workflow_example_file.read())
+
+        account_balance_step = workflow_input_data['steps'][1]
+        account_balance_step['transitions'][0]['condition'][0]['operator'] = 'contains'
+        payload = {
+            'file': SimpleUploadedFile(
+                'workflow.json',
+                json.dumps(workflow_input_data).encode(),
+                content_type='application/json'
+            ),
+        }
+        res = self.client.post(self.url, data=payload, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(
+            'operator',
+            res.json()['steps'][1]['transitions'][0]['condition'][0]
+        )
+        self.assertFalse(Upload.objects.exists())
+
+    def test_reject_workflow_with_unknown_action(self):
+        with open(workflow_example_path) as workflow_example_file:
+            workflow_input_data = json.loads(workflow_example_file.read())
+
+        workflow_input_data['steps'][1]['action'] = 'run_trigger'
+        payload = {
+            'file': SimpleUploadedFile(
+                'workflow.json',
+                json.dumps(workflow_input_data).encode(),
+                content_type='application/json'
+            ),
+        }
+        res = self.client.post(self.url, data=payload, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('action', res.json()['steps'][1])
+        self.assertFalse(Upload.objects.exists())
+
+    def test_repeated_definition_reuses_cached_validation(self):
+        other_user = UserFactory(
+            user_id='105398892',
+            pin=3030
+        )
+        other_account = AccountFactory(
+            user=other_user,
+            balance=Decimal(150_000)
+        )
+        self.account.balance = Decimal(150_000)
+        self.account.save()
+
+        with open(workflow_example_path) as workflow_example_file:
+            workflow_input_data = json.loads(workflow_example_file.read())
+
+        for user_id, pin in (('105398891', 2090), ('105398892', 3030), ('105398892', 'pin')):
+            workflow_input_data['trigger']['params'] = {'user_id': user_id, 'pin': pin}
+            payload = {
+                'file': SimpleUploadedFile(
+                    'workflow.json',
+                    json.dumps(workflow_input_data).encode(),
+                    content_type='application/json'
+                ),
+            }
+            res = self.client.post(self.url, data=payload, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('pin', res.json()['trigger']['params'])
+        self.assertEqual(workflow_definition_cache.info().hits, 2)
+        self.assertEqual(workflow_definition_cache.info().misses, 1)
+
+        self.assertEqual(Upload.objects.filter(success=True).count(), 2)
+        other_account.refresh_from_db()
+        self.assertEqual(other_account.balance.to_decimal(), Decimal(149_970))
+
+    def test_cached_definition_gives_the_same_trigger_params_errors(self):
+        with open(workflow_example_path) as workflow_example_file:
+            workflow_input_data = json.loads(workflow_example_file.read())
+
+        def post(trigger):
+            payload = {
+                'file': SimpleUploadedFile(
+                    'workflow.json',
+                    json.dumps(dict(workflow_input_data, trigger=trigger)).encode(),
+                    content_type='application/json'
+                ),
+            }
+            return self.client.post(self.url, data=payload, format='multipart')
+
+        params = workflow_input_data['trigger']['params']
+        without_params = {
+            key: value for key, value in workflow_input_data['trigger'].items() if key != 'params'
+        }
+        for trigger in (
+                without_params,
+                dict(without_params, params=None),
+                dict(without_params, params={}),
+                dict(without_params, params=[]),
+                dict(without_params, params=dict(params, pin=None)),
+        ):
+            with self.subTest(trigger=trigger):
+                workflow_definition_cache.clear()
+                miss = post(trigger)
+                post(workflow_input_data['trigger'])
+                hit = post(trigger)
+
+                self.assertEqual(workflow_definition_cache.info().hits, 1)
+                self.assertEqual(miss.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(hit.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(hit.json(), miss.json())
+
+    def test_parallel_branches_keep_sequential_logs(self):
+        logs = []
+        for parallel in (False, True):
+            self.account.balance = Decimal(150_000)
+            self.account.save()
+            with open(workflow_example_path) as workflow_example_file, \
+                    override_settings(WORKFLOW_PARALLEL_BRANCHES=parallel):
+                res = self.client.post(self.url, data={'file': workflow_example_file}, format='multipart')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            logs.append(Upload.objects.get(pk=res.json()['id']).logs)
+
+        self.assertEqual(logs[1], logs[0])
+
+    @override_settings(WORKFLOW_LOG_SINK='database', WORKFLOW_LOG_BUFFER_SIZE=3)
+    def test_database_log_sink(self):
+        self.account.balance = Decimal(150_000)
+        self.account.save()
+        with open(workflow_example_path) as workflow_example_file:
+            res = self.client.post(self.url, data={'file': workflow_example_file}, format='multipart')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        upload = Upload.objects.get(pk=res.json()['id'])
+        self.assertEqual(upload.logs, [])
+        self.assertEqual(
+            [entry.entry['id'] for entry in upload.log_entries.all()],
+            ['validate_account', 'account_balance', 'withdraw_30', 'account_balance_end_30']
+        )
+
+    def test_admin_previews_log_entries(self):
+        upload = Upload.objects.create(file='workflow/files/workflow.json')
+        other = Upload.objects.create(file='workflow/files/workflow.json')
+        UploadLog.objects.bulk_create([
+            UploadLog(upload=upload, position=position, entry={'id': 'step_%s' % position})
+            for position in range(30)
+        ] + [UploadLog(upload=other, position=0, entry={'id': 'other_step'})])
+        staff = get_user_model().objects.create(username='staff', is_staff=True, is_superuser=True)
+        self.client.force_login(staff)
+
+        res = self.client.get(reverse('admin:workflow_upload_change', args=(upload.pk,)))
+        self.assertContains(res, '&quot;step_19&quot;')
+        self.assertNotContains(res, '&quot;step_20&quot;')
+        changelist_url = '%s?upload__id__exact=%s' % (
+            reverse('admin:workflow_uploadlog_changelist'), upload.pk
+        )
+        self.assertContains(res, changelist_url)
+
+        res = self.client.get(changelist_url)
+        self.assertEqual(res.context['cl'].result_count, 30)
+
+    def test_graph_analysis_is_saved(self):
+        with open(workflow_example_path) as workflow_example_file:
+            res = self.client.post(self.url, data={'file': workflow_example_file}, format='multipart')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        analysis = Upload.objects.get(pk=res.json()['id']).analysis
+        self.assertEqual(analysis['steps'], 8)
+        self.assertEqual(analysis['unreachable_steps'], [])
+        self.assertEqual(analysis['cycles'], [])
+        self.assertEqual(analysis['max_path_length'], 6)
+
+    @override_settings(WORKFLOW_MAX_PATH_LENGTH=5)
+    def test_reject_workflow_with_long_paths(self):
+        with open(workflow_example_path) as workflow_example_file:
+            res = self.client.post(self.url, data={'file': workflow_example_file}, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.json()['file'], ['Workflow can run more than 5 steps in a row'])
+        self.assertFalse(Upload.objects.exists())
+
+    def test_timing_is_off_by_default(self):
+        with open(workflow_example_path) as workflow_example_file:
+            res = self.client.post(self.url, data={'file': workflow_example_file}, format='multipart')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertIsNone(Upload.objects.get(pk=res.json()['id']).timing)
+
+    @override_settings(WORKFLOW_TIMING=True)
+    def test_timing_is_saved(self):
+        process_timings.reset()
+        self.addCleanup(process_timings.reset)
+        with open(workflow_example_path) as workflow_example_file:
+            res = self.client.post(self.url, data={'file': workflow_example_file}, format='multipart')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        upload = Upload.objects.get(pk=res.json()['id'])
+        timing = upload.timing
+        self.assertEqual(timing['run']['count'], 1)
+        self.assertEqual(timing['step']['count'], len(upload.logs))
+        self.assertEqual(timing['authenticate']['count'], 1)
+        self.assertEqual(timing['action.validate_account']['count'], 1)
+
+        timings_url = reverse('api:workflow:timings')
+        self.assertEqual(self.client.get(timings_url).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(get_user_model().objects.create(username='staff', is_staff=True))
+        res = self.client.get(timings_url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), timing)
+
+    def post_profiled_upload(self, **extra):
+        with open(workflow_example_path) as workflow_example_file:
+            res = self.client.post(
+                self.url,
+                data={'file': workflow_example_file},
+                format='multipart',
+                HTTP_X_WORKFLOW_PROFILE='1',
+                **extra
+            )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return Upload.objects.get(pk=res.json()['id'])
+
+    def test_profile_header_is_staff_only(self):
+        upload = self.post_profiled_upload()
+
+        self.assertFalse(upload.profile)
+        self.assertEqual(upload.profile_top_functions, '')
+
+    def test_staff_profiled_upload(self):
+        staff = get_user_model().objects.create(username='staff', is_staff=True, is_superuser=True)
+        self.client.force_authenticate(staff)
+
+        upload = self.post_profiled_upload()
+        self.addCleanup(upload.profile.delete, save=False)
+
+        self.assertIn('function calls', upload.profile_top_functions)
+        self.assertIn('run_trigger', upload.profile_top_functions)
+        stats = pstats.Stats()
+        stats.stats = marshal.loads(upload.profile.read())
+        self.assertTrue(stats.stats)
+
+        self.client.force_login(staff)
+        res = self.client.get(reverse('admin:workflow_upload_change', args=(upload.pk,)))
+        self.assertContains(res, 'Download')
+        res = self.client.get(reverse('admin:workflow_upload_profile', args=(upload.pk,)))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(res.streaming_content), upload.profile.open('rb').read())
+
+        # Staff without the view permission on uploads can't get profiles.
+        self.client.force_login(get_user_model().objects.create(username='other', is_staff=True))
+        res = self.client.get(reverse('admin:workflow_upload_profile', args=(upload.pk,)))
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_batch_upload(self):
+        self.account.balance = Decimal(150_000)
+        self.account.save()
+
+        triggers = '\n'.join([
+            json.dumps({'user_id': '105398891', 'pin': 2090}),
+            json.dumps({'user_id': '105398891', 'pin': 1111}),
+            json.dumps({'user_id': '105398891', 'pin': 2090}),
+        ])
+        with open(workflow_example_path) as workflow_example_file:
+            payload = {
+                'file': workflow_example_file,
+                'triggers': SimpleUploadedFile(
+                    'triggers.ndjson',
+                    triggers.encode(),
+                    content_type='application/x-ndjson'
+                ),
+            }
+            res = self.client.post(
+                reverse('api:workflow:upload-batch'),
+                data=payload,
+                format='multipart'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        results = res.json()['results']
+        self.assertEqual([result['success'] for result in results], [True, False, True])
+        self.assertEqual(results[2]['logs'][-1]['output']['balance'], '149940.00')
+        self.assertEqual(Upload.objects.count(), 3)
+        self.assertEqual(len(Upload.objects.get(pk=results[0]['id']).logs), 4)
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance.to_decimal(), Decimal(149_940))
+
+    def test_batch_upload_rejects_invalid_triggers(self):
+        for triggers in (b'[{"user_id": "105398891"', b'{"pin": 2090}\nnot json', b'\xff\xfe'):
+            with open(workflow_example_path) as workflow_example_file:
+                payload = {
+                    'file': workflow_example_file,
+                    'triggers': SimpleUploadedFile('triggers.ndjson', triggers),
+                }
+                res = self.client.post(
+                    reverse('api:workflow:upload-batch'),
+                    data=payload,
+                    format='multipart'
+                )
+
+            with self.subTest(triggers=triggers):
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn('Invalid JSON', res.json()['triggers'][0])
+        self.assertFalse(Upload.objects.exists())
+
+    def post_workflow(self, content):
+        payload = {
+            'file': SimpleUploadedFile('workflow.json', content, content_type='application/json'),
+        }
+        return self.client.post(self.url, data=payload, format='multipart')
+
+    def test_streamed_upload(self):
+        self.account.balance = Decimal(150_000)
+        self.account.save()
+        with open(workflow_example_path, 'rb') as workflow_example_file:
+            content = workflow_example_file.read()
+
+        with override_settings(WORKFLOW_STREAMING_FILE_SIZE=0):
+            res = self.post_workflow(content)
+        streamed_logs = Upload.objects.get(pk=res.json()['id']).logs
+        self.account.balance = Decimal(150_000)
+        self.account.save()
+        res = self.post_workflow(content)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(streamed_logs, Upload.objects.get(pk=res.json()['id']).logs)
+        self.assertEqual(workflow_definition_cache.info().currsize, 1)
+
+    def test_streamed_upload_errors(self):
+        with open(workflow_example_path) as workflow_example_file:
+            workflow_input_data = json.loads(workflow_example_file.read())
+
+        invalid_step = dict(workflow_input_data['steps'][1], action='run_trigger')
+        invalid_condition_step = json.loads(json.dumps(workflow_input_data['steps'][1]))
+        invalid_condition_step['transitions'][0]['condition'][0]['operator'] = 'contains'
+        for json_data in (
+                [],
+                {},
+                {'steps': None, 'trigger': {}},
+                {'steps': {}, 'trigger': workflow_input_data['trigger']},
+                dict(workflow_input_data, steps=[workflow_input_data['steps'][0], invalid_step]),
+                dict(workflow_input_data, steps=[invalid_condition_step, 1, None]),
+                dict(workflow_input_data, trigger={'params': {'pin': 'pin'}}),
+        ):
+            content = json.dumps(json_data).encode()
+            res = self.post_workflow(content)
+            with override_settings(WORKFLOW_STREAMING_FILE_SIZE=0):
+                streamed_res = self.post_workflow(content)
+
+            with self.subTest(json_data=json_data):
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(streamed_res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(streamed_res.json(), res.json())
+        self.assertFalse(Upload.objects.exists())
+
+    def test_reject_invalid_json(self):
+        for streaming_file_size in (0, 1024 * 1024):
+            with override_settings(WORKFLOW_STREAMING_FILE_SIZE=streaming_file_size):
+                res = self.post_workflow(b'{"steps": [}')
+
+            with self.subTest(streaming_file_size=streaming_file_size):
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn('Invalid JSON', res.json()['file'][0])
+
+    def test_reject_large_files(self):
+        with open(workflow_example_path, 'rb') as workflow_example_file:
+            content = workflow_example_file.read()
+
+        with override_settings(WORKFLOW_MAX_FILE_SIZE=len(content) - 1):
+            res = self.post_workflow(content)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.json(), {
+            'file': ['Workflow file is larger than %s bytes' % (len(content) - 1)]
+        })
+
+    @override_settings(WORKFLOW_MAX_FILE_SIZE=100 * 1024)
+    def test_large_files_are_rejected_while_received(self):
+        class CountingStream:
+
+            def __init__(self, stream):
+                self.stream = stream
+                self.read_size = 0
+
+            def read(self, *args):
+                data = self.stream.read(*args)
+                self.read_size += len(data)
+                return data
+
+            def readline(self, *args):
+                data = self.stream.readline(*args)
+                self.read_size += len(data)
+                return data
+
+        content = b' ' * (4 * 1024 * 1024)
+        for view, url in (
+                (WorkflowFileUploadView.as_view(), self.url),
+                (WorkflowBatchUploadView.as_view(), reverse('api:workflow:upload-batch')),
+        ):
+            request = RequestFactory().post(url, data={
+                'file': SimpleUploadedFile('workflow.json', content),
+                'triggers': SimpleUploadedFile('triggers.ndjson', b''),
+            })
+            request._stream = stream = CountingStream(request._stream)
+
+            with self.subTest(url=url):
+                res = view(request).render()
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(json.loads(res.content), {
+                    'file': ['Workflow file is larger than %s bytes' % (100 * 1024)]
+                })
+                self.assertLess(stream.read_size, 512 * 1024)
+
+    def test_reject_workflow_with_too_many_steps(self):
+        with open(workflow_example_path, 'rb') as workflow_example_file:
+            content = workflow_example_file.read()
+
+        for streaming_file_size in (0, 1024 * 1024):
+            with override_settings(
+                    WORKFLOW_MAX_DEFINITION_STEPS=3,
+                    WORKFLOW_STREAMING_FILE_SIZE=streaming_file_size
+            ):
+                res = self.post_workflow(content)
+
+            with self.subTest(streaming_file_size=streaming_file_size):
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(res.json(), {'file': ['Workflow has more than 3 steps']})
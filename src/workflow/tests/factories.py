@@ -1,3 +1,5 @@
+import copy
+
 from factory.django import DjangoModelFactory
 
 from src.workflow.models import User, Account
@@ -11,3 +13,54 @@ class UserFactory(DjangoModelFactory):
 class AccountFactory(DjangoModelFactory):
     class Meta:
         model = Account
+
+
+def step_data(step_id, targets=(), action='get_account_balance', params=None, condition=None):
+    """
+    Step of a workflow definition going to every step of `targets` under
+    the same `condition`.
+    """
+    return {
+        'id': step_id,
+        'params': copy.deepcopy(params) if params else {},
+        'action': action,
+        'transitions': [
+            {'target': target, 'condition': copy.deepcopy(condition) or []}
+            for target in targets
+        ],
+    }
+
+
+def workflow_data(steps, targets, conditions=None, trigger_params=None):
+    """
+    Workflow definition whose trigger goes to `targets`, under the condition
+    of `conditions` for each target listed there.
+    """
+    conditions = conditions or {}
+    return {
+        'steps': steps,
+        'trigger': {
+            'params': trigger_params or {},
+            'transitions': [
+                {'target': target, 'condition': conditions.get(target, [])}
+                for target in targets
+            ],
+        },
+    }
+
+
+def linear_workflow_data(actions, params=None, trigger_params=None):
+    """
+    Workflow definition running `actions` one after the other, as steps
+    `step_0`, `step_1`...
+    """
+    steps = [
+        step_data(
+            f'step_{index}',
+            [f'step_{index + 1}'] if index < len(actions) - 1 else [],
+            action=action,
+            params=params,
+        )
+        for index, action in enumerate(actions)
+    ]
+    return workflow_data(steps, ['step_0'], trigger_params=trigger_params)
@@ -0,0 +1,69 @@
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
+
+from src.workflow.tests.factories import linear_workflow_data
+from src.workflow.utils.actions import action_registry
+from src.workflow.utils.exceptions import UnknownActionException
+from src.workflow.utils.parallel import ACCOUNT, ParallelWorkflow
+from src.workflow.utils.plan import compile_workflow
+from src.workflow.utils.workflow import AsyncWorkflow, Workflow
+
+
+def workflow_data(actions):
+    return linear_workflow_data(actions, params={'money': {'from_id': None, 'value': 10}})
+
+
+class ActionRegistryTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.registry = action_registry.copy()
+
+        @self.registry.register('charge_fee')
+        def charge_fee(workflow, **params):
+            workflow.new_balance -= Decimal(params['money']) / 100
+            return {'balance': workflow.new_balance}
+
+    def run_workflow(self, workflow_class, actions):
+        workflow = workflow_class(plan=compile_workflow(workflow_data(actions), registry=self.registry))
+        workflow.new_balance = Decimal(1000)
+        return workflow
+
+    def test_actions_are_resolved_at_compile_time(self):
+        plan = compile_workflow(workflow_data(['deposit_money']))
+
+        self.assertIs(plan.get_step('step_0').handler, action_registry.get('deposit_money'))
+
+    def test_registered_action(self):
+        workflow = self.run_workflow(Workflow, ['deposit_money', 'charge_fee'])
+        workflow.run_trigger()
+
+        self.assertEqual(workflow.new_balance, Decimal('1009.9'))
+        self.assertEqual([log.action for log in workflow.logs], ['deposit_money', 'charge_fee'])
+        self.assertNotIn('charge_fee', action_registry)
+
+    def test_registered_action_runs_on_async_workflow(self):
+        workflow = self.run_workflow(AsyncWorkflow, ['charge_fee'])
+        async_to_sync(workflow.arun_trigger)()
+
+        self.assertEqual(workflow.new_balance, Decimal('999.9'))
+
+    def test_unknown_actions_are_rejected(self):
+        for action in ('charge_fee', 'run_trigger', 'process_step', '__init__'):
+            with self.subTest(action=action), self.assertRaises(UnknownActionException):
+                compile_workflow(workflow_data(['get_account_balance', action]))
+
+    def test_registration_declares_account_effects(self):
+        @self.registry.register('notify', reads_account=False, writes_account=False)
+        def notify(workflow, **params):
+            return {'sent': True}
+
+        notify_workflow = self.run_workflow(ParallelWorkflow, ['notify'])
+        notify_footprint = notify_workflow.get_footprint(notify_workflow.plan.trigger.transitions[0])
+        fee_workflow = self.run_workflow(ParallelWorkflow, ['charge_fee'])
+        fee_footprint = fee_workflow.get_footprint(fee_workflow.plan.trigger.transitions[0])
+
+        self.assertNotIn(ACCOUNT, notify_footprint.reads | notify_footprint.writes)
+        self.assertIn(ACCOUNT, fee_footprint.reads)
+        self.assertIn(ACCOUNT, fee_footprint.writes)
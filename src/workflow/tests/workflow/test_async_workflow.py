@@ -0,0 +1,63 @@
+import json
+from decimal import Decimal
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+from django.test import TransactionTestCase
+
+from src.workflow.tests.factories import UserFactory, AccountFactory
+from src.workflow.utils.authentication import UserPINAuthenticationClass
+from src.workflow.utils.exceptions import UnknownActionException
+from src.workflow.utils.workflow import AsyncWorkflow, Workflow
+
+workflow_example_path = Path(__file__).resolve().parent.parent / 'workflow_example.json'
+
+
+class AsyncWorkflowTestCase(TransactionTestCase):
+
+    def setUp(self):
+        self.user = UserFactory(
+            user_id='105398891',
+            pin=2090
+        )
+        self.account = AccountFactory(
+            user=self.user,
+            balance=Decimal(70_000)
+        )
+        with open(workflow_example_path) as workflow_example_file:
+            self.workflow_input_data = json.loads(workflow_example_file.read())
+
+    async def test_async_workflow_matches_workflow(self):
+        workflow = AsyncWorkflow(
+            workflow_data=self.workflow_input_data,
+            authentication_class=UserPINAuthenticationClass,
+        )
+        await workflow.arun_trigger()
+
+        self.assertEqual(len(workflow.logs), 6)
+        self.assertEqual(workflow.initial_balance, Decimal(70_000))
+        self.assertEqual(workflow.new_balance, Decimal(220_000))
+
+    def test_async_workflow_logs(self):
+        sync_workflow = Workflow(
+            workflow_data=self.workflow_input_data,
+            authentication_class=UserPINAuthenticationClass,
+        )
+        sync_workflow.run_trigger()
+
+        workflow = AsyncWorkflow(
+            workflow_data=self.workflow_input_data,
+            authentication_class=UserPINAuthenticationClass,
+        )
+        async_to_sync(workflow.arun_trigger)()
+
+        self.assertEqual(workflow.logs, sync_workflow.logs)
+
+    def test_invalid_action(self):
+        self.workflow_input_data['steps'][0]['action'] = 'run_trigger'
+
+        with self.assertRaises(UnknownActionException):
+            AsyncWorkflow(
+                workflow_data=self.workflow_input_data,
+                authentication_class=UserPINAuthenticationClass,
+            )
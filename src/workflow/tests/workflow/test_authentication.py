@@ -0,0 +1,215 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+
+from src.workflow.models import Account
+from src.workflow.tests.factories import UserFactory, AccountFactory
+from src.workflow.utils.authentication import (
+    CachedPINAuthenticationClass,
+    CachedUserAuthentication,
+    UserPINAuthenticationClass,
+)
+from src.workflow.utils.cache import PINCheckCache, pin_check_cache
+from src.workflow.utils.plan import compile_workflow
+from src.workflow.utils.workflow import Workflow
+
+
+def validate_account_step(step_id, target=None):
+    return {
+        'id': step_id,
+        'params': {
+            'user_id': {'from_id': 'start', 'param_id': 'user_id'},
+            'pin': {'from_id': 'start', 'param_id': 'pin'},
+        },
+        'action': 'validate_account',
+        'transitions': [{'target': target, 'condition': []}] if target else [],
+    }
+
+
+class AuthenticationTestCase(TestCase):
+
+    def setUp(self):
+        self.user = UserFactory(
+            user_id='105398891',
+            pin=2090
+        )
+        self.account = AccountFactory(
+            user=self.user,
+            balance=Decimal(150_000)
+        )
+
+    def test_authenticate_in_one_query(self):
+        with self.assertNumQueries(1):
+            auth_data = UserPINAuthenticationClass.authenticate(user_id='105398891', pin=2090)
+
+        self.assertTrue(auth_data['is_valid'])
+        self.assertEqual(auth_data['balance'], Decimal(150_000))
+
+    def test_invalid_credentials(self):
+        for credentials in (
+                {'user_id': '105398891', 'pin': 1111},
+                {'user_id': '105398891', 'pin': 'abc'},
+                {'user_id': 'unknown', 'pin': 2090},
+        ):
+            with self.subTest(**credentials):
+                auth_data = UserPINAuthenticationClass.authenticate(**credentials)
+                self.assertEqual(auth_data, UserPINAuthenticationClass.get_invalid_auth_data())
+
+    def test_cached_authentication_checks_credentials_once(self):
+        authentication = CachedUserAuthentication()
+
+        with self.assertNumQueries(1):
+            auth_data = authentication.authenticate(user_id='105398891', pin=2090)
+            authentication.authenticate(user_id=105398891, pin=2090)
+            authentication.bulk_authenticate([{'user_id': '105398891', 'pin': 2090}])
+        with self.assertNumQueries(1):
+            invalid_auth_data = authentication.authenticate(user_id=105398891, pin=1111)
+
+        self.assertTrue(auth_data['is_valid'])
+        self.assertFalse(invalid_auth_data['is_valid'])
+
+        with self.assertNumQueries(1):
+            auth_data_list = authentication.bulk_authenticate([
+                {'user_id': '105398891', 'pin': 2090},
+                {'user_id': 'unknown', 'pin': 2090},
+            ])
+            authentication.authenticate(user_id='unknown', pin=2090)
+        self.assertEqual([auth_data['is_valid'] for auth_data in auth_data_list], [True, False])
+
+    def test_workflow_validating_the_same_user_twice(self):
+        plan = compile_workflow({
+            'steps': [
+                validate_account_step('validate_account', target='validate_again'),
+                validate_account_step('validate_again'),
+            ],
+            'trigger': {
+                'params': {'user_id': '105398891', 'pin': 2090},
+                'transitions': [{'target': 'validate_account', 'condition': []}],
+            },
+        })
+        workflow = Workflow(plan=plan, authentication_class=CachedUserAuthentication())
+
+        with self.assertNumQueries(1):
+            workflow.run_trigger()
+
+        self.assertEqual(workflow.logs[0].output, workflow.logs[1].output)
+
+
+class PINCheckCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.cache = PINCheckCache(maxsize=2, ttl=60)
+
+    def test_check(self):
+        self.cache.add('105398891', 'pk', 2090)
+
+        self.assertEqual(self.cache.check(105398891, '2090'), 'pk')
+        self.assertIsNone(self.cache.check('105398891', 1111))
+        self.assertIsNone(self.cache.check('unknown', 2090))
+
+    def test_pins_are_not_stored(self):
+        self.cache.add('105398891', 'pk', 2090)
+
+        self.assertNotIn('2090', repr(self.cache._entries))
+
+    def test_expired_checks(self):
+        with mock.patch('src.workflow.utils.cache.time.monotonic', return_value=1000):
+            self.cache.add('105398891', 'pk', 2090)
+        with mock.patch('src.workflow.utils.cache.time.monotonic', return_value=1059):
+            self.assertEqual(self.cache.check('105398891', 2090), 'pk')
+        with mock.patch('src.workflow.utils.cache.time.monotonic', return_value=1060):
+            self.assertIsNone(self.cache.check('105398891', 2090))
+        self.assertEqual(len(self.cache._entries), 0)
+
+    def test_least_recently_used_checks_are_evicted(self):
+        self.cache.add('1', 'pk1', 1)
+        self.cache.add('2', 'pk2', 2)
+        self.cache.check('1', 1)
+        self.cache.add('3', 'pk3', 3)
+
+        self.assertEqual(self.cache.check('1', 1), 'pk1')
+        self.assertIsNone(self.cache.check('2', 2))
+        self.assertEqual(self.cache.check('3', 3), 'pk3')
+
+    def test_disabled(self):
+        cache = PINCheckCache(maxsize=0, ttl=60)
+        cache.add('105398891', 'pk', 2090)
+
+        self.assertIsNone(cache.check('105398891', 2090))
+
+
+class CachedPINAuthenticationTestCase(TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(pin_check_cache, 'maxsize', 16)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(pin_check_cache.clear)
+        pin_check_cache.clear()
+
+        self.user = UserFactory(
+            user_id='105398891',
+            pin=2090
+        )
+        self.account = AccountFactory(
+            user=self.user,
+            balance=Decimal(150_000)
+        )
+
+    def test_cached_checks_only_read_the_balance(self):
+        auth_data = CachedPINAuthenticationClass.authenticate(user_id='105398891', pin=2090)
+        Account.objects.filter(pk=self.account.pk).update(balance=Decimal(100))
+
+        with self.assertNumQueries(1):
+            cached_auth_data = CachedPINAuthenticationClass.authenticate(user_id='105398891', pin=2090)
+
+        self.assertTrue(cached_auth_data['is_valid'])
+        self.assertEqual(auth_data['balance'], Decimal(150_000))
+        self.assertEqual(cached_auth_data['balance'], Decimal(100))
+        self.assertEqual(cached_auth_data['user_id'], auth_data['user_id'])
+
+    def test_failed_checks_are_not_cached(self):
+        CachedPINAuthenticationClass.authenticate(user_id='105398891', pin=1111)
+
+        self.assertIsNone(pin_check_cache.check('105398891', 1111))
+        auth_data = CachedPINAuthenticationClass.authenticate(user_id='105398891', pin=1111)
+        self.assertFalse(auth_data['is_valid'])
+
+    def test_bulk_authenticate(self):
+        other_user = UserFactory(user_id='105398892', pin=1234)
+        AccountFactory(user=other_user, balance=Decimal(10))
+        CachedPINAuthenticationClass.authenticate(user_id='105398891', pin=2090)
+
+        with self.assertNumQueries(2):
+            auth_data_list = CachedPINAuthenticationClass.bulk_authenticate([
+                {'user_id': '105398891', 'pin': 2090},
+                {'user_id': '105398892', 'pin': 1234},
+                {'user_id': '105398891', 'pin': 1111},
+            ])
+
+        self.assertEqual(
+            [(auth_data['is_valid'], auth_data['balance']) for auth_data in auth_data_list],
+            [(True, Decimal(150_000)), (True, Decimal(10)), (False, None)]
+        )
+        with self.assertNumQueries(1):
+            CachedPINAuthenticationClass.bulk_authenticate([
+                {'user_id': '105398891', 'pin': 2090},
+                {'user_id': '105398892', 'pin': 1234},
+            ])
+
+    def test_pin_changes_invalidate_cached_checks(self):
+        CachedPINAuthenticationClass.authenticate(user_id='105398891', pin=2090)
+        self.user.pin = 1111
+        self.user.save()
+
+        self.assertIsNone(pin_check_cache.check('105398891', 2090))
+        auth_data = CachedPINAuthenticationClass.authenticate(user_id='105398891', pin=2090)
+        self.assertFalse(auth_data['is_valid'])
+
+    def test_deleted_accounts(self):
+        CachedPINAuthenticationClass.authenticate(user_id='105398891', pin=2090)
+        self.account.delete()
+
+        auth_data = CachedPINAuthenticationClass.authenticate(user_id='105398891', pin=2090)
+        self.assertFalse(auth_data['is_valid'])
@@ -0,0 +1,133 @@
+import itertools
+import json
+import re
+from decimal import Decimal
+from pathlib import Path
+
+import djongo.base  # noqa: F401, imports `sql2mongo` without a circular import
+import sqlparse
+from django.db import connection
+from django.test import TestCase
+from djongo.sql2mongo.query import UpdateQuery
+
+from src.workflow.models import Account
+from src.workflow.tests.factories import UserFactory, AccountFactory
+from src.workflow.utils.authentication import UserPINAuthenticationClass
+from src.workflow.utils.batch import BatchWorkflow, bulk_update_balances
+from src.workflow.utils.plan import compile_workflow
+from src.workflow.utils.workflow import Workflow
+
+workflow_example_path = Path(__file__).resolve().parent.parent / 'workflow_example.json'
+
+
+class BatchWorkflowTestCase(TestCase):
+
+    def setUp(self):
+        self.user = UserFactory(
+            user_id='105398891',
+            pin=2090
+        )
+        self.account = AccountFactory(
+            user=self.user,
+            balance=Decimal(150_000)
+        )
+        self.other_user = UserFactory(
+            user_id='105398892',
+            pin=3030
+        )
+        self.other_account = AccountFactory(
+            user=self.other_user,
+            balance=Decimal(70_000)
+        )
+
+        with open(workflow_example_path) as workflow_example_file:
+            self.workflow_input_data = json.loads(workflow_example_file.read())
+        self.plan = compile_workflow(self.workflow_input_data)
+
+    def test_bulk_authenticate(self):
+        auth_data_list = UserPINAuthenticationClass.bulk_authenticate([
+            {'user_id': '105398891', 'pin': 2090},
+            {'user_id': '105398892', 'pin': 1111},
+            {'user_id': 'unknown', 'pin': 2090},
+            {'user_id': '105398892', 'pin': 3030},
+        ])
+
+        self.assertEqual(
+            [auth_data['is_valid'] for auth_data in auth_data_list],
+            [True, False, False, True]
+        )
+        self.assertEqual(auth_data_list[0]['balance'], Decimal(150_000))
+        self.assertEqual(auth_data_list[3]['balance'], Decimal(70_000))
+
+    def test_batch_matches_single_runs(self):
+        trigger_params_list = [
+            {'user_id': '105398891', 'pin': 2090},
+            {'user_id': '105398892', 'pin': 3030},
+            {'user_id': '105398892', 'pin': 1111},
+            {'user_id': '105398892', 'pin': 3030},
+        ]
+        batch = BatchWorkflow(
+            plan=self.plan,
+            authentication_class=UserPINAuthenticationClass,
+            chunk_size=3,
+        )
+
+        with self.assertNumQueries(2):  # one bulk_authenticate per chunk
+            results = list(batch.run(iter(trigger_params_list)))
+
+        self.assertEqual([result.success for result in results], [True, True, False, True])
+        self.assertEqual(results[0].new_balance, Decimal(149_970))
+        self.assertEqual(results[1].new_balance, Decimal(220_000))
+        self.assertEqual(len(results[2].logs), 1)
+        # The second run for the same user starts from the first one's balance
+        self.assertEqual(results[3].logs[1]['output']['balance'], Decimal(220_000))
+        self.assertEqual(results[3].new_balance, Decimal(219_970))
+
+        for trigger_params, result in zip(trigger_params_list[:2], results):
+            workflow = Workflow(
+                plan=self.plan.with_trigger_params(trigger_params),
+                authentication_class=UserPINAuthenticationClass,
+            )
+            workflow.run_trigger()
+            self.assertEqual(workflow.logs, result.logs)
+
+    def test_bulk_update_balances(self):
+        bulk_update_balances({
+            '105398891': Decimal(1),
+            '105398892': Decimal(2),
+        })
+
+        balances = {
+            account.user.user_id: account.balance.to_decimal()
+            for account in Account.objects.select_related('user')
+        }
+        self.assertEqual(balances, {'105398891': Decimal(1), '105398892': Decimal(2)})
+
+    def test_bulk_update_balances_statements_parse_on_djongo(self):
+        statements = []
+
+        def capture_updates(execute, sql, params, many, context):
+            if sql.startswith('UPDATE'):
+                statements.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture_updates):
+            bulk_update_balances({
+                '105398891': Decimal(1),
+                '105398892': Decimal(2),
+            })
+
+        self.assertEqual(len(statements), 2)
+        for sql, params in statements:
+            with self.subTest(sql=sql):
+                # The parser of the production backend, without a MongoDB to
+                # run the translated query on.
+                placeholders = itertools.count()
+                query = UpdateQuery(
+                    None,
+                    None,
+                    sqlparse.parse(re.sub('%s', lambda _: '%%(%d)s' % next(placeholders), sql))[0],
+                    params
+                )
+                self.assertEqual(set(query.kwargs['update']['$set']), {'balance', 'updated_at'})
+                self.assertEqual(list(query.kwargs['filter']), ['id'])
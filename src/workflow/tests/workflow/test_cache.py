@@ -0,0 +1,61 @@
+from django.test import SimpleTestCase
+
+from src.workflow.utils.cache import WorkflowDefinitionCache, definition_cache_key
+
+
+class DefinitionCacheKeyTestCase(SimpleTestCase):
+
+    def test_trigger_params_are_ignored(self):
+        definition = {
+            'steps': [],
+            'trigger': {'params': {'user_id': '1', 'pin': 1}, 'transitions': []},
+        }
+        other_user_definition = {
+            'trigger': {'transitions': [], 'params': {'user_id': '2', 'pin': 2}},
+            'steps': [],
+        }
+
+        self.assertEqual(
+            definition_cache_key(definition),
+            definition_cache_key(other_user_definition)
+        )
+
+    def test_definition_changes_key(self):
+        definition = {
+            'steps': [],
+            'trigger': {'params': {}, 'transitions': []},
+        }
+        other_definition = {
+            'steps': [],
+            'trigger': {'params': {}, 'transitions': [{'target': 'a', 'condition': []}]},
+        }
+
+        self.assertNotEqual(
+            definition_cache_key(definition),
+            definition_cache_key(other_definition)
+        )
+
+    def test_invalid_definition_has_no_key(self):
+        self.assertIsNone(definition_cache_key([]))
+        self.assertIsNone(definition_cache_key({'trigger': None}))
+
+
+class WorkflowDefinitionCacheTestCase(SimpleTestCase):
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = WorkflowDefinitionCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(tuple(cache.info()), (3, 1, 2, 2))
+
+    def test_disabled_cache(self):
+        cache = WorkflowDefinitionCache(maxsize=0)
+        cache.set('a', 1)
+
+        self.assertIsNone(cache.get('a'))
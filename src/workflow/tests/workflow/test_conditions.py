@@ -0,0 +1,83 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from src.workflow.utils.conditions import compile_condition
+from src.workflow.utils.exceptions import InvalidConditionException
+from src.workflow.utils.plan import compile_workflow
+from src.workflow.utils.workflow import Workflow
+
+
+def condition(operator, value, from_id='account_balance', field_id='balance'):
+    return {
+        'from_id': from_id,
+        'field_id': field_id,
+        'operator': operator,
+        'value': value,
+    }
+
+
+class ConditionPredicateTestCase(SimpleTestCase):
+
+    def test_operators(self):
+        balance = Decimal(100_000)
+        cases = [
+            ('eq', 100_000, True),
+            ('eq', 1, False),
+            ('ne', 1, True),
+            ('gt', 99_999, True),
+            ('gt', 100_000, False),
+            ('gte', 100_000, True),
+            ('lt', 100_000, False),
+            ('lte', 100_000, True),
+            ('in', [1, 100_000], True),
+            ('in', [1, 2], False),
+            ('between', [100_000, 200_000], True),
+            ('between', [0, 99_999], False),
+        ]
+        for operator, value, expected in cases:
+            with self.subTest(operator=operator, value=value):
+                predicate = compile_condition(condition(operator, value))
+                self.assertIs(predicate(balance), expected)
+
+    def test_missing_output_does_not_match(self):
+        predicate = compile_condition(condition('gt', 0))
+
+        self.assertFalse(predicate(None))
+
+    def test_unknown_operator_is_rejected(self):
+        with self.assertRaisesMessage(InvalidConditionException, "'contains'"):
+            compile_condition(condition('contains', 1))
+
+    def test_invalid_between_value_is_rejected(self):
+        with self.assertRaises(InvalidConditionException):
+            compile_condition(condition('between', [1]))
+
+    def test_conditions_short_circuit(self):
+        plan = compile_workflow({
+            'steps': [],
+            'trigger': {
+                'params': {},
+                'transitions': [
+                    {
+                        'target': 'account_balance',
+                        'condition': [
+                            condition('eq', 1, from_id='first'),
+                            condition('eq', 1, from_id='second'),
+                        ],
+                    }
+                ],
+            },
+        })
+        requested = []
+
+        class TrackedWorkflow(Workflow):
+            def get_step_output(self, from_id, field_id):
+                requested.append(from_id)
+                return super().get_step_output(from_id=from_id, field_id=field_id)
+
+        workflow = TrackedWorkflow(plan=plan)
+        workflow.outputs = {'first': {'balance': 0}}
+
+        self.assertFalse(workflow.check_conditions(plan.trigger.transitions[0].conditions))
+        self.assertEqual(requested, ['first'])
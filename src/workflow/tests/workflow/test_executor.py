@@ -0,0 +1,77 @@
+import json
+import tracemalloc
+
+from django.test import SimpleTestCase
+
+from src.workflow.tests.factories import linear_workflow_data, step_data, workflow_data
+from src.workflow.utils.exceptions import MaxStepsExceededException
+from src.workflow.utils.logs import StepLog, StepLogEncoder
+from src.workflow.utils.plan import compile_workflow
+from src.workflow.utils.workflow import Workflow
+
+
+def linear_workflow(size):
+    return linear_workflow_data(
+        ['get_account_balance'] * size,
+        params={'user_id': {'from_id': 'start', 'param_id': 'user_id'}},
+        trigger_params={'user_id': '12345', 'pin': 1234},
+    )
+
+
+class IterativeExecutorTestCase(SimpleTestCase):
+
+    def test_depth_first_log_order(self):
+        workflow = Workflow(workflow_data=workflow_data(
+            [
+                step_data('a', ['b', 'c']),
+                step_data('b', ['d']),
+                step_data('c'),
+                step_data('d'),
+            ],
+            ['a', 'c'],
+        ))
+        workflow.run_trigger()
+
+        self.assertEqual([log['id'] for log in workflow.logs], ['a', 'b', 'd', 'c', 'c'])
+        self.assertEqual(workflow.executed_steps, 5)
+
+    def test_logs_are_slotted_until_encoded(self):
+        workflow = Workflow(workflow_data=linear_workflow(2))
+        workflow.run_trigger()
+
+        log = workflow.logs[0]
+        self.assertIsInstance(log, StepLog)
+        self.assertFalse(hasattr(log, '__dict__'))
+        self.assertFalse(hasattr(workflow, '__dict__'))
+        self.assertEqual(log['params'], {'user_id': '12345'})
+        with self.assertRaises(KeyError):
+            log['unknown']
+
+        self.assertEqual(json.loads(json.dumps(workflow.logs, cls=StepLogEncoder))[0], {
+            'params': {'user_id': '12345'},
+            'id': 'step_0',
+            'action': 'get_account_balance',
+            'output': {'balance': None},
+        })
+
+    def test_max_steps(self):
+        workflow = Workflow(workflow_data=linear_workflow(10), max_steps=5)
+
+        self.assertRaises(MaxStepsExceededException, workflow.run_trigger)
+        self.assertEqual(len(workflow.logs), 5)
+
+    def test_long_linear_workflow_runs_in_bounded_memory(self):
+        size = 100_000
+        workflow = Workflow(plan=compile_workflow(linear_workflow(size)))
+
+        tracemalloc.start()
+        try:
+            workflow.run_trigger()
+            retained, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(len(workflow.logs), size)
+        # Only the logs and outputs are kept, the scheduler itself must not
+        # grow with the depth of the workflow.
+        self.assertLess(peak - retained, 64 * 1024)
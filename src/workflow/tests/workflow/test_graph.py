@@ -0,0 +1,84 @@
+from django.test import SimpleTestCase
+
+from src.workflow.tests.factories import step_data, workflow_data
+from src.workflow.utils.plan import compile_workflow
+from src.workflow.utils.workflow import Workflow
+
+
+class GraphAnalysisTestCase(SimpleTestCase):
+
+    def test_acyclic_graph(self):
+        plan = compile_workflow(workflow_data(
+            [
+                step_data('a', ['b', 'c']),
+                step_data('b', ['d']),
+                step_data('c', ['d', 'missing']),
+                step_data('d'),
+                step_data('orphan', ['a']),
+            ],
+            ['a', 'c'],
+        ))
+
+        analysis = plan.analysis
+        self.assertEqual(analysis.steps, 5)
+        self.assertEqual(analysis.reachable_steps, ('a', 'b', 'c', 'd'))
+        self.assertEqual(analysis.unreachable_steps, ('orphan',))
+        self.assertEqual(analysis.missing_targets, (('c', 'missing'),))
+        self.assertEqual(analysis.cycles, ())
+        self.assertEqual(analysis.max_path_length, 3)
+        self.assertEqual(analysis.max_run_steps, 7)
+
+    def test_run_steps_count_every_path(self):
+        # Three diamonds in a row, each one doubles the paths to the next:
+        # fork_3 runs 8 times, every fork and side before it half as often.
+        steps = []
+        for index in range(3):
+            steps += [
+                step_data(f'fork_{index}', [f'left_{index}', f'right_{index}']),
+                step_data(f'left_{index}', [f'fork_{index + 1}']),
+                step_data(f'right_{index}', [f'fork_{index + 1}']),
+            ]
+        plan = compile_workflow(workflow_data(steps + [step_data('fork_3')], ['fork_0']))
+
+        self.assertEqual(plan.analysis.max_path_length, 7)
+        self.assertEqual(plan.analysis.max_run_steps, 29)
+        workflow = Workflow(plan=plan)
+        workflow.run_trigger()
+        self.assertEqual(workflow.executed_steps, plan.analysis.max_run_steps)
+
+    def test_unreachable_steps_are_pruned(self):
+        plan = compile_workflow(workflow_data([step_data('a'), step_data('orphan', ['a'])], ['a']))
+
+        self.assertEqual(list(plan.steps), ['a'])
+        self.assertIsNone(plan.get_step('orphan'))
+
+    def test_cycles(self):
+        plan = compile_workflow(workflow_data(
+            [
+                step_data('a', ['b']),
+                step_data('b', ['c']),
+                step_data('c', ['a', 'd']),
+                step_data('d', ['d']),
+                step_data('e', ['e']),
+            ],
+            ['a', 'missing'],
+        ))
+
+        analysis = plan.analysis
+        self.assertEqual(analysis.cycles, (('d',), ('a', 'b', 'c')))
+        self.assertEqual(analysis.missing_targets, (('start', 'missing'),))
+        self.assertEqual(analysis.unreachable_steps, ('e',))
+        self.assertIsNone(analysis.max_path_length)
+        self.assertIsNone(analysis.max_run_steps)
+        self.assertEqual(analysis.as_dict()['cycles'], [['d'], ['a', 'b', 'c']])
+
+    def test_deep_graph_does_not_recurse(self):
+        depth = 10_000
+        plan = compile_workflow(workflow_data(
+            [step_data(f'step_{index}', [f'step_{index + 1}']) for index in range(depth - 1)]
+            + [step_data(f'step_{depth - 1}')],
+            ['step_0'],
+        ))
+
+        self.assertEqual(plan.analysis.max_path_length, depth)
+        self.assertEqual(plan.analysis.max_run_steps, depth)
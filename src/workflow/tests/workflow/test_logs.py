@@ -0,0 +1,90 @@
+import datetime
+import enum
+import json
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+
+from src.workflow.utils.logs import LogSummary, StepLog, StepLogEncoder, to_json_data
+
+
+class Color(enum.IntEnum):
+    RED = 1
+
+
+class Text(str):
+
+    def __str__(self):
+        return 'overridden'
+
+
+class ToJSONDataTestCase(SimpleTestCase):
+
+    def assertSameAsRoundTrip(self, value):
+        expected = json.loads(json.dumps(value, cls=StepLogEncoder))
+        data = to_json_data(value)
+
+        self.assertEqual(data, expected)
+        # Same order and same types, which plain equality doesn't check.
+        self.assertEqual(json.dumps(data), json.dumps(expected))
+        self.assertEqual(type_tree(data), type_tree(expected))
+
+    def test_step_logs(self):
+        summary = LogSummary()
+        summary.add(StepLog(
+            {'money': 30},
+            'withdraw_30',
+            'withdraw_in_dollars',
+            {'balance': Decimal('1.00')}
+        ))
+        self.assertSameAsRoundTrip([
+            StepLog(
+                {'user_id': '105398891', 'pin': '****'},
+                'validate_account',
+                'validate_account',
+                {'is_valid': True, 'user_id': '105398891', 'balance': Decimal('150000.00')},
+            ),
+            StepLog({}, 'start', None, {'balance': Decimal('150000.00'), 'user_id': 105398891}),
+            StepLog({'money': Decimal(-150)}, 'deposit', 'deposit_money', None),
+            summary,
+        ])
+
+    def test_values(self):
+        for value in (
+                None, True, 0, -1, 1.5, float('inf'), 'text', '',
+                Decimal('1.10'), Decimal('-0.00'), Decimal('NaN'), Decimal('123.45'), Decimal(-5),
+                uuid.UUID('12345678-1234-5678-1234-567812345678'),
+                datetime.datetime(2026, 10, 18, 12, 30, 15, 123456),
+                datetime.datetime(2026, 10, 18, tzinfo=datetime.timezone.utc),
+                datetime.date(2026, 10, 18),
+                datetime.time(12, 30, 15, 500),
+                datetime.timedelta(days=1, seconds=5),
+                gettext_lazy('This field is required.'),
+                Color.RED, Text('original'),
+                (1, [2, (3,)]),
+                OrderedDict(b=1, a=2),
+                {1: 'a', 2.5: 'b', None: 'd', 'e': {'nested': Decimal('0.01')}},
+                {True: 'c', False: 'f'},
+                {float('nan'): 1, float('-inf'): 2},
+        ):
+            with self.subTest(value=value):
+                self.assertSameAsRoundTrip(value)
+
+    def test_unsupported_values(self):
+        for value in ({1, 2}, object(), {(1, 2): 'tuple key'}):
+            with self.subTest(value=value):
+                with self.assertRaises(TypeError):
+                    json.dumps(value, cls=StepLogEncoder)
+                with self.assertRaises(TypeError):
+                    to_json_data(value)
+
+
+def type_tree(data):
+    if isinstance(data, dict):
+        return {key: type_tree(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [type_tree(value) for value in data]
+    return type(data)
@@ -0,0 +1,165 @@
+import threading
+from collections import Counter
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from src.workflow.tests.factories import step_data, workflow_data
+from src.workflow.utils.actions import action_registry
+from src.workflow.utils.exceptions import (
+    InsufficientBalanceException,
+    MaxStepsExceededException,
+)
+from src.workflow.utils.parallel import ParallelWorkflow
+from src.workflow.utils.plan import compile_workflow
+from src.workflow.utils.workflow import Workflow
+
+
+class ThreadRecordingWorkflow(ParallelWorkflow):
+
+    barrier = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threads = set()
+
+    def execute_action(self, action_name, **params):
+        self.threads.add(threading.get_ident())
+        if self.barrier is not None:
+            self.barrier.wait(timeout=5)
+        return super().execute_action(action_name, **params)
+
+
+class ParallelWorkflowTestCase(SimpleTestCase):
+
+    def run_workflow(self, workflow_class, data, max_steps=None):
+        workflow = workflow_class(plan=compile_workflow(data), max_steps=max_steps)
+        workflow.new_balance = Decimal(1000)
+        error = None
+        try:
+            workflow.run_trigger()
+        except MaxStepsExceededException as exc:
+            error = exc
+        return workflow, error
+
+    def assertSameRun(self, data, max_steps=None):
+        sequential, sequential_error = self.run_workflow(Workflow, data, max_steps)
+        parallel, parallel_error = self.run_workflow(ThreadRecordingWorkflow, data, max_steps)
+
+        self.assertEqual(parallel.logs, sequential.logs)
+        self.assertEqual(parallel.outputs, sequential.outputs)
+        self.assertEqual(parallel.new_balance, sequential.new_balance)
+        self.assertEqual(parallel.executed_steps, sequential.executed_steps)
+        self.assertEqual(type(parallel_error), type(sequential_error))
+        return parallel
+
+    def test_independent_branches_run_concurrently(self):
+        data = workflow_data([step_data('a'), step_data('b'), step_data('c')], ['a', 'b', 'c'])
+        workflow = ThreadRecordingWorkflow(plan=compile_workflow(data))
+        workflow.new_balance = Decimal(1000)
+        # Only completes when the three actions wait on it at the same time.
+        workflow.barrier = threading.Barrier(3)
+
+        workflow.run_trigger()
+
+        self.assertEqual([log['id'] for log in workflow.logs], ['a', 'b', 'c'])
+        self.assertNotIn(threading.get_ident(), workflow.threads)
+
+    def test_logs_come_out_in_sequential_order(self):
+        data = workflow_data(
+            [step_data('a', ['b', 'c']), step_data('b', ['d']), step_data('c'), step_data('d')],
+            ['a', 'c'],
+        )
+
+        workflow = self.assertSameRun(data)
+
+        self.assertEqual([log['id'] for log in workflow.logs], ['a', 'b', 'd', 'c', 'c'])
+
+    def test_branches_mutating_the_balance_run_sequentially(self):
+        data = workflow_data(
+            [
+                step_data('deposit', action='deposit_money', params={'money': 100}),
+                step_data('withdraw', action='withdraw_in_dollars', params={'money': 50}),
+                step_data('balance'),
+            ],
+            ['deposit', 'withdraw', 'balance'],
+        )
+
+        workflow = self.assertSameRun(data)
+
+        self.assertEqual(workflow.new_balance, Decimal(1050))
+        self.assertEqual(workflow.threads, {threading.get_ident()})
+
+    def test_single_balance_writer_is_merged(self):
+        data = workflow_data(
+            [
+                step_data('deposit', ['deposit_balance'], action='deposit_money', params={'money': 100}),
+                step_data('deposit_balance', action=None),
+                step_data('other', action=None),
+            ],
+            ['deposit', 'other'],
+        )
+
+        workflow = self.assertSameRun(data)
+
+        self.assertEqual(workflow.new_balance, Decimal(1100))
+
+    def test_condition_on_sibling_output_runs_sequentially(self):
+        data = workflow_data(
+            [step_data('a'), step_data('b')],
+            ['a', 'b'],
+            conditions={
+                'b': [{'from_id': 'a', 'field_id': 'balance', 'operator': 'eq', 'value': 1000}],
+            },
+        )
+
+        workflow = self.assertSameRun(data)
+
+        self.assertEqual([log['id'] for log in workflow.logs], ['a', 'b'])
+        self.assertIsNone(workflow.get_footprints(workflow.plan.trigger.transitions))
+
+    def test_max_steps_fails_at_the_same_step(self):
+        data = workflow_data(
+            [
+                step_data('a', ['a_1']), step_data('a_1'),
+                step_data('b', ['b_1']), step_data('b_1'),
+                step_data('c', ['c_1']), step_data('c_1'),
+            ],
+            ['a', 'b', 'c'],
+        )
+
+        workflow = self.assertSameRun(data, max_steps=3)
+
+        self.assertEqual([log['id'] for log in workflow.logs], ['a', 'a_1', 'b'])
+
+    def test_failing_branch_runs_every_branch_once(self):
+        calls = Counter()
+        registry = action_registry.copy()
+
+        @registry.register('count', reads_account=False, writes_account=False)
+        def count(workflow, branch):
+            calls[branch] += 1
+            return {'count': calls[branch]}
+
+        @registry.register('fail', reads_account=False, writes_account=False)
+        def fail(workflow, **params):
+            raise InsufficientBalanceException
+
+        data = workflow_data(
+            [
+                step_data('a', ['a_1'], action='count', params={'branch': 'a'}),
+                step_data('a_1', action='count', params={'branch': 'a_1'}),
+                step_data('b', action='count', params={'branch': 'b'}),
+                step_data('c', ['c_1'], action='count', params={'branch': 'c'}),
+                step_data('c_1', action='fail'),
+            ],
+            ['a', 'b', 'c'],
+        )
+        workflow = ParallelWorkflow(plan=compile_workflow(data, registry=registry))
+
+        with self.assertRaises(InsufficientBalanceException):
+            workflow.run_trigger()
+
+        self.assertEqual(calls, {'a': 1, 'a_1': 1, 'b': 1, 'c': 1})
+        self.assertEqual([log['id'] for log in workflow.logs], ['a', 'a_1', 'b', 'c'])
+        self.assertEqual(workflow.executed_steps, 5)
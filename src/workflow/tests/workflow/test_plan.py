@@ -0,0 +1,168 @@
+from django.test import SimpleTestCase
+
+from src.workflow.utils.exceptions import CyclicParamReferenceException
+from src.workflow.utils.plan import compile_workflow
+
+
+class CompileWorkflowTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.workflow_input_data = {
+            'steps': [
+                {
+                    'id': 'validate_account',
+                    'params': {
+                        'user_id': {
+                            'from_id': 'start',
+                            'param_id': 'user_id'
+                        },
+                        'pin': {
+                            'from_id': 'start',
+                            'param_id': 'pin',
+                        },
+                    },
+                    'action': 'validate_account',
+                    'transitions': [
+                        {
+                            'target': 'deposit_200',
+                            'condition': []
+                        },
+                        {
+                            'target': 'unknown_step',
+                            'condition': []
+                        }
+                    ]
+                },
+                {
+                    'id': 'deposit_200',
+                    'params': {
+                        'user_id': {
+                            'from_id': 'start',
+                            'param_id': 'user_id',
+                        },
+                        'money': {
+                            'from_id': None,
+                            'value': 200_000,
+                        },
+                    },
+                    'action': 'deposit_money',
+                    'transitions': []
+                },
+                {
+                    'id': 'deposit_200',
+                    'params': {},
+                    'action': 'withdraw_in_dollars',
+                    'transitions': []
+                }
+            ],
+            'trigger': {
+                'params': {
+                    'user_id': '12345',
+                    'pin': 1234,
+                },
+                'transitions': [
+                    {
+                        'target': 'validate_account',
+                        'condition': [],
+                    }
+                ]
+            }
+        }
+
+    def test_steps_are_indexed_by_id(self):
+        plan = compile_workflow(self.workflow_input_data)
+
+        self.assertEqual(list(plan.steps), ['validate_account', 'deposit_200'])
+        self.assertEqual(plan.get_step('validate_account').action, 'validate_account')
+        self.assertIsNone(plan.get_step('unknown_step'))
+
+    def test_duplicated_step_id_keeps_first_step(self):
+        plan = compile_workflow(self.workflow_input_data)
+
+        self.assertEqual(plan.get_step('deposit_200').action, 'deposit_money')
+
+    def test_transitions_are_resolved_to_steps(self):
+        plan = compile_workflow(self.workflow_input_data)
+
+        validate_account = plan.trigger.transitions[0].target
+        self.assertIs(validate_account, plan.get_step('validate_account'))
+        self.assertIs(validate_account.transitions[0].target, plan.get_step('deposit_200'))
+        self.assertIsNone(validate_account.transitions[1].target)
+
+    def test_params_are_bound(self):
+        plan = compile_workflow(self.workflow_input_data)
+
+        money = plan.get_step('deposit_200').params['money']
+        self.assertTrue(money.is_literal)
+        self.assertEqual(money.value, 200_000)
+
+        user_id = plan.get_step('deposit_200').params['user_id']
+        self.assertFalse(user_id.is_literal)
+        self.assertEqual((user_id.from_id, user_id.param_id), ('start', 'user_id'))
+        self.assertEqual(plan.trigger_params['user_id'], '12345')
+
+    def test_param_chains_are_collapsed(self):
+        self.workflow_input_data['steps'][1]['params']['user_id'] = {
+            'from_id': 'validate_account',
+            'param_id': 'user_id',
+        }
+        self.workflow_input_data['steps'][0]['params']['money'] = {
+            'from_id': 'deposit_200',
+            'param_id': 'money',
+        }
+        self.workflow_input_data['steps'][0]['params']['unknown'] = {
+            'from_id': 'unknown_step',
+            'param_id': 'user_id',
+        }
+        plan = compile_workflow(self.workflow_input_data)
+
+        user_id = plan.get_step('deposit_200').params['user_id']
+        self.assertEqual((user_id.from_id, user_id.param_id), ('start', 'user_id'))
+
+        money = plan.get_step('validate_account').params['money']
+        self.assertTrue(money.is_literal)
+        self.assertEqual(money.value, 200_000)
+
+        unknown = plan.get_step('validate_account').params['unknown']
+        self.assertTrue(unknown.is_literal)
+        self.assertIsNone(unknown.value)
+
+    def test_deep_param_chain_does_not_recurse(self):
+        depth = 10_000
+        self.workflow_input_data['steps'] = [
+            {
+                'id': f'step_{index}',
+                'params': {
+                    'user_id': {
+                        'from_id': f'step_{index + 1}' if index < depth - 1 else 'start',
+                        'param_id': 'user_id',
+                    },
+                },
+                'action': 'get_account_balance',
+                'transitions': [],
+            }
+            for index in range(depth)
+        ]
+        self.workflow_input_data['trigger']['transitions'] = [
+            {'target': 'step_0', 'condition': []},
+        ]
+        plan = compile_workflow(self.workflow_input_data)
+
+        user_id = plan.get_step('step_0').params['user_id']
+        self.assertEqual((user_id.from_id, user_id.param_id), ('start', 'user_id'))
+
+    def test_cyclic_param_chain_is_rejected(self):
+        self.workflow_input_data['steps'][0]['params']['user_id'] = {
+            'from_id': 'deposit_200',
+            'param_id': 'user_id',
+        }
+        self.workflow_input_data['steps'][1]['params']['user_id'] = {
+            'from_id': 'validate_account',
+            'param_id': 'user_id',
+        }
+
+        with self.assertRaisesMessage(
+                CyclicParamReferenceException,
+                'validate_account.user_id -> deposit_200.user_id -> validate_account.user_id'
+        ):
+            compile_workflow(self.workflow_input_data)
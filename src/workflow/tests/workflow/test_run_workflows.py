@@ -0,0 +1,123 @@
+import copy
+import json
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from src.workflow.management.commands.run_workflows import (
+    build_tasks,
+    group_by_user,
+    read_user_id,
+)
+from src.workflow.models import Upload
+from src.workflow.tests.factories import UserFactory, AccountFactory
+
+workflow_example_path = Path(__file__).resolve().parent.parent / 'workflow_example.json'
+
+
+class RunWorkflowsCommandTestCase(TestCase):
+
+    def setUp(self):
+        self.user = UserFactory(
+            user_id='105398891',
+            pin=2090
+        )
+        self.account = AccountFactory(
+            user=self.user,
+            balance=Decimal(150_000)
+        )
+
+        with open(workflow_example_path) as workflow_example_file:
+            self.workflow_input_data = json.loads(workflow_example_file.read())
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def write_workflow(self, name, trigger_params=None):
+        workflow_input_data = dict(self.workflow_input_data)
+        if trigger_params is not None:
+            workflow_input_data['trigger'] = dict(workflow_input_data['trigger'], params=trigger_params)
+        path = self.directory / name
+        path.write_text(json.dumps(workflow_input_data))
+        return path
+
+    def test_group_by_user(self):
+        first = self.write_workflow('1.json')
+        other = self.write_workflow('2.json', {'user_id': '105398892', 'pin': 3030})
+        second = self.write_workflow('3.json')
+        broken = self.directory / '4.json'
+        broken.write_text('{')
+
+        groups = group_by_user([first, other, second, broken])
+
+        self.assertEqual(groups, [[first, second], [other], [broken]])
+        self.assertEqual(build_tasks(groups, chunk_size=2), [[first, second], [other, broken]])
+        self.assertEqual(build_tasks(groups, chunk_size=1), [[first, second], [other], [broken]])
+
+    def test_read_user_id(self):
+        path = self.write_workflow('1.json', {'user_id': 105398892, 'pin': 3030})
+        self.assertEqual(read_user_id(path), '105398892')
+
+        # Nothing after the trigger is read.
+        trigger_first = self.directory / '2.json'
+        trigger_first.write_text(
+            '{"trigger": %s, "steps": [' % json.dumps(self.workflow_input_data['trigger'])
+        )
+        self.assertEqual(read_user_id(trigger_first), '105398891')
+
+        with override_settings(WORKFLOW_MAX_FILE_SIZE=path.stat().st_size - 1):
+            self.assertIsNone(read_user_id(path))
+
+    def test_run_workflows(self):
+        self.write_workflow('1.json')
+        self.write_workflow('2.json')
+        self.write_workflow('3.json', {'user_id': '105398891', 'pin': 1111})
+        (self.directory / '4.json').write_text(json.dumps({'steps': []}))
+
+        stdout = StringIO()
+        stderr = StringIO()
+        call_command(
+            'run_workflows', str(self.directory), workers=1, chunk_size=2,
+            stdout=stdout, stderr=stderr
+        )
+
+        self.assertIn('2 succeeded, 1 failed, 1 invalid', stdout.getvalue())
+        self.assertIn('4.json', stderr.getvalue())
+
+        uploads = sorted(Upload.objects.all(), key=lambda upload: upload.file.name)
+        self.assertEqual([upload.success for upload in uploads], [True, True, False])
+        # Both runs withdraw 30 from the same account, one after the other.
+        self.assertEqual(uploads[0].logs[-1]['output']['balance'], '149970.00')
+        self.assertEqual(uploads[1].logs[-1]['output']['balance'], '149940.00')
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance.to_decimal(), Decimal(149_940))
+
+    def test_unexpected_errors_fail_their_file_only(self):
+        self.write_workflow('1.json')
+        broken = copy.deepcopy(self.workflow_input_data)
+        # Validated, but the engine raises `KeyError` on the unknown param.
+        broken['steps'][0]['params']['user_id'] = {'from_id': 'start', 'param_id': 'missing'}
+        (self.directory / '2.json').write_text(json.dumps(broken))
+        self.write_workflow('3.json')
+
+        stdout = StringIO()
+        stderr = StringIO()
+        call_command(
+            'run_workflows', str(self.directory), workers=1, chunk_size=3,
+            stdout=stdout, stderr=stderr
+        )
+
+        self.assertIn('2 succeeded, 1 failed, 0 invalid', stdout.getvalue())
+        self.assertIn('2.json: {"run": ["KeyError: ', stderr.getvalue())
+
+        uploads = sorted(Upload.objects.all(), key=lambda upload: upload.file.name)
+        self.assertEqual([upload.success for upload in uploads], [True, False, True])
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance.to_decimal(), Decimal(149_940))
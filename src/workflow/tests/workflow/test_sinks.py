@@ -0,0 +1,113 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase
+
+from src.workflow.models import Upload
+from src.workflow.tests.factories import linear_workflow_data
+from src.workflow.utils.abstracts import AbstractLogSink
+from src.workflow.utils.actions import action_registry
+from src.workflow.utils.exceptions import InsufficientBalanceException
+from src.workflow.utils.logs import SUMMARY_LOGS, LogSummary, StepLogEncoder
+from src.workflow.utils.sinks import DatabaseLogSink, MemoryLogSink, NDJSONLogSink
+from src.workflow.utils.plan import compile_workflow
+from src.workflow.utils.workflow import Workflow
+
+
+class RecordingLogSink(AbstractLogSink):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.flushes = []
+
+    def write_entries(self, entries):
+        self.flushes.append([entry.id for entry in entries])
+
+
+class LogSinkTestCase(TestCase):
+
+    def run_workflow(self, log_sink, actions=('get_account_balance',) * 5, registry=None):
+        plan = compile_workflow(
+            linear_workflow_data(
+                actions,
+                params={
+                    'user_id': {'from_id': 'start', 'param_id': 'user_id'},
+                    'pin': {'from_id': 'start', 'param_id': 'pin'},
+                },
+                trigger_params={'user_id': '105398891', 'pin': 2090},
+            ),
+            registry=registry
+        )
+        workflow = Workflow(plan=plan, log_sink=log_sink)
+        workflow.run_trigger()
+        return workflow
+
+    def test_buffer_is_flushed_when_full_and_on_close(self):
+        sink = RecordingLogSink(buffer_size=2, flush_interval=60)
+
+        self.run_workflow(sink)
+
+        self.assertEqual(sink.flushes, [
+            ['step_0', 'step_1'],
+            ['step_2', 'step_3'],
+            ['step_4'],
+        ])
+
+    def test_buffer_is_flushed_after_interval(self):
+        sink = RecordingLogSink(buffer_size=100, flush_interval=0)
+
+        self.run_workflow(sink)
+
+        self.assertEqual(len(sink.flushes), 5)
+
+    def test_summary_verbosity(self):
+        workflow = self.run_workflow(MemoryLogSink(verbosity=SUMMARY_LOGS))
+
+        self.assertEqual(len(workflow.logs), 1)
+        summary = workflow.logs[0]
+        self.assertIsInstance(summary, LogSummary)
+        self.assertEqual(json.loads(json.dumps(workflow.logs, cls=StepLogEncoder)), [{
+            'summary': {
+                'steps': 5,
+                'actions': {'get_account_balance': 5},
+                'last_step': 'step_4',
+                'last_output': {'balance': None},
+            }
+        }])
+
+    def test_ndjson_sink(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / 'logs.ndjson'
+
+        reference = self.run_workflow(MemoryLogSink())
+        workflow = self.run_workflow(NDJSONLogSink(path, buffer_size=2))
+
+        self.assertEqual(workflow.logs, [])
+        self.assertEqual(
+            [json.loads(line) for line in path.read_text().splitlines()],
+            json.loads(json.dumps(reference.logs, cls=StepLogEncoder))
+        )
+
+    def test_database_sink_keeps_logs_of_a_failed_run(self):
+        upload = Upload.objects.create(file='workflow/files/workflow.json')
+        sink = DatabaseLogSink(upload, buffer_size=2)
+
+        registry = action_registry.copy()
+
+        @registry.register('fail')
+        def fail(workflow, **params):
+            raise InsufficientBalanceException
+
+        with self.assertRaises(InsufficientBalanceException):
+            self.run_workflow(
+                sink,
+                actions=['get_account_balance'] * 3 + ['fail'],
+                registry=registry
+            )
+
+        entries = list(upload.log_entries.all())
+        self.assertEqual([entry.position for entry in entries], [0, 1, 2])
+        self.assertEqual([entry.entry['id'] for entry in entries], ['step_0', 'step_1', 'step_2'])
+        self.assertEqual(entries[0].entry['params']['pin'], '****')
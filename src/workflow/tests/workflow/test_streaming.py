@@ -0,0 +1,95 @@
+import io
+import json
+import random
+
+from django.test import SimpleTestCase
+
+from src.workflow.utils.exceptions import (
+    InvalidWorkflowFileException,
+    WorkflowFileTooLargeException,
+)
+from src.workflow.utils.streaming import JSONStreamReader, StreamedArray, load_json
+
+
+def read_members(content, chunk_size=7, max_size=None):
+    reader = JSONStreamReader(
+        io.BytesIO(content.encode()),
+        max_size=max_size,
+        chunk_size=chunk_size
+    )
+    return {
+        key: list(value) if isinstance(value, StreamedArray) else value
+        for key, value in reader.iter_members(streamed_keys=('steps',))
+    }
+
+
+class JSONStreamReaderTestCase(SimpleTestCase):
+
+    def test_members_match_json_loads(self):
+        rng = random.Random(23)
+        for _ in range(50):
+            document = {
+                'steps': [
+                    {'id': 'step_%s' % index, 'value': rng.random(), 'name': 'á€' * rng.randint(0, 5)}
+                    for index in range(rng.randint(0, 20))
+                ],
+                'trigger': {'params': {'user_id': '105398891', 'pin': rng.randint(0, 10 ** 6)}},
+                'count': rng.randint(-10 ** 9, 10 ** 9),
+            }
+            content = json.dumps(document, indent=rng.choice([None, 2]))
+            for chunk_size in (1, 7, 64 * 1024):
+                with self.subTest(content=content, chunk_size=chunk_size):
+                    self.assertEqual(read_members(content, chunk_size=chunk_size), document)
+
+    def test_steps_are_read_one_at_a_time(self):
+        content = json.dumps({'steps': [{'id': 'a' * 100} for _ in range(100)]})
+        file = io.BytesIO(content.encode())
+        reader = JSONStreamReader(file, chunk_size=64)
+
+        for _, steps in reader.iter_members(streamed_keys=('steps',)):
+            next(iter(steps))
+            self.assertLess(file.tell(), 1000)
+
+    def test_arrays_not_streamed(self):
+        self.assertEqual(
+            read_members('{"steps": {"a": 1}, "other": [1, 2]}'),
+            {'steps': {'a': 1}, 'other': [1, 2]}
+        )
+
+    def test_byte_order_mark(self):
+        self.assertEqual(read_members('\ufeff{"steps": []}'), {'steps': []})
+
+    def test_invalid_json(self):
+        for content in (
+                '',
+                '{',
+                '{"steps": [1, 2}',
+                '{"steps": [1 2]}',
+                '{steps: []}',
+                '{"steps" []}',
+                '{"steps": []} {}',
+                '{"steps": [1, 2], }',
+                '{"steps": [{"id": "a}]}',
+        ):
+            with self.subTest(content=content):
+                with self.assertRaises(InvalidWorkflowFileException):
+                    read_members(content)
+
+    def test_max_size(self):
+        content = json.dumps({'steps': list(range(1000))})
+
+        self.assertEqual(len(read_members(content, max_size=len(content))['steps']), 1000)
+        with self.assertRaises(WorkflowFileTooLargeException):
+            read_members(content, max_size=len(content) - 1)
+
+    def test_read_document(self):
+        reader = JSONStreamReader(io.BytesIO(b' [1, {"a": 2}] '), chunk_size=3)
+
+        self.assertEqual(reader.read_document(), [1, {'a': 2}])
+
+    def test_load_json(self):
+        self.assertEqual(load_json(b'{"a": 1}'), {'a': 1})
+        for content in (b'{"a": }', b'\xff'):
+            with self.subTest(content=content):
+                with self.assertRaises(InvalidWorkflowFileException):
+                    load_json(content)
@@ -0,0 +1,86 @@
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
+
+from src.workflow.tests.factories import step_data, workflow_data
+from src.workflow.utils.parallel import ParallelWorkflow
+from src.workflow.utils.plan import compile_workflow
+from src.workflow.utils.timing import LatencyHistogram, TimingRecorder
+from src.workflow.utils.workflow import AsyncWorkflow, Workflow
+
+
+def branched_workflow(branches):
+    step_ids = [f'step_{index}' for index in range(branches)]
+    condition = [{'from_id': 'start', 'field_id': 'balance', 'operator': 'eq', 'value': None}]
+    return workflow_data(
+        [step_data(step_id) for step_id in step_ids],
+        step_ids,
+        conditions=dict.fromkeys(step_ids, condition),
+    )
+
+
+class LatencyHistogramTestCase(SimpleTestCase):
+
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for elapsed in [1_000] * 98 + [1_000_000, 5_000_000]:
+            histogram.record(elapsed)
+
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.percentile(50), 1023)
+        self.assertEqual(histogram.percentile(99), 1_048_575)
+        self.assertEqual(histogram.percentile(100), 5_000_000)
+        self.assertEqual(histogram.as_dict()['max_ms'], 5)
+
+    def test_merge(self):
+        histogram, other = LatencyHistogram(), LatencyHistogram()
+        histogram.record(10)
+        other.record(10)
+        other.record(3_000)
+        histogram.merge(other)
+
+        self.assertEqual(histogram.count, 3)
+        self.assertEqual(histogram.total, 3_020)
+        self.assertEqual(histogram.max, 3_000)
+        self.assertEqual(histogram.buckets, {4: 2, 12: 1})
+
+
+class WorkflowTimingTestCase(SimpleTestCase):
+
+    def run_workflow(self, workflow_class, timer=None):
+        workflow = workflow_class(plan=compile_workflow(branched_workflow(3)), timer=timer)
+        workflow.new_balance = Decimal(1000)
+        workflow.run_trigger()
+        return workflow
+
+    def test_timing_is_off_by_default(self):
+        self.assertIsNone(self.run_workflow(Workflow).timer)
+
+    def test_timed_sections(self):
+        timing = self.run_workflow(Workflow, TimingRecorder()).timer.as_dict()
+
+        self.assertEqual(
+            list(timing),
+            ['action.get_account_balance', 'check_conditions', 'run', 'step']
+        )
+        self.assertEqual(timing['action.get_account_balance']['count'], 3)
+        self.assertEqual(timing['check_conditions']['count'], 3)
+        self.assertEqual(timing['step']['count'], 3)
+        self.assertEqual(timing['run']['count'], 1)
+        self.assertGreaterEqual(timing['run']['total_ms'], timing['step']['total_ms'])
+
+    def test_parallel_branches_are_merged(self):
+        timer = self.run_workflow(ParallelWorkflow, TimingRecorder()).timer
+
+        self.assertEqual(timer.histograms['action.get_account_balance'].count, 3)
+        self.assertEqual(timer.histograms['step'].count, 3)
+
+    def test_async_steps(self):
+        plan = compile_workflow(branched_workflow(3))
+        workflow = AsyncWorkflow(plan=plan, timer=TimingRecorder())
+        workflow.new_balance = Decimal(1000)
+        async_to_sync(workflow.arun_trigger)()
+
+        self.assertEqual(workflow.timer.histograms['step'].count, 3)
+        self.assertEqual(workflow.timer.histograms['run'].count, 1)
@@ -0,0 +1,139 @@
+import json
+from decimal import Decimal
+from pathlib import Path
+
+from django.test import TestCase
+
+from src.workflow.tests.factories import UserFactory, AccountFactory
+from src.workflow.utils.actions import action_registry
+from src.workflow.utils.authentication import UserPINAuthenticationClass
+from src.workflow.utils.batch import BatchWorkflow
+from src.workflow.utils.logs import StepLogEncoder
+from src.workflow.utils.plan import compile_workflow
+from src.workflow.utils.vectorized import VectorizedBatchWorkflow
+
+workflow_example_path = Path(__file__).resolve().parent.parent / 'workflow_example.json'
+
+
+class VectorizedBatchWorkflowTestCase(TestCase):
+
+    def setUp(self):
+        self.trigger_params_list = []
+        for index, balance in enumerate((0, 30, 70_000, 100_000, 150_000, 250_000)):
+            user = UserFactory(
+                user_id=f'10539889{index}',
+                pin=1000 + index
+            )
+            AccountFactory(
+                user=user,
+                balance=Decimal(balance)
+            )
+            self.trigger_params_list.append({'user_id': user.user_id, 'pin': user.pin})
+        # Invalid PIN, then the same users triggered again
+        self.trigger_params_list += [
+            {'user_id': '105398890', 'pin': 9999},
+            {'user_id': 'unknown', 'pin': 1000},
+        ] + self.trigger_params_list[:3]
+
+        with open(workflow_example_path) as workflow_example_file:
+            self.workflow_input_data = json.loads(workflow_example_file.read())
+
+    def assertSameResults(self, plan, max_steps=None):
+        scalar = BatchWorkflow(
+            plan=plan,
+            authentication_class=UserPINAuthenticationClass,
+            max_steps=max_steps,
+        )
+        vectorized = VectorizedBatchWorkflow(
+            plan=plan,
+            authentication_class=UserPINAuthenticationClass,
+            max_steps=max_steps,
+        )
+        self.assertTrue(vectorized.vectorized)
+
+        scalar_results = list(scalar.run(self.trigger_params_list))
+        vectorized_results = list(vectorized.run(self.trigger_params_list))
+
+        for scalar_result, vectorized_result in zip(scalar_results, vectorized_results):
+            self.assertEqual(vectorized_result.success, scalar_result.success)
+            self.assertEqual(vectorized_result.user_id, scalar_result.user_id)
+            self.assertEqual(
+                str(vectorized_result.new_balance),
+                str(scalar_result.new_balance)
+            )
+            self.assertEqual(
+                json.dumps(vectorized_result.logs, cls=StepLogEncoder),
+                json.dumps(scalar_result.logs, cls=StepLogEncoder)
+            )
+            self.assertEqual(type(vectorized_result.error), type(scalar_result.error))
+            self.assertEqual(str(vectorized_result.error), str(scalar_result.error))
+        self.assertEqual(len(vectorized_results), len(scalar_results))
+        self.assertEqual(vectorized.balances, scalar.balances)
+        self.assertEqual(vectorized.fallbacks, 0)
+        return vectorized_results
+
+    def test_workflow_example(self):
+        self.assertSameResults(compile_workflow(self.workflow_input_data))
+
+    def test_insufficient_balance(self):
+        withdraw_step = self.workflow_input_data['steps'][2]
+        withdraw_step['params']['money']['value'] = 200_000
+
+        results = self.assertSameResults(compile_workflow(self.workflow_input_data))
+
+        self.assertIn(
+            'InsufficientBalanceException',
+            {type(result.error).__name__ for result in results}
+        )
+
+    def test_max_steps(self):
+        results = self.assertSameResults(
+            compile_workflow(self.workflow_input_data),
+            max_steps=3
+        )
+
+        self.assertIn(
+            'MaxStepsExceededException',
+            {type(result.error).__name__ for result in results}
+        )
+
+    def test_in_and_between_conditions(self):
+        account_balance_step = self.workflow_input_data['steps'][1]
+        account_balance_step['transitions'][0]['condition'][0].update(
+            operator='between', value=[30, 200_000]
+        )
+        account_balance_step['transitions'][1]['condition'][0].update(
+            operator='in', value=[0, 250_000]
+        )
+
+        self.assertSameResults(compile_workflow(self.workflow_input_data))
+
+    def test_unsupported_action_falls_back_to_scalar(self):
+        registry = action_registry.copy()
+
+        @registry.register('notify', reads_account=False, writes_account=False)
+        def notify(workflow, **params):
+            return {'sent': True}
+
+        self.workflow_input_data['steps'][1]['action'] = 'notify'
+
+        batch = VectorizedBatchWorkflow(
+            plan=compile_workflow(self.workflow_input_data, registry=registry),
+            authentication_class=UserPINAuthenticationClass,
+        )
+
+        self.assertFalse(batch.vectorized)
+
+    def test_replaced_builtin_action_falls_back_to_scalar(self):
+        registry = action_registry.copy()
+
+        @registry.register('get_account_balance', writes_account=False)
+        def get_account_balance(workflow, **params):
+            return {'balance': workflow.new_balance}
+
+        batch = VectorizedBatchWorkflow(
+            plan=compile_workflow(self.workflow_input_data, registry=registry),
+            authentication_class=UserPINAuthenticationClass,
+        )
+
+        self.assertFalse(batch.vectorized)
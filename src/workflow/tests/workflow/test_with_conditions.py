@@ -569,3 +569,129 @@ class WorkflowWithConditionsTestCase(TestCase):
 
         self.assertEqual(workflow.initial_balance, Decimal(50_000))
         self.assertEqual(workflow.new_balance, Decimal(100_000))
+
+    def test_workflow_condition_uses_latest_output_of_repeated_step(self):
+        def deposit_step(step_id, money):
+            return {
+                'id': step_id,
+                'params': {
+                    'user_id': {
+                        'from_id': 'start',
+                        'param_id': 'user_id',
+                    },
+                    'money': {
+                        'from_id': None,
+                        'value': Decimal(money),
+                    },
+                },
+                'action': 'deposit_money',
+                'transitions': [
+                    {
+                        'target': 'account_balance',
+                        'condition': []
+                    }
+                ]
+            }
+
+        workflow_input_data = {
+            'steps': [
+                {
+                    'id': 'validate_account',
+                    'params': {
+                        'user_id': {
+                            'from_id': 'start',
+                            'param_id': 'user_id'
+                        },
+                        'pin': {
+                            'from_id': 'start',
+                            'param_id': 'pin',
+                        },
+                    },
+                    'action': 'validate_account',
+                    'transitions': [
+                        {
+                            'target': 'deposit_100',
+                            'condition': []
+                        },
+                        {
+                            'target': 'deposit_200',
+                            'condition': []
+                        }
+                    ]
+                },
+                deposit_step('deposit_100', 100_000),
+                deposit_step('deposit_200', 200_000),
+                {
+                    'id': 'account_balance',
+                    'params': {
+                        'user_id': {
+                            'from_id': 'start',
+                            'param_id': 'user_id',
+                        },
+                    },
+                    'action': 'get_account_balance',
+                    'transitions': [
+                        {
+                            'condition': [
+                                {
+                                    'from_id': 'account_balance',
+                                    'field_id': 'balance',
+                                    'operator': 'gte',
+                                    'value': 300_000,
+                                }
+                            ],
+                            'target': 'withdraw_10',
+                        }
+                    ]
+                },
+                {
+                    'id': 'withdraw_10',
+                    'params': {
+                        'user_id': {
+                            'from_id': 'start',
+                            'param_id': 'user_id',
+                        },
+                        'money': {
+                            'from_id': None,
+                            'value': Decimal(10_000),
+                        },
+                    },
+                    'action': 'withdraw_in_dollars',
+                    'transitions': []
+                }
+            ],
+            'trigger': {
+                'params': {
+                    'user_id': self.user.user_id,
+                    'pin': self.user.pin,
+                },
+                'transitions': [
+                    {
+                        'target': 'validate_account',
+                        'condition': [],
+                    }
+                ]
+            }
+        }
+
+        workflow = Workflow(
+            workflow_data=workflow_input_data,
+            authentication_class=UserPINAuthenticationClass,
+        )
+        workflow.run_trigger()
+
+        self.assertEqual(
+            [log['id'] for log in workflow.logs],
+            [
+                'validate_account',
+                'deposit_100',
+                'account_balance',
+                'deposit_200',
+                'account_balance',
+                'withdraw_10',
+            ]
+        )
+        self.assertEqual(workflow.logs[2]['output']['balance'], Decimal(100_000))
+        self.assertEqual(workflow.logs[4]['output']['balance'], Decimal(300_000))
+        self.assertEqual(workflow.outputs['account_balance']['balance'], Decimal(300_000))
+        self.assertEqual(workflow.new_balance, Decimal(290_000))
@@ -1,5 +1,74 @@
+import time
+
+from src.utils.asynchronous import database_sync_to_async
+from src.workflow.utils.logs import FULL_LOGS, SUMMARY_LOGS, LogSummary
+
+
 class AbstractAuthenticationClass:
 
     @classmethod
     def authenticate(cls, **credentials):
         raise NotImplementedError
+
+    @classmethod
+    def bulk_authenticate(cls, credentials_list):
+        return [cls.authenticate(**credentials) for credentials in credentials_list]
+
+    @classmethod
+    async def aauthenticate(cls, **credentials):
+        return await database_sync_to_async(cls.authenticate)(**credentials)
+
+
+class AbstractLogSink:
+    """
+    Receives the log entries of a run as its steps finish.
+
+    Entries are buffered and handed to `write_entries` once `buffer_size`
+    of them are waiting or `flush_interval` seconds went by since the last
+    flush, and when the sink is closed. At the `summary` verbosity entries
+    are only counted and the sink gets a single `LogSummary` on close.
+    """
+
+    buffer_size = 1000
+    flush_interval = 1.0
+
+    def __init__(self, buffer_size=None, flush_interval=None, verbosity=FULL_LOGS):
+        if buffer_size is not None:
+            self.buffer_size = buffer_size
+        if flush_interval is not None:
+            self.flush_interval = flush_interval
+        self.verbosity = verbosity
+        self.summary = LogSummary()
+        self.buffer = []
+        self.flushed_at = time.monotonic()
+
+    def write(self, log):
+        if self.verbosity == SUMMARY_LOGS:
+            self.summary.add(log)
+            return
+        self.buffer.append(log)
+        if (
+                len(self.buffer) >= self.buffer_size
+                or time.monotonic() - self.flushed_at >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            entries, self.buffer = self.buffer, []
+            self.write_entries(entries)
+        self.flushed_at = time.monotonic()
+
+    def close(self):
+        if self.verbosity == SUMMARY_LOGS:
+            self.buffer.append(self.summary)
+            self.summary = LogSummary()
+        self.flush()
+
+    def write_entries(self, entries):
+        raise NotImplementedError
+
+    def get_logs(self):
+        # Entries still held in memory once the run is over, sinks that
+        # write them somewhere else keep none.
+        return []
@@ -0,0 +1,115 @@
+import copy
+
+from src.workflow.utils.exceptions import InsufficientBalanceException
+
+
+class Action:
+    """
+    Registered action, called with the running workflow and the params of
+    the step.
+
+    `reads_account` and `writes_account` tell whether the action touches
+    the account state of the workflow, unknown effects are assumed for
+    both. `async_func` is the coroutine counterpart run by `AsyncWorkflow`.
+    """
+    __slots__ = ('name', 'func', 'reads_account', 'writes_account', 'async_func')
+
+    def __init__(self, name, func, reads_account=True, writes_account=True):
+        self.name = name
+        self.func = func
+        self.reads_account = reads_account
+        self.writes_account = writes_account
+        self.async_func = None
+
+    def __call__(self, workflow, **params):
+        return self.func(workflow, **params)
+
+    def __repr__(self):
+        return f'<Action {self.name}>'
+
+
+class ActionRegistry:
+    """
+    Table of the actions a workflow file can call, filled with the
+    `register` decorator:
+
+        @action_registry.register('charge_fee')
+        def charge_fee(workflow, **params):
+            ...
+    """
+
+    def __init__(self, actions=None):
+        self.actions = dict(actions or {})
+
+    def register(self, name=None, reads_account=True, writes_account=True):
+        def decorator(func):
+            action_name = name or func.__name__
+            self.actions[action_name] = Action(
+                action_name,
+                func,
+                reads_account=reads_account,
+                writes_account=writes_account,
+            )
+            return func
+        return decorator
+
+    def register_async(self, name):
+        def decorator(func):
+            if name not in self.actions:
+                raise KeyError(f"Action '{name}' has no synchronous version registered")
+            self.actions[name].async_func = func
+            return func
+        return decorator
+
+    def unregister(self, name):
+        self.actions.pop(name, None)
+
+    def get(self, name):
+        return self.actions.get(name)
+
+    def copy(self):
+        return ActionRegistry({name: copy.copy(action) for name, action in self.actions.items()})
+
+    def __contains__(self, name):
+        return name in self.actions
+
+    def __iter__(self):
+        return iter(self.actions)
+
+
+action_registry = ActionRegistry()
+
+
+@action_registry.register('validate_account', reads_account=False)
+def validate_account(workflow, **params):
+    user_id, pin = workflow.get_credentials(params)
+    auth_data = workflow.authenticate(user_id, pin)
+    return workflow.set_account(user_id, auth_data)
+
+
+@action_registry.register_async('validate_account')
+async def avalidate_account(workflow, **params):
+    user_id, pin = workflow.get_credentials(params)
+    auth_data = await workflow.aauthenticate(user_id, pin)
+    return workflow.set_account(user_id, auth_data)
+
+
+@action_registry.register('deposit_money')
+def deposit_money(workflow, **params):
+    workflow.new_balance += params['money']
+    return {'balance': workflow.new_balance}
+
+
+@action_registry.register('withdraw_in_dollars')
+def withdraw_in_dollars(workflow, **params):
+    if params['money'] > workflow.new_balance:
+        workflow.new_balance = None
+        raise InsufficientBalanceException
+
+    workflow.new_balance -= params['money']
+    return {'balance': workflow.new_balance}
+
+
+@action_registry.register('get_account_balance', writes_account=False)
+def get_account_balance(workflow, **params):
+    return {'balance': workflow.new_balance}
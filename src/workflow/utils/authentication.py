@@ -1,23 +1,168 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
 from src.workflow.models import User, Account
 from src.workflow.utils.abstracts import AbstractAuthenticationClass
+from src.workflow.utils.cache import pin_check_cache
 
 
 class UserPINAuthenticationClass(AbstractAuthenticationClass):
 
     @classmethod
     def authenticate(cls, **credentials):
+        users_by_id = cls.get_users([credentials.get('user_id')])
+        return cls.check_credentials(users_by_id.get(str(credentials.get('user_id'))), credentials)
+
+    @classmethod
+    def bulk_authenticate(cls, credentials_list):
+        users_by_id = cls.get_users([credentials['user_id'] for credentials in credentials_list])
+        return [
+            cls.check_credentials(users_by_id.get(str(credentials['user_id'])), credentials)
+            for credentials in credentials_list
+        ]
+
+    @classmethod
+    def get_users(cls, user_ids):
+        """
+        Users of `user_ids` with their account, in a single query, keyed
+        by `user_id`.
+        """
+        users = User.objects.filter(
+            user_id__in={str(user_id) for user_id in user_ids}
+        ).select_related('account')
+        return {user.user_id: user for user in users}
+
+    @classmethod
+    def check_credentials(cls, user, credentials):
+        pin_field = User._meta.get_field('pin')
         try:
-            user = User.objects.get(**credentials)
-            account = user.account
-            return {
-                'balance': account.balance.to_decimal(),
-                'is_valid': True,
-                'user_id': user.user_id,
-            }
-        except (User.DoesNotExist, Account.DoesNotExist):
-            return {
-                'balance': None,
-                'is_valid': False,
-                'user_id': None,
-            }
+            if user is None or user.pin != pin_field.to_python(credentials.get('pin')):
+                raise User.DoesNotExist
+            return cls.get_auth_data(user)
+        except (User.DoesNotExist, Account.DoesNotExist, ValidationError):
+            return cls.get_invalid_auth_data()
+
+    @classmethod
+    def get_auth_data(cls, user):
+        return {
+            'balance': user.account.balance.to_decimal(),
+            'is_valid': True,
+            'user_id': user.user_id,
+        }
+
+    @classmethod
+    def get_invalid_auth_data(cls):
+        return {
+            'balance': None,
+            'is_valid': False,
+            'user_id': None,
+        }
+
+
+class CachedPINAuthenticationClass(UserPINAuthenticationClass):
+    """
+    `UserPINAuthenticationClass` that skips the user lookup for recent
+    successful user/PIN checks kept in `pin_check_cache`.
+
+    Balances are always read fresh: a cached check costs a single read of
+    the balances of the accounts, failed and expired checks go through the
+    user lookup as before.
+    """
+
+    pin_check_cache = pin_check_cache
+
+    @classmethod
+    def authenticate(cls, **credentials):
+        return cls.bulk_authenticate([credentials])[0]
+
+    @classmethod
+    def bulk_authenticate(cls, credentials_list):
+        user_pks = [
+            cls.pin_check_cache.check(credentials.get('user_id'), credentials.get('pin'))
+            for credentials in credentials_list
+        ]
+        balances = dict(
+            Account.objects.filter(
+                user_id__in={user_pk for user_pk in user_pks if user_pk is not None}
+            ).values_list('user_id', 'balance')
+        ) if any(user_pk is not None for user_pk in user_pks) else {}
+
+        auth_data_list = []
+        missing = []
+        for index, (credentials, user_pk) in enumerate(zip(credentials_list, user_pks)):
+            if user_pk in balances:
+                auth_data_list.append({
+                    'balance': balances[user_pk].to_decimal(),
+                    'is_valid': True,
+                    'user_id': str(credentials['user_id']),
+                })
+            else:
+                auth_data_list.append(None)
+                missing.append(index)
+
+        if missing:
+            for index, auth_data in zip(missing, super().bulk_authenticate([
+                credentials_list[index] for index in missing
+            ])):
+                auth_data_list[index] = auth_data
+        return auth_data_list
+
+    @classmethod
+    def check_credentials(cls, user, credentials):
+        auth_data = super().check_credentials(user, credentials)
+        if auth_data['is_valid']:
+            cls.pin_check_cache.add(user.user_id, user.pk, credentials.get('pin'))
+        return auth_data
+
+
+class CachedUserAuthentication:
+    """
+    Authenticates against `authentication_class` checking every user/PIN
+    pair at most once, for as long as the instance lives: one workflow run
+    or one request.
+
+    Balances are the ones read by the first check, which is what a run
+    sees anyway since balances are only saved once it ends.
+    """
+
+    def __init__(self, authentication_class=UserPINAuthenticationClass):
+        self.authentication_class = authentication_class
+        self.auth_data = {}
+
+    @staticmethod
+    def get_key(credentials):
+        return str(credentials.get('user_id')), str(credentials.get('pin'))
+
+    def authenticate(self, **credentials):
+        key = self.get_key(credentials)
+        if key not in self.auth_data:
+            self.auth_data[key] = self.authentication_class.authenticate(**credentials)
+        return self.auth_data[key]
+
+    def bulk_authenticate(self, credentials_list):
+        missing = {}
+        for credentials in credentials_list:
+            if (key := self.get_key(credentials)) not in self.auth_data:
+                missing.setdefault(key, credentials)
+        if missing:
+            self.auth_data.update(zip(
+                missing,
+                self.authentication_class.bulk_authenticate(list(missing.values()))
+            ))
+        return [self.auth_data[self.get_key(credentials)] for credentials in credentials_list]
+
+    async def aauthenticate(self, **credentials):
+        key = self.get_key(credentials)
+        if key not in self.auth_data:
+            self.auth_data[key] = await self.authentication_class.aauthenticate(**credentials)
+        return self.auth_data[key]
+
 
+def get_authentication_class():
+    """
+    Authentication class of the engine, `CachedPINAuthenticationClass` when
+    `WORKFLOW_PIN_CACHE_SIZE` enables the PIN check cache.
+    """
+    if settings.WORKFLOW_PIN_CACHE_SIZE > 0:
+        return CachedPINAuthenticationClass
+    return UserPINAuthenticationClass
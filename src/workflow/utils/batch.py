@@ -0,0 +1,149 @@
+from collections import namedtuple
+from itertools import islice
+from typing import Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from src.workflow.models import Account
+from src.workflow.utils.abstracts import AbstractAuthenticationClass
+from src.workflow.utils.exceptions import WorkflowException
+from src.workflow.utils.logs import FULL_LOGS
+from src.workflow.utils.plan import WorkflowPlan
+from src.workflow.utils.sinks import MemoryLogSink
+from src.workflow.utils.workflow import Workflow
+
+BatchResult = namedtuple(
+    'BatchResult',
+    ('trigger_params', 'success', 'user_id', 'new_balance', 'logs', 'error'),
+)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class PrefetchedAuthentication:
+    """
+    Answers `authenticate` calls from one `bulk_authenticate` round-trip.
+
+    Balances updated by earlier runs of the batch are layered on top of the
+    prefetched ones, so a user triggered several times sees the same
+    balances it would see if every trigger was uploaded on its own.
+    """
+
+    def __init__(self, authentication_class, credentials_list, balances):
+        self.authentication_class = authentication_class
+        self.balances = balances
+        self.auth_data = {
+            (credentials['user_id'], credentials['pin']): auth_data
+            for credentials, auth_data in zip(
+                credentials_list,
+                authentication_class.bulk_authenticate(credentials_list)
+            )
+        }
+
+    def authenticate(self, **credentials):
+        key = (credentials.get('user_id'), credentials.get('pin'))
+        if (auth_data := self.auth_data.get(key)) is None:
+            auth_data = self.authentication_class.authenticate(**credentials)
+        if auth_data['is_valid'] and auth_data['user_id'] in self.balances:
+            auth_data = dict(auth_data, balance=self.balances[auth_data['user_id']])
+        return auth_data
+
+
+class BatchWorkflow:
+    """
+    Runs one compiled workflow once per trigger params set.
+
+    Trigger params are consumed `chunk_size` at a time, the accounts of a
+    chunk are authenticated with a single `bulk_authenticate` call.
+    """
+
+    chunk_size = 1000
+
+    def __init__(
+            self,
+            plan: WorkflowPlan,
+            authentication_class: AbstractAuthenticationClass,
+            max_steps: Optional[int] = None,
+            chunk_size: Optional[int] = None,
+            log_verbosity: str = FULL_LOGS,
+    ):
+        self.plan = plan
+        self.authentication_class = authentication_class
+        self.max_steps = max_steps
+        self.log_verbosity = log_verbosity
+        if chunk_size is not None:
+            self.chunk_size = chunk_size
+
+        # Latest balance of every user a successful run updated.
+        self.balances: dict = {}
+
+    def run(self, trigger_params_list):
+        for chunk in chunked(trigger_params_list, self.chunk_size):
+            yield from self.run_chunk(chunk)
+
+    def run_chunk(self, trigger_params_list):
+        credentials_list = [
+            {'user_id': trigger_params['user_id'], 'pin': trigger_params['pin']}
+            for trigger_params in trigger_params_list
+        ]
+        authentication = PrefetchedAuthentication(
+            self.authentication_class,
+            credentials_list,
+            self.balances
+        )
+        for trigger_params in trigger_params_list:
+            yield self.run_trigger(trigger_params, authentication)
+
+    def run_trigger(self, trigger_params, authentication):
+        workflow = Workflow(
+            plan=self.plan.with_trigger_params(trigger_params),
+            authentication_class=authentication,
+            max_steps=self.max_steps,
+            log_sink=self.get_log_sink(),
+        )
+        error = None
+        try:
+            workflow.run_trigger()
+            success = bool(workflow.new_balance)
+        except WorkflowException as exc:
+            success = False
+            error = exc
+        if success:
+            self.balances[workflow.user_id] = workflow.new_balance
+        return BatchResult(
+            trigger_params=trigger_params,
+            success=success,
+            user_id=workflow.user_id,
+            new_balance=workflow.new_balance if success else None,
+            logs=workflow.logs,
+            error=error,
+        )
+
+    def get_log_sink(self):
+        return MemoryLogSink(verbosity=self.log_verbosity)
+
+
+def bulk_update_balances(balances):
+    """
+    Write `{user_id: balance}` to the accounts in one read and one update
+    per account, all in a single transaction.
+
+    djongo can't parse the `CASE WHEN` statement `bulk_update` builds, every
+    account is written with a plain `UPDATE ... WHERE id = ...` instead.
+    """
+    accounts = list(
+        Account.objects.filter(user__user_id__in=list(balances)).values_list('pk', 'user__user_id')
+    )
+    updated_at = timezone.now()
+    with transaction.atomic():
+        for pk, user_id in accounts:
+            Account.objects.filter(pk=pk).update(
+                balance=balances[user_id],
+                updated_at=updated_at
+            )
+    return len(accounts)
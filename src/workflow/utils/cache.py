@@ -0,0 +1,149 @@
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+
+CachedWorkflowDefinition = namedtuple(
+    'CachedWorkflowDefinition',
+    ('workflow_data', 'plan'),
+)
+
+CacheInfo = namedtuple('CacheInfo', ('hits', 'misses', 'maxsize', 'currsize'))
+
+
+def definition_cache_key(json_data):
+    """
+    Hash of an uploaded workflow definition, trigger params excluded, or
+    `None` when the data doesn't look like a workflow definition.
+    """
+    if not isinstance(json_data, dict) or not isinstance(json_data.get('trigger'), dict):
+        return None
+    definition = dict(json_data)
+    definition['trigger'] = {
+        key: value for key, value in json_data['trigger'].items() if key != 'params'
+    }
+    encoded = json.dumps(definition, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class WorkflowDefinitionCache:
+    """
+    Thread safe LRU cache of validated and compiled workflow definitions.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key is not None and key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        if key is None or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+
+workflow_definition_cache = WorkflowDefinitionCache(
+    maxsize=settings.WORKFLOW_DEFINITION_CACHE_SIZE
+)
+
+
+class PINCheckCache:
+    """
+    Thread safe LRU cache of recent successful user/PIN checks, each kept
+    for `ttl` seconds.
+
+    PINs are never stored, entries keep a hash of the PIN salted with a
+    key drawn when the process starts, along with the pk of the user.
+    Entries of a user are dropped whenever it is saved or deleted, see
+    `src.workflow.signals`. Signals only reach the cache of the process
+    that saved the user: the other workers and processes, and every
+    process on updates that skip model signals, keep accepting the old
+    PIN until their entry is `ttl` seconds old. Keep the TTL as short as
+    such a stale window can be.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._key = os.urandom(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hash_pin(self, pin):
+        return hmac.new(self._key, str(pin).encode(), hashlib.sha256).digest()
+
+    def check(self, user_id, pin):
+        """
+        Pk of the user when `pin` is the one of a cached check of
+        `user_id`, `None` otherwise.
+        """
+        if self.maxsize <= 0:
+            return None
+        user_id = str(user_id)
+        with self._lock:
+            if (entry := self._entries.get(user_id)) is None:
+                return None
+            user_pk, pin_hash, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+        if hmac.compare_digest(pin_hash, self.hash_pin(pin)):
+            return user_pk
+        return None
+
+    def add(self, user_id, user_pk, pin):
+        if self.maxsize <= 0:
+            return
+        entry = (user_pk, self.hash_pin(pin), time.monotonic() + self.ttl)
+        with self._lock:
+            self._entries[str(user_id)] = entry
+            self._entries.move_to_end(str(user_id))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_pk):
+        with self._lock:
+            for user_id in [
+                user_id for user_id, entry in self._entries.items() if entry[0] == user_pk
+            ]:
+                del self._entries[user_id]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+pin_check_cache = PINCheckCache(
+    maxsize=settings.WORKFLOW_PIN_CACHE_SIZE,
+    ttl=settings.WORKFLOW_PIN_CACHE_TTL
+)
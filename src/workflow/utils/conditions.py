@@ -0,0 +1,77 @@
+import operator
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from src.workflow.utils.exceptions import InvalidConditionException
+
+
+def _in(step_output, condition_value):
+    return step_output in condition_value
+
+
+def _between(step_output, condition_value):
+    lower, upper = condition_value
+    return lower <= step_output <= upper
+
+
+OPERATORS = {
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+    'in': _in,
+    'between': _between,
+}
+
+
+def validate_condition_value(operator_name, value):
+    """
+    Check `value` has the shape `operator_name` expects, raises
+    `InvalidConditionException` otherwise.
+    """
+    if operator_name not in OPERATORS:
+        raise InvalidConditionException(
+            'Unknown condition operator %r, expected one of: %s' % (
+                operator_name, ', '.join(OPERATORS)
+            )
+        )
+    if operator_name == 'in' and not isinstance(value, (list, tuple)):
+        raise InvalidConditionException("'in' conditions expect a list value")
+    if operator_name == 'between' and (
+            not isinstance(value, (list, tuple)) or len(value) != 2
+    ):
+        raise InvalidConditionException(
+            "'between' conditions expect a [lower, upper] value"
+        )
+
+
+@dataclass(frozen=True)
+class ConditionPredicate:
+    from_id: str
+    field_id: str
+    operator: str
+    value: Any
+    compare: Callable
+
+    def __call__(self, step_output):
+        try:
+            return bool(self.compare(step_output, self.value))
+        except TypeError:
+            # Missing outputs and values of unrelated types never match.
+            return False
+
+
+def compile_condition(condition):
+    validate_condition_value(condition['operator'], condition['value'])
+    value = condition['value']
+    if isinstance(value, list):
+        value = tuple(value)
+    return ConditionPredicate(
+        from_id=condition['from_id'],
+        field_id=condition['field_id'],
+        operator=condition['operator'],
+        value=value,
+        compare=OPERATORS[condition['operator']],
+    )
@@ -12,3 +12,31 @@ class InvalidUserAccountCredentialsException(WorkflowException):
 
 class InsufficientBalanceException(WorkflowException):
     pass
+
+
+class MaxStepsExceededException(WorkflowException):
+    pass
+
+
+class InvalidWorkflowException(WorkflowException):
+    pass
+
+
+class CyclicParamReferenceException(InvalidWorkflowException):
+    pass
+
+
+class InvalidConditionException(InvalidWorkflowException):
+    pass
+
+
+class UnknownActionException(InvalidWorkflowException):
+    pass
+
+
+class InvalidWorkflowFileException(InvalidWorkflowException):
+    pass
+
+
+class WorkflowFileTooLargeException(InvalidWorkflowFileException):
+    pass
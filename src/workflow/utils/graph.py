@@ -0,0 +1,132 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+# Node of the trigger, it can't collide with a step id.
+TRIGGER = object()
+
+
+@dataclass(frozen=True)
+class GraphAnalysis:
+    """
+    Static analysis of the step graph of a workflow.
+
+    `max_path_length` is the number of steps of the longest path, the
+    most a run can execute one after the other. Every transition whose
+    conditions hold is followed, so a step reached along several paths
+    runs once per path: `max_run_steps` counts the steps of all paths
+    together, the most a run can execute. Both are None when a reachable
+    cycle makes them unbounded.
+    """
+    steps: int
+    reachable_steps: Tuple[str, ...]
+    unreachable_steps: Tuple[str, ...]
+    missing_targets: Tuple[Tuple[str, str], ...]
+    cycles: Tuple[Tuple[str, ...], ...]
+    max_path_length: Optional[int]
+    max_run_steps: Optional[int]
+
+    def as_dict(self):
+        return {
+            'steps': self.steps,
+            'reachable_steps': len(self.reachable_steps),
+            'unreachable_steps': list(self.unreachable_steps),
+            'missing_targets': [
+                {'step': step_id, 'target': target}
+                for step_id, target in self.missing_targets
+            ],
+            'cycles': [list(cycle) for cycle in self.cycles],
+            'max_path_length': self.max_path_length,
+            'max_run_steps': self.max_run_steps,
+        }
+
+
+def strongly_connected_components(root, successors):
+    """
+    Iterative Tarjan over the nodes reachable from `root`. Components come
+    out in reverse topological order, every component after the ones it
+    leads to.
+    """
+    index = {root: 0}
+    low = {root: 0}
+    stack = [root]
+    on_stack = {root}
+    components = []
+    work = [(root, iter(successors[root]))]
+    while work:
+        node, children = work[-1]
+        for child in children:
+            if child not in index:
+                index[child] = low[child] = len(index)
+                stack.append(child)
+                on_stack.add(child)
+                work.append((child, iter(successors[child])))
+                break
+            if child in on_stack:
+                low[node] = min(low[node], index[child])
+        else:
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    return components
+
+
+def analyze_graph(steps_data, trigger_data, trigger_id):
+    """
+    Analyze the graph of `steps_data`, step ids mapped to their validated
+    data, entered through the transitions of `trigger_data`. Missing
+    targets of the trigger are reported under `trigger_id`.
+    """
+    successors = {}
+    missing_targets = []
+    for node, node_id, transitions in [(TRIGGER, trigger_id, trigger_data['transitions'])] + [
+        (step_id, step_id, step_data.get('transitions', []))
+        for step_id, step_data in steps_data.items()
+    ]:
+        successors[node] = []
+        for transition in transitions:
+            if transition['target'] in steps_data:
+                successors[node].append(transition['target'])
+            else:
+                missing_targets.append((node_id, transition['target']))
+
+    components = strongly_connected_components(TRIGGER, successors)
+
+    cycles = []
+    for component in components:
+        if len(component) > 1 or component[0] in successors[component[0]]:
+            members = set(component)
+            cycles.append(tuple(step_id for step_id in steps_data if step_id in members))
+
+    max_path_length = max_run_steps = None
+    if not cycles:
+        # Components are single nodes after their successors, so both
+        # bounds of a node only need the ones of its successors.
+        lengths = {}
+        run_steps = {}
+        for (node,) in components:
+            own = 0 if node is TRIGGER else 1
+            lengths[node] = own + max((lengths[child] for child in successors[node]), default=0)
+            run_steps[node] = own + sum(run_steps[child] for child in successors[node])
+        max_path_length = lengths[TRIGGER]
+        max_run_steps = run_steps[TRIGGER]
+
+    reachable = {node for component in components for node in component}
+    return GraphAnalysis(
+        steps=len(steps_data),
+        reachable_steps=tuple(step_id for step_id in steps_data if step_id in reachable),
+        unreachable_steps=tuple(step_id for step_id in steps_data if step_id not in reachable),
+        missing_targets=tuple(missing_targets),
+        cycles=tuple(cycles),
+        max_path_length=max_path_length,
+        max_run_steps=max_run_steps,
+    )
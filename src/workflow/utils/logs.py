@@ -0,0 +1,157 @@
+import math
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+# Log verbosity levels, `summary` keeps a single `LogSummary` per run.
+FULL_LOGS = 'full'
+SUMMARY_LOGS = 'summary'
+LOG_VERBOSITIES = (FULL_LOGS, SUMMARY_LOGS)
+
+
+@dataclass
+class StepLog:
+    """
+    Log entry of an executed step.
+
+    Entries stay slotted objects while the engine runs and only turn into
+    the dicts stored in `Upload.logs` when they are encoded with
+    `StepLogEncoder`. They can be read like those dicts, `log['output']`.
+    """
+    __slots__ = ('params', 'id', 'action', 'output')
+
+    params: dict
+    id: str
+    action: Optional[str]
+    output: Any
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def as_dict(self):
+        return {
+            'params': self.params,
+            'id': self.id,
+            'action': self.action,
+            'output': self.output,
+        }
+
+
+@dataclass(init=False)
+class LogSummary:
+    """
+    What is left of the logs of a run at the `summary` verbosity.
+    """
+    __slots__ = ('steps', 'actions', 'last_step', 'last_output')
+
+    steps: int
+    actions: dict
+    last_step: Optional[str]
+    last_output: Any
+
+    def __init__(self):
+        self.steps = 0
+        self.actions = {}
+        self.last_step = None
+        self.last_output = None
+
+    def add(self, log):
+        self.steps += 1
+        self.actions[log.action] = self.actions.get(log.action, 0) + 1
+        self.last_step = log.id
+        self.last_output = log.output
+
+    def as_dict(self):
+        return {
+            'summary': {
+                'steps': self.steps,
+                'actions': self.actions,
+                'last_step': self.last_step,
+                'last_output': self.last_output,
+            }
+        }
+
+
+class StepLogEncoder(DjangoJSONEncoder):
+
+    def default(self, o):
+        if isinstance(o, (StepLog, LogSummary)):
+            return o.as_dict()
+        return super().default(o)
+
+
+_step_log_encoder = StepLogEncoder()
+
+# Types `json.loads` gives back as they are.
+JSON_SCALAR_TYPES = frozenset((str, int, float, bool, type(None)))
+
+
+def to_json_data(o):
+    """
+    `o` as the JSON compatible data `json.loads` would give back for it
+    once encoded with `StepLogEncoder`, built in a single walk instead of
+    encoding it to a string and parsing it back.
+    """
+    o_type = type(o)
+    if o_type in JSON_SCALAR_TYPES:
+        return o
+    if o_type is StepLog:
+        return {
+            'params': to_json_data(o.params),
+            'id': to_json_data(o.id),
+            'action': to_json_data(o.action),
+            'output': to_json_data(o.output),
+        }
+    if o_type is dict:
+        return {
+            key if type(key) is str else to_json_key(key):
+                value if type(value) in JSON_SCALAR_TYPES else to_json_data(value)
+            for key, value in o.items()
+        }
+    if o_type is list or o_type is tuple:
+        return [
+            item if type(item) in JSON_SCALAR_TYPES else to_json_data(item)
+            for item in o
+        ]
+    if o_type is Decimal:
+        return str(o)
+    # Subclasses of the JSON types are encoded as their base type.
+    if isinstance(o, str):
+        return str.__str__(o)
+    if isinstance(o, int):
+        return int(o)
+    if isinstance(o, float):
+        return float(o)
+    if isinstance(o, dict):
+        return to_json_data(dict(o))
+    if isinstance(o, (list, tuple)):
+        return to_json_data(list(o))
+    return to_json_data(_step_log_encoder.default(o))
+
+
+def to_json_key(key):
+    """
+    Dict key `key` as `json.dumps` writes it.
+    """
+    if isinstance(key, str):
+        return str.__str__(key)
+    if key is True:
+        return 'true'
+    if key is False:
+        return 'false'
+    if key is None:
+        return 'null'
+    if isinstance(key, int):
+        return int.__repr__(key)
+    if isinstance(key, float):
+        if math.isnan(key):
+            return 'NaN'
+        if math.isinf(key):
+            return 'Infinity' if key > 0 else '-Infinity'
+        return float.__repr__(key)
+    raise TypeError(f'keys must be str, int, float, bool or None, not {key.__class__.__name__}')
@@ -0,0 +1,190 @@
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from django.db import connections
+
+from src.workflow.utils.exceptions import MaxStepsExceededException
+from src.workflow.utils.sinks import MemoryLogSink
+from src.workflow.utils.timing import TimingRecorder
+from src.workflow.utils.workflow import Workflow
+
+# Stands for the account state (`user_id`, `initial_balance` and
+# `new_balance`) in the read and write sets of a branch, it can't collide
+# with a step id.
+ACCOUNT = object()
+
+
+class BranchFootprint:
+
+    def __init__(self, reads, writes):
+        self.reads = reads
+        self.writes = writes
+
+    def conflicts_with(self, other):
+        return bool(
+            self.writes & (other.reads | other.writes)
+            or other.writes & self.reads
+        )
+
+
+class ParallelWorkflow(Workflow):
+    """
+    Runs the passing branches of a step on a thread pool when they are
+    independent.
+
+    Branches are independent when none of them writes what another one
+    reads or writes: the outputs of the steps they can reach and the
+    account state. Two branches that mutate `new_balance`, or one that
+    mutates it and one that reads it, conflict and run one after another
+    exactly as the sequential engine runs them. Every branch runs on a
+    copy of the workflow and the copies are merged in declaration order,
+    so logs, outputs and balances are the ones of a sequential run. Once a
+    branch fails, or goes over `max_steps`, it is merged up to the step
+    where the sequential run would have stopped and its error is raised,
+    the branches after it are discarded and no branch ever runs twice.
+    Whether an action touches the account state comes from its
+    registration in the action registry.
+    """
+
+    max_workers = 8
+
+    def __init__(self, *args, max_workers: Optional[int] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if max_workers is not None:
+            self.max_workers = max_workers
+        self.forked = False
+        # Number of logs and account state of a fork before each of its
+        # steps, to merge it up to the step where the run stops.
+        self.checkpoints: list = []
+        # Footprints of every transitions tuple of the plan, keyed by id,
+        # None when the branches can't run concurrently.
+        self.footprints: dict = {}
+
+    def get_footprint(self, transition):
+        reads = {condition.from_id for condition in transition.conditions}
+        writes = set()
+        visited = set()
+        pending = [transition.target]
+        while pending:
+            step = pending.pop()
+            if step is None or step.id in visited:
+                continue
+            visited.add(step.id)
+            if step.action:
+                if (action := step.handler) is None:
+                    return None
+                writes.add(step.id)
+                if action.reads_account:
+                    reads.add(ACCOUNT)
+                if action.writes_account:
+                    writes.add(ACCOUNT)
+            for next_transition in step.transitions:
+                reads.update(condition.from_id for condition in next_transition.conditions)
+                pending.append(next_transition.target)
+        return BranchFootprint(reads=reads, writes=writes)
+
+    def get_footprints(self, transitions):
+        key = id(transitions)
+        if key not in self.footprints:
+            footprints = [self.get_footprint(transition) for transition in transitions]
+            if None in footprints or any(
+                footprint.conflicts_with(other)
+                for index, footprint in enumerate(footprints)
+                for other in footprints[index + 1:]
+            ):
+                footprints = None
+            self.footprints[key] = footprints
+        return self.footprints[key]
+
+    def run_branches(self, transitions):
+        if self.forked or len(transitions) < 2:
+            return False
+        if (footprints := self.get_footprints(transitions)) is None:
+            return False
+
+        # Branches don't see each other's outputs, so their conditions give
+        # the same result now as after the previous branches ran.
+        branches = [
+            (transition.target, footprint)
+            for transition, footprint in zip(transitions, footprints)
+            if transition.target and self.check_conditions(transition.conditions)
+        ]
+        if len(branches) < 2:
+            return False
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(branches))) as executor:
+            forks = list(executor.map(self.run_fork, [step for step, _ in branches]))
+
+        for (_, footprint), (fork, error) in zip(branches, forks):
+            if self.max_steps is not None and (
+                    fork.executed_steps > self.max_steps - self.executed_steps
+                    or isinstance(error, MaxStepsExceededException)
+            ):
+                # Fails on the first step over the limit, as a sequential
+                # run does after the steps that fit in it.
+                self.merge_fork(fork, footprint, steps=self.max_steps - self.executed_steps)
+                self.count_step()
+            self.merge_fork(fork, footprint)
+            if error is not None:
+                raise error
+        return True
+
+    def fork(self):
+        fork = copy.copy(self)
+        fork.forked = True
+        fork.log_sink = MemoryLogSink()
+        if self.timer is not None:
+            fork.timer = TimingRecorder()
+        fork.outputs = dict(self.outputs)
+        fork.executed_steps = 0
+        fork.checkpoints = []
+        if self.max_steps is not None:
+            fork.max_steps = self.max_steps - self.executed_steps
+        return fork
+
+    def run_fork(self, step):
+        fork = self.fork()
+        try:
+            fork.run_branch(step)
+        except Exception as exc:
+            return fork, exc
+        finally:
+            # Connections opened by the pool threads would never be reused.
+            connections.close_all()
+        return fork, None
+
+    def count_step(self):
+        if self.forked:
+            self.checkpoints.append(
+                (len(self.logs), self.initial_balance, self.new_balance, self.user_id)
+            )
+        super().count_step()
+
+    def run_branch(self, step):
+        self.count_step()
+        self.execute_step(step)
+        self.run_transitions(step.transitions)
+
+    def merge_fork(self, fork, footprint, steps=None):
+        """
+        Merges the first `steps` steps the fork executed, all of them by
+        default.
+        """
+        logs = fork.logs
+        account = (fork.initial_balance, fork.new_balance, fork.user_id)
+        if steps is None:
+            self.executed_steps += fork.executed_steps
+        else:
+            log_count, *account = fork.checkpoints[steps]
+            logs = logs[:log_count]
+            self.executed_steps += steps
+        if self.timer is not None:
+            self.timer.merge(fork.timer)
+        for log in logs:
+            self.log_sink.write(log)
+            # Logs come in execution order, the last one of a step holds
+            # its latest output.
+            self.outputs[log.id] = log.output
+        if ACCOUNT in footprint.writes:
+            self.initial_balance, self.new_balance, self.user_id = account
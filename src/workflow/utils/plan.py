@@ -0,0 +1,203 @@
+from collections.abc import Mapping
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from typing import Any, Optional, Tuple
+
+from src.workflow.utils.actions import Action, action_registry
+from src.workflow.utils.conditions import ConditionPredicate, compile_condition
+from src.workflow.utils.exceptions import CyclicParamReferenceException, UnknownActionException
+from src.workflow.utils.graph import GraphAnalysis, analyze_graph
+
+TRIGGER_STEP_ID = 'start'
+
+
+@dataclass(frozen=True)
+class PlanParam:
+    name: str
+    from_id: Optional[str] = None
+    param_id: Optional[str] = None
+    value: Any = None
+
+    @property
+    def is_literal(self):
+        return self.from_id is None
+
+
+@dataclass(frozen=True)
+class PlanTransition:
+    target_id: str
+    conditions: Tuple[ConditionPredicate, ...]
+    target: Optional['PlanStep'] = field(default=None, compare=False, repr=False)
+
+
+@dataclass(frozen=True)
+class PlanStep:
+    id: str
+    action: Optional[str]
+    params: Mapping = field(default_factory=dict)
+    handler: Optional[Action] = field(default=None, compare=False, repr=False)
+    transitions: Tuple[PlanTransition, ...] = field(default=(), compare=False, repr=False)
+
+
+@dataclass(frozen=True)
+class WorkflowPlan:
+    """
+    Immutable, id-indexed representation of a validated workflow.
+
+    Steps are keyed by id and every transition already points to the step
+    it targets, so executing a plan never scans the step list. Steps the
+    trigger can't reach are left out.
+    """
+    steps: Mapping
+    trigger: PlanStep
+    trigger_params: Mapping
+    analysis: Optional[GraphAnalysis] = None
+
+    def get_step(self, step_id):
+        return self.steps.get(step_id)
+
+    def with_trigger_params(self, trigger_params):
+        return replace(self, trigger_params=MappingProxyType(dict(trigger_params)))
+
+
+def _compile_param(name, source):
+    if isinstance(source, Mapping):
+        return PlanParam(
+            name=name,
+            from_id=source.get('from_id'),
+            param_id=source.get('param_id'),
+            value=source.get('value'),
+        )
+    return PlanParam(name=name, value=source)
+
+
+def resolve_param_sources(sources):
+    """
+    Collapse every `from_id`/`param_id` chain to its final source.
+
+    `sources` maps `(step_id, param_name)` to the `PlanParam` declared on
+    that step. The result maps the same keys to either a literal or a
+    trigger param, params pointing to missing steps resolve to a `None`
+    literal. Chains are walked iteratively and every key is resolved once.
+    """
+    resolved = {}
+    for key in sources:
+        chain = []
+        visited = set()
+        current = key
+        while current not in resolved:
+            if current in visited:
+                cycle = chain[chain.index(current):] + [current]
+                raise CyclicParamReferenceException(
+                    'Param %s has a cyclic reference: %s' % (
+                        '.'.join(key),
+                        ' -> '.join('.'.join(link) for link in cycle),
+                    )
+                )
+            chain.append(current)
+            visited.add(current)
+            source = sources[current]
+            if source.is_literal or source.from_id == TRIGGER_STEP_ID:
+                final = source
+                break
+            current = (source.from_id, source.param_id)
+            if current not in sources:
+                final = PlanParam(name=source.name)
+                break
+        else:
+            final = resolved[current]
+
+        for step_id, name in chain:
+            resolved[(step_id, name)] = PlanParam(
+                name=name,
+                from_id=final.from_id,
+                param_id=final.param_id,
+                value=final.value,
+            )
+    return resolved
+
+
+def _compile_step(step_id, step_data, params, registry):
+    action = step_data.get('action')
+    return PlanStep(
+        id=step_id,
+        action=action,
+        params=MappingProxyType(params),
+        handler=registry.get(action) if action else None,
+    )
+
+
+def _bind_transitions(step, step_data, steps):
+    transitions = tuple(
+        PlanTransition(
+            target_id=transition['target'],
+            conditions=tuple(
+                compile_condition(condition)
+                for condition in transition['condition']
+            ),
+            target=steps.get(transition['target']),
+        )
+        for transition in step_data.get('transitions', [])
+    )
+    # The plan is only frozen from the outside, targets can only be bound
+    # once every step exists.
+    object.__setattr__(step, 'transitions', transitions)
+
+
+def compile_workflow(workflow_data, registry=None):
+    """
+    Compile validated `WorkflowDataSerializer` data into a `WorkflowPlan`.
+
+    When several steps share an id the first one wins, as it always did
+    for the step lookups of the engine. Params are resolved over every
+    step, unreachable ones included, before those are dropped. Raises
+    `CyclicParamReferenceException` when a param chain loops and
+    `InvalidConditionException` for conditions that can't be evaluated.
+
+    Actions are resolved against `registry`, `action_registry` by default,
+    and `UnknownActionException` is raised for any step, reachable or not,
+    whose action isn't registered.
+    """
+    if registry is None:
+        registry = action_registry
+
+    steps_data = {}
+    for step_data in workflow_data['steps']:
+        steps_data.setdefault(step_data['id'], step_data)
+
+    for step_id, step_data in steps_data.items():
+        if (action := step_data.get('action')) and action not in registry:
+            raise UnknownActionException(
+                'Step %s has an unknown action: %s' % (step_id, action)
+            )
+
+    sources = {
+        (step_id, name): _compile_param(name, source)
+        for step_id, step_data in steps_data.items()
+        for name, source in (step_data.get('params') or {}).items()
+    }
+    resolved = resolve_param_sources(sources)
+
+    trigger_data = workflow_data['trigger']
+    analysis = analyze_graph(steps_data, trigger_data, TRIGGER_STEP_ID)
+
+    steps = {
+        step_id: _compile_step(step_id, steps_data[step_id], {
+            name: resolved[(step_id, name)]
+            for name in (steps_data[step_id].get('params') or {})
+        }, registry)
+        for step_id in analysis.reachable_steps
+    }
+
+    trigger = _compile_step(TRIGGER_STEP_ID, {}, {}, registry)
+
+    for step_id, step in steps.items():
+        _bind_transitions(step, steps_data[step_id], steps)
+    _bind_transitions(trigger, trigger_data, steps)
+
+    return WorkflowPlan(
+        steps=MappingProxyType(steps),
+        trigger=trigger,
+        trigger_params=MappingProxyType(dict(trigger_data['params'])),
+        analysis=analysis,
+    )
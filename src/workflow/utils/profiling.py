@@ -0,0 +1,28 @@
+import cProfile
+import io
+import marshal
+import pstats
+
+
+class CallProfiler:
+    """
+    Runs a single call under cProfile and keeps its stats, both as the
+    file `pstats` and `snakeviz` read and as a printed table of the top
+    functions.
+    """
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def runcall(self, func, *args, **kwargs):
+        return self.profile.runcall(func, *args, **kwargs)
+
+    def get_stats_file_content(self):
+        # Same content `pstats.Stats.dump_stats` writes.
+        self.profile.create_stats()
+        return marshal.dumps(self.profile.stats)
+
+    def get_top_functions(self, limit=30, sort='cumulative'):
+        stream = io.StringIO()
+        pstats.Stats(self.profile, stream=stream).sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
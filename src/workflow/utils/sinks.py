@@ -0,0 +1,73 @@
+import json
+
+from src.workflow.models import UploadLog
+from src.workflow.utils.abstracts import AbstractLogSink
+from src.workflow.utils.logs import FULL_LOGS, StepLogEncoder, to_json_data
+
+
+class MemoryLogSink(AbstractLogSink):
+    """
+    Keeps every entry in `entries`, the default sink of the engine.
+    """
+
+    def __init__(self, buffer_size=None, flush_interval=None, verbosity=FULL_LOGS):
+        super().__init__(buffer_size, flush_interval, verbosity)
+        self.entries = []
+
+    def write(self, log):
+        # There is nothing to flush to, entries skip the buffer.
+        if self.verbosity == FULL_LOGS:
+            self.entries.append(log)
+        else:
+            super().write(log)
+
+    def write_entries(self, entries):
+        self.entries.extend(entries)
+
+    def get_logs(self):
+        return self.entries
+
+
+class NDJSONLogSink(AbstractLogSink):
+    """
+    Appends every entry as a JSON line to the file at `path`.
+    """
+
+    def __init__(self, path, buffer_size=None, flush_interval=None, verbosity=FULL_LOGS):
+        super().__init__(buffer_size, flush_interval, verbosity)
+        self.path = path
+        self.file = open(path, 'a')
+
+    def write_entries(self, entries):
+        self.file.write(''.join(
+            json.dumps(entry, cls=StepLogEncoder) + '\n' for entry in entries
+        ))
+        self.file.flush()
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self.file.close()
+
+
+class DatabaseLogSink(AbstractLogSink):
+    """
+    Stores entries as `UploadLog` rows of `upload`, one bulk insert per
+    flush.
+    """
+
+    def __init__(self, upload, buffer_size=None, flush_interval=None, verbosity=FULL_LOGS):
+        super().__init__(buffer_size, flush_interval, verbosity)
+        self.upload = upload
+        self.position = 0
+
+    def write_entries(self, entries):
+        UploadLog.objects.bulk_create([
+            UploadLog(upload=self.upload, position=position, entry=entry)
+            for position, entry in enumerate(
+                to_json_data(entries),
+                start=self.position
+            )
+        ])
+        self.position += len(entries)
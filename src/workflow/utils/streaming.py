@@ -0,0 +1,173 @@
+import codecs
+import json
+import re
+
+from src.workflow.utils.exceptions import (
+    InvalidWorkflowFileException,
+    WorkflowFileTooLargeException,
+)
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def load_json(content):
+    """
+    `json.loads` raising `InvalidWorkflowFileException` on files that
+    aren't JSON.
+    """
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError as exc:
+        raise InvalidWorkflowFileException('Invalid JSON: %s' % exc.msg)
+    except UnicodeDecodeError as exc:
+        raise InvalidWorkflowFileException('Invalid JSON: %s' % exc)
+
+
+class StreamedArray:
+    """
+    Items of an array of the document, parsed as they are iterated over.
+    """
+
+    def __init__(self, items):
+        self.items = items
+
+    def __iter__(self):
+        return self.items
+
+
+class JSONStreamReader:
+    """
+    Reads a JSON document from a file in chunks, keeping in memory only the
+    text not parsed yet.
+
+    The members of the top level object are parsed one at a time, and the
+    items of the arrays of `streamed_keys` one item at a time, see
+    `iter_members`. Files over `max_size` bytes are rejected as soon as
+    that many bytes were read.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, file, max_size=None, chunk_size=None):
+        self.file = file
+        self.max_size = max_size
+        if chunk_size is not None:
+            self.chunk_size = chunk_size
+        self.bytes_read = 0
+        self.eof = False
+        self.buffer = ''
+        self.position = 0
+        self._decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self._json_decoder = json.JSONDecoder()
+
+    def read_chunk(self, size=None):
+        """
+        Add the next `size` bytes to the text not parsed yet, `False` once
+        the whole file was read.
+        """
+        if self.eof:
+            return False
+        chunk = self.file.read(size or self.chunk_size)
+        self.bytes_read += len(chunk)
+        if self.max_size is not None and self.bytes_read > self.max_size:
+            raise WorkflowFileTooLargeException(
+                'Workflow file is larger than %s bytes' % self.max_size
+            )
+        try:
+            text = self._decoder.decode(chunk, final=not chunk)
+        except UnicodeDecodeError as exc:
+            raise InvalidWorkflowFileException('Invalid JSON: %s' % exc)
+        self.buffer = self.buffer[self.position:] + text
+        self.position = 0
+        self.eof = not chunk
+        return True
+
+    def peek(self):
+        """
+        Next character that isn't whitespace, without consuming it, or an
+        empty string at the end of the file.
+        """
+        while True:
+            self.position = WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.read_chunk():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise InvalidWorkflowFileException('Invalid JSON: Expecting %r' % char)
+        self.position += 1
+
+    def read_value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self._json_decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError as exc:
+                # The value may just go on in the next chunk, reading at
+                # least as much as is buffered keeps retries linear.
+                if self.read_chunk(max(self.chunk_size, len(self.buffer) - self.position)):
+                    continue
+                raise InvalidWorkflowFileException('Invalid JSON: %s' % exc.msg)
+            if end == len(self.buffer) and self.read_chunk():
+                # So may a number ending the buffer.
+                continue
+            self.position = end
+            return value
+
+    def read_document(self):
+        """
+        The whole document, parsed at once.
+        """
+        value = self.read_value()
+        self.expect_end()
+        return value
+
+    def expect_end(self):
+        if self.peek():
+            raise InvalidWorkflowFileException('Invalid JSON: Extra data')
+
+    def iter_members(self, streamed_keys=()):
+        """
+        Key and value of every member of the top level object, in order.
+
+        Values of `streamed_keys` that are arrays come as a
+        `StreamedArray`, which has to be iterated over before moving to the
+        next member.
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self.position += 1
+        else:
+            while True:
+                if self.peek() != '"':
+                    raise InvalidWorkflowFileException(
+                        'Invalid JSON: Expecting property name enclosed in double quotes'
+                    )
+                key = self.read_value()
+                self.expect(':')
+                if key in streamed_keys and self.peek() == '[':
+                    items = self.iter_items()
+                    yield key, StreamedArray(items)
+                    for _ in items:
+                        pass
+                else:
+                    yield key, self.read_value()
+                if self.peek() != ',':
+                    self.expect('}')
+                    break
+                self.position += 1
+        self.expect_end()
+
+    def iter_items(self):
+        self.expect('[')
+        if self.peek() == ']':
+            self.position += 1
+            return
+        while True:
+            yield self.read_value()
+            if self.peek() != ',':
+                self.expect(']')
+                return
+            self.position += 1
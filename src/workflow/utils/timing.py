@@ -0,0 +1,124 @@
+import threading
+import time
+
+# Names of the timed sections, actions are recorded as `action.<name>`.
+# `step` is one executed step, params and log included, `run` a whole run.
+STEP_TIMING = 'step'
+RUN_TIMING = 'run'
+ACTION_TIMING = 'action.%s'
+CONDITIONS_TIMING = 'check_conditions'
+AUTHENTICATE_TIMING = 'authenticate'
+
+
+class LatencyHistogram:
+    """
+    Call count and wall time of a timed section, durations are counted in
+    power of two nanosecond buckets so recording one is a few integer
+    operations.
+    """
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.buckets = {}
+
+    def record(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        bucket = elapsed.bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+
+    def percentile(self, percent):
+        """
+        Upper bound of the bucket holding the `percent` percentile, in
+        nanoseconds.
+        """
+        if not self.count:
+            return 0
+        rank = self.count * percent / 100
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(2 ** bucket - 1, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': self.total / 1e6,
+            'mean_ms': self.total / self.count / 1e6 if self.count else 0,
+            'p50_ms': self.percentile(50) / 1e6,
+            'p95_ms': self.percentile(95) / 1e6,
+            'p99_ms': self.percentile(99) / 1e6,
+            'max_ms': self.max / 1e6,
+        }
+
+
+class TimingRecorder:
+    """
+    Latency histograms of a run, keyed by timed section.
+
+    A recorder is only ever written by one thread, `merge` combines the
+    recorders of several runs.
+    """
+    __slots__ = ('histograms',)
+
+    clock = staticmethod(time.perf_counter_ns)
+
+    def __init__(self):
+        self.histograms = {}
+
+    def record(self, name, started):
+        elapsed = self.clock() - started
+        if (histogram := self.histograms.get(name)) is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.record(elapsed)
+
+    def merge(self, other):
+        for name, other_histogram in other.histograms.items():
+            if (histogram := self.histograms.get(name)) is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.merge(other_histogram)
+
+    def as_dict(self):
+        return {
+            name: self.histograms[name].as_dict()
+            for name in sorted(self.histograms)
+        }
+
+
+class ProcessTimings:
+    """
+    Histograms of every timed run of the process.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.recorder = TimingRecorder()
+
+    def add(self, recorder):
+        with self.lock:
+            self.recorder.merge(recorder)
+
+    def as_dict(self):
+        with self.lock:
+            return self.recorder.as_dict()
+
+    def reset(self):
+        with self.lock:
+            self.recorder = TimingRecorder()
+
+
+process_timings = ProcessTimings()
@@ -0,0 +1,444 @@
+from decimal import Decimal
+
+import numpy as np
+
+from src.workflow.utils import actions
+from src.workflow.utils.batch import BatchResult, BatchWorkflow, PrefetchedAuthentication
+from src.workflow.utils.exceptions import (
+    InsufficientBalanceException,
+    MaxStepsExceededException,
+)
+from src.workflow.utils.logs import FULL_LOGS, StepLog
+from src.workflow.utils.plan import TRIGGER_STEP_ID
+
+# Output fields of the actions the vectorized engine knows how to run.
+SUPPORTED_ACTIONS = {
+    None: (),
+    'validate_account': ('is_valid', 'balance'),
+    'deposit_money': ('balance',),
+    'withdraw_in_dollars': ('balance',),
+    'get_account_balance': ('balance',),
+}
+
+# Functions the vectorized engine stands in for, a plan compiled against a
+# registry that replaces one of them runs on the scalar engine.
+BUILTIN_ACTIONS = {
+    'validate_account': actions.validate_account,
+    'deposit_money': actions.deposit_money,
+    'withdraw_in_dollars': actions.withdraw_in_dollars,
+    'get_account_balance': actions.get_account_balance,
+}
+
+ARRAY_OPERATORS = {
+    'eq': np.equal,
+    'ne': np.not_equal,
+    'gt': np.greater,
+    'gte': np.greater_equal,
+    'lt': np.less,
+    'lte': np.less_equal,
+}
+
+CENTS = 100
+# Balances and amounts are kept far enough from the int64 limits that a
+# single deposit can't overflow.
+MAX_CENTS = 2 ** 62
+
+
+class VectorizationNotSupported(Exception):
+    pass
+
+
+def is_integer(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def is_number(value):
+    return isinstance(value, int)
+
+
+def to_cents(balance):
+    if not isinstance(balance, Decimal) or not balance.is_finite():
+        raise VectorizationNotSupported
+    exponent = balance.as_tuple().exponent
+    cents = balance.scaleb(2)
+    if exponent < -2 or abs(cents) >= MAX_CENTS:
+        raise VectorizationNotSupported
+    return int(cents), exponent
+
+
+def to_decimal(cents, exponent):
+    balance = Decimal(cents).scaleb(-2)
+    if exponent == -2:
+        return balance
+    return balance.quantize(Decimal(1).scaleb(exponent))
+
+
+def check_plan(plan):
+    """
+    Raise `VectorizationNotSupported` unless every step and condition of
+    `plan` can run on arrays with the same outcome as the scalar engine.
+    """
+    steps = list(plan.steps.values()) + [plan.trigger]
+    for step in steps:
+        if step.action not in SUPPORTED_ACTIONS:
+            raise VectorizationNotSupported
+        if step.action and step.handler.func is not BUILTIN_ACTIONS[step.action]:
+            raise VectorizationNotSupported
+        if step.action == 'validate_account':
+            user_id, pin = step.params.get('user_id'), step.params.get('pin')
+            # Runs of different users only stay independent when every
+            # account a run touches is the one it was triggered for.
+            if user_id is None or (user_id.from_id, user_id.param_id) != (TRIGGER_STEP_ID, 'user_id'):
+                raise VectorizationNotSupported
+            if pin is None or (pin.is_literal and pin.value is None):
+                raise VectorizationNotSupported
+        if step.action in ('deposit_money', 'withdraw_in_dollars'):
+            money = step.params.get('money')
+            if money is None or not money.is_literal or not is_integer(money.value):
+                raise VectorizationNotSupported
+            if abs(money.value) * CENTS >= MAX_CENTS:
+                raise VectorizationNotSupported
+
+        for transition in step.transitions:
+            for condition in transition.conditions:
+                check_condition(plan, condition)
+
+
+def check_condition(plan, condition):
+    if condition.operator in ARRAY_OPERATORS:
+        values = (condition.value,)
+    elif condition.operator == 'in':
+        values = condition.value
+    elif condition.operator == 'between':
+        values = condition.value
+    else:
+        raise VectorizationNotSupported
+    if not all(is_number(value) and abs(value) * CENTS < MAX_CENTS for value in values):
+        raise VectorizationNotSupported
+
+    if (source := plan.get_step(condition.from_id)) is not None and source.action:
+        if condition.field_id not in SUPPORTED_ACTIONS[source.action]:
+            raise VectorizationNotSupported
+
+
+class StepOutputs:
+
+    def __init__(self, size):
+        self.present = np.zeros(size, dtype=bool)
+        self.is_valid = np.zeros(size, dtype=np.int64)
+        self.balance = np.zeros(size, dtype=np.int64)
+        self.has_balance = np.zeros(size, dtype=bool)
+
+
+class VectorizedState:
+
+    def __init__(self, trigger_params_list, authentication, max_steps):
+        size = len(trigger_params_list)
+        self.trigger_params_list = trigger_params_list
+        self.authentication = authentication
+        self.max_steps = max_steps
+
+        self.balance = np.zeros(size, dtype=np.int64)
+        self.has_balance = np.zeros(size, dtype=bool)
+        self.exponent = np.zeros(size, dtype=np.int64)
+        self.alive = np.ones(size, dtype=bool)
+        self.executed_steps = np.zeros(size, dtype=np.int64)
+        self.user_ids = [None] * size
+        self.errors = [None] * size
+
+        self.outputs = {}
+        # (step, indices, is_valid, balance, has_balance, exponent) of every
+        # executed step, turned into logs once the run is over.
+        self.events = []
+
+    def condition_mask(self, condition):
+        size = len(self.alive)
+        if (outputs := self.outputs.get(condition.from_id)) is None:
+            present = np.zeros(size, dtype=bool)
+            values = np.zeros(size, dtype=np.int64)
+        elif condition.field_id == 'is_valid':
+            present, values = outputs.present, outputs.is_valid
+        else:
+            present, values = outputs.present & outputs.has_balance, outputs.balance
+
+        scale = 1 if condition.field_id == 'is_valid' else CENTS
+        if condition.operator == 'in':
+            matches = np.isin(values, [int(value) * scale for value in condition.value])
+        elif condition.operator == 'between':
+            lower, upper = (int(value) * scale for value in condition.value)
+            matches = (lower <= values) & (values <= upper)
+        else:
+            matches = ARRAY_OPERATORS[condition.operator](values, int(condition.value) * scale)
+
+        # A missing output is `None`, which is only ever different.
+        if condition.operator == 'ne':
+            return matches | ~present
+        return matches & present
+
+    def schedule(self, mask):
+        if self.max_steps is not None:
+            exceeded = mask & (self.executed_steps >= self.max_steps)
+            for index in np.flatnonzero(exceeded).tolist():
+                self.fail(index, MaxStepsExceededException(
+                    'Workflow exceeded the limit of %s executed steps' % self.max_steps
+                ))
+            mask = mask & ~exceeded
+        self.executed_steps[mask] += 1
+        return mask
+
+    def fail(self, index, error):
+        self.alive[index] = False
+        self.errors[index] = error
+
+    def param_value(self, param, index):
+        if param.is_literal:
+            return param.value
+        if param.from_id == TRIGGER_STEP_ID:
+            return self.trigger_params_list[index][param.param_id]
+        return None
+
+    def execute_step(self, step, mask):
+        if not step.action:
+            return
+        indices = np.flatnonzero(mask)
+        is_valid = None
+        if step.action == 'validate_account':
+            is_valid = self.validate_account(step, indices)
+        elif step.action == 'deposit_money':
+            self.deposit_money(step, indices)
+        elif step.action == 'withdraw_in_dollars':
+            indices = self.withdraw_in_dollars(step, indices)
+        if not len(indices):
+            return
+
+        outputs = self.outputs.setdefault(step.id, StepOutputs(len(self.alive)))
+        outputs.present[indices] = True
+        outputs.balance[indices] = self.balance[indices]
+        outputs.has_balance[indices] = self.has_balance[indices]
+        if is_valid is not None:
+            outputs.is_valid[indices] = is_valid
+        self.events.append((
+            step,
+            indices,
+            is_valid,
+            self.balance[indices],
+            self.has_balance[indices],
+            self.exponent[indices],
+        ))
+
+    def validate_account(self, step, indices):
+        is_valid = np.zeros(len(indices), dtype=np.int64)
+        for position, index in enumerate(indices.tolist()):
+            user_id = self.param_value(step.params['user_id'], index)
+            pin = self.param_value(step.params['pin'], index)
+            if user_id is None or pin is None:
+                raise VectorizationNotSupported
+            auth_data = self.authentication.authenticate(user_id=user_id, pin=pin)
+            if auth_data['balance'] is None:
+                self.has_balance[index] = False
+            else:
+                self.balance[index], self.exponent[index] = to_cents(auth_data['balance'])
+                self.has_balance[index] = True
+            if not isinstance(auth_data['is_valid'], bool):
+                raise VectorizationNotSupported
+            is_valid[position] = auth_data['is_valid']
+            self.user_ids[index] = user_id
+        return is_valid
+
+    def money(self, step, indices):
+        # The scalar engine raises TypeError on a missing balance, leave
+        # that to it.
+        if not self.has_balance[indices].all():
+            raise VectorizationNotSupported
+        return step.params['money'].value * CENTS
+
+    def deposit_money(self, step, indices):
+        money = self.money(step, indices)
+        balance = self.balance[indices] + money
+        if len(balance) and np.abs(balance).max() >= MAX_CENTS:
+            raise VectorizationNotSupported
+        self.balance[indices] = balance
+        self.exponent[indices] = np.minimum(self.exponent[indices], 0)
+
+    def withdraw_in_dollars(self, step, indices):
+        money = self.money(step, indices)
+        insufficient = money > self.balance[indices]
+        for index in indices[insufficient].tolist():
+            self.has_balance[index] = False
+            self.fail(index, InsufficientBalanceException())
+        indices = indices[~insufficient]
+        self.balance[indices] -= money
+        self.exponent[indices] = np.minimum(self.exponent[indices], 0)
+        return indices
+
+    def params_template(self, step):
+        """
+        Logged params of `step` with everything but the trigger params
+        filled in, and the trigger params left to fill.
+        """
+        template = {}
+        trigger_params = []
+        for name, param in step.params.items():
+            if name == 'pin':
+                template[name] = '****'
+            elif param.is_literal or param.from_id != TRIGGER_STEP_ID:
+                template[name] = param.value
+            else:
+                template[name] = None
+                trigger_params.append((name, param.param_id))
+        return template, trigger_params
+
+    def build_logs(self):
+        logs = [[] for _ in self.alive]
+        templates = {}
+        for step, indices, is_valid, balance, has_balance, exponent in self.events:
+            if step.id not in templates:
+                templates[step.id] = self.params_template(step)
+            template, trigger_params = templates[step.id]
+            rows = zip(
+                indices.tolist(),
+                balance.tolist(),
+                has_balance.tolist(),
+                exponent.tolist(),
+                is_valid.tolist() if is_valid is not None else [None] * len(indices),
+            )
+            for index, cents, present, cents_exponent, account_is_valid in rows:
+                output_balance = to_decimal(cents, cents_exponent) if present else None
+                if account_is_valid is None:
+                    output = {'balance': output_balance}
+                else:
+                    output = {
+                        'is_valid': bool(account_is_valid),
+                        'balance': output_balance,
+                    }
+                params = dict(template)
+                for name, param_id in trigger_params:
+                    params[name] = self.trigger_params_list[index][param_id]
+                logs[index].append(StepLog(
+                    params=params,
+                    id=step.id,
+                    action=step.action,
+                    output=output,
+                ))
+        return logs
+
+
+class VectorizedBatchWorkflow(BatchWorkflow):
+    """
+    `BatchWorkflow` that runs arithmetic-only workflows on NumPy arrays.
+
+    Balances are int64 cents, every transition is evaluated as a boolean
+    mask over the accounts that reached it and deposits and withdrawals
+    are masked array operations. Plans or chunks it can't reproduce
+    exactly are handed to the scalar engine.
+    """
+
+    chunk_size = 10_000
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Chunks that had to be run by the scalar engine.
+        self.fallbacks = 0
+        try:
+            check_plan(self.plan)
+            self.vectorized = True
+        except VectorizationNotSupported:
+            self.vectorized = False
+
+    def run_chunk(self, trigger_params_list):
+        if self.vectorized:
+            try:
+                results, balances = self.run_vectorized(trigger_params_list)
+            except VectorizationNotSupported:
+                self.fallbacks += 1
+            else:
+                self.balances.update(balances)
+                return results
+        return list(super().run_chunk(trigger_params_list))
+
+    def run_vectorized(self, trigger_params_list):
+        credentials_list = [
+            {'user_id': trigger_params['user_id'], 'pin': trigger_params['pin']}
+            for trigger_params in trigger_params_list
+        ]
+        balances = dict(self.balances)
+        authentication = PrefetchedAuthentication(
+            self.authentication_class,
+            credentials_list,
+            balances
+        )
+
+        # The n-th trigger of every user runs in the n-th round, so later
+        # triggers of a user see the balance left by the earlier ones.
+        rounds = []
+        occurrences = {}
+        for index, trigger_params in enumerate(trigger_params_list):
+            occurrence = occurrences.get(trigger_params['user_id'], 0)
+            occurrences[trigger_params['user_id']] = occurrence + 1
+            if occurrence == len(rounds):
+                rounds.append([])
+            rounds[occurrence].append(index)
+
+        results = [None] * len(trigger_params_list)
+        for indices in rounds:
+            round_params_list = [trigger_params_list[index] for index in indices]
+            round_results = self.run_round(round_params_list, authentication)
+            for index, result in zip(indices, round_results):
+                results[index] = result
+                if result.success:
+                    balances[result.user_id] = result.new_balance
+        return results, balances
+
+    def replay_logs(self, logs):
+        sink = self.get_log_sink()
+        for log in logs:
+            sink.write(log)
+        sink.close()
+        return sink.get_logs()
+
+    def run_round(self, trigger_params_list, authentication):
+        state = VectorizedState(trigger_params_list, authentication, self.max_steps)
+
+        pending = [(self.plan.trigger.transitions, 0, state.alive.copy())]
+        while pending:
+            transitions, index, mask = pending.pop()
+            while index < len(transitions):
+                transition = transitions[index]
+                index += 1
+                step_mask = mask & state.alive
+                for condition in transition.conditions:
+                    if not step_mask.any():
+                        break
+                    step_mask &= state.condition_mask(condition)
+                if transition.target is None or not step_mask.any():
+                    continue
+                if index < len(transitions):
+                    pending.append((transitions, index, mask))
+                step_mask = state.schedule(step_mask)
+                state.execute_step(transition.target, step_mask)
+                pending.append((transition.target.transitions, 0, step_mask))
+                break
+
+        rows = zip(
+            trigger_params_list,
+            state.build_logs(),
+            state.errors,
+            state.user_ids,
+            state.has_balance.tolist(),
+            state.balance.tolist(),
+            state.exponent.tolist(),
+        )
+        results = []
+        for trigger_params, logs, error, user_id, has_balance, cents, exponent in rows:
+            success = error is None and has_balance and cents != 0
+            if self.log_verbosity != FULL_LOGS:
+                logs = self.replay_logs(logs)
+            results.append(BatchResult(
+                trigger_params=trigger_params,
+                success=success,
+                user_id=user_id,
+                new_balance=to_decimal(cents, exponent) if success else None,
+                logs=logs,
+                error=error,
+            ))
+        return results
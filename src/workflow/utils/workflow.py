@@ -1,62 +1,82 @@
-from collections import OrderedDict
+from typing import Optional
 
-from src.workflow.utils.abstracts import AbstractAuthenticationClass
-from src.workflow.utils.exceptions import (
-    InvalidActionException,
-    InsufficientBalanceException,
+from src.workflow.utils.abstracts import AbstractAuthenticationClass, AbstractLogSink
+from src.workflow.utils.exceptions import InvalidActionException, MaxStepsExceededException
+from src.workflow.utils.logs import StepLog
+from src.workflow.utils.plan import TRIGGER_STEP_ID, WorkflowPlan, compile_workflow
+from src.workflow.utils.sinks import MemoryLogSink
+from src.workflow.utils.timing import (
+    ACTION_TIMING,
+    AUTHENTICATE_TIMING,
+    CONDITIONS_TIMING,
+    RUN_TIMING,
+    STEP_TIMING,
+    TimingRecorder,
 )
 
 
 class WorkflowParamExtractorMixin:
 
+    __slots__ = ()
+
+    secret_params = ('pin',)
+
     def extract_param_value(self, from_id, param_id):
-        if from_id == 'start':
-            return self.workflow_data['trigger']['params'][param_id]
-        else:
-            for step_data in self.workflow_data['steps']:
-                if from_id == step_data['id'] and param_id in step_data['params'].keys():
-                    return self.extract_param_value(
-                        from_id=step_data['params'][param_id]['from_id'],
-                        param_id=step_data['params'][param_id]['param_id'],
-                    )
+        # Param chains are collapsed when the plan is compiled, so the only
+        # source left to read at run time is the trigger.
+        if from_id == TRIGGER_STEP_ID:
+            return self.plan.trigger_params[param_id]
         return None
 
     def get_params(self, current_step):
         params = {}
-        for param, source in current_step['params'].items():
-            if type(source) in (dict, OrderedDict):
-                if source['from_id'] is None:
-                    params |= {
-                        param: source['value']
-                    }
-                else:
-                    params |= {
-                        param: self.extract_param_value(
-                            from_id=source['from_id'],
-                            param_id=source['param_id']
-                        )
-                    }
+        for param, source in current_step.params.items():
+            if source.is_literal:
+                params[param] = source.value
             else:
-                params |= {param: source}
+                params[param] = self.extract_param_value(
+                    from_id=source.from_id,
+                    param_id=source.param_id
+                )
         return params
 
     def hide_secret_params(self, params):
-        hidden_params = ['pin']
-        for param in params:
-            if param in hidden_params:
-                params |= {param: '****'}
+        for param in self.secret_params:
+            if param in params:
+                params[param] = '****'
         return params
 
 
 class WorkflowActionsMixin:
 
-    def validate_account(self, **params):
+    __slots__ = ()
+
+    def get_credentials(self, params):
         user_id = params.get('user_id')
         pin = params.get('pin')
         assert user_id is not None, "'user_id' can't be null"
         assert pin is not None, "'pin' can't be null"
+        return user_id, pin
+
+    def authenticate(self, user_id, pin):
+        if self.timer is None:
+            return self.authentication_class.authenticate(user_id=user_id, pin=pin)
+        started = self.timer.clock()
+        try:
+            return self.authentication_class.authenticate(user_id=user_id, pin=pin)
+        finally:
+            self.timer.record(AUTHENTICATE_TIMING, started)
 
-        auth_data = self.authentication_class.authenticate(user_id=user_id, pin=pin)
+    async def aauthenticate(self, user_id, pin):
+        if self.timer is None:
+            return await self.authentication_class.aauthenticate(user_id=user_id, pin=pin)
+        started = self.timer.clock()
+        try:
+            return await self.authentication_class.aauthenticate(user_id=user_id, pin=pin)
+        finally:
+            self.timer.record(AUTHENTICATE_TIMING, started)
+
+    def set_account(self, user_id, auth_data):
         self.initial_balance = self.new_balance = auth_data['balance']
         self.user_id = user_id
         return {
@@ -64,32 +84,37 @@ class WorkflowActionsMixin:
             'balance': self.initial_balance,
         }
 
-    def deposit_money(self, **params):
-        self.new_balance += params['money']
-        return {'balance': self.new_balance}
-
-    def withdraw_in_dollars(self, **params):
-        if params['money'] > self.new_balance:
-            self.new_balance = None
-            raise InsufficientBalanceException
-
-        self.new_balance -= params['money']
-        return {'balance': self.new_balance}
-
-    def get_account_balance(self, **params):
-        return {'balance': self.new_balance}
-
 
 class Workflow(WorkflowParamExtractorMixin,
                WorkflowActionsMixin):
 
+    __slots__ = (
+        'workflow_data',
+        'plan',
+        'initial_balance',
+        'new_balance',
+        'user_id',
+        'authentication_class',
+        'max_steps',
+        'executed_steps',
+        'log_sink',
+        'outputs',
+        'timer',
+    )
+
     def __init__(
             self,
-            workflow_data,
-            authentication_class: AbstractAuthenticationClass
+            workflow_data=None,
+            authentication_class: AbstractAuthenticationClass = None,
+            plan: Optional[WorkflowPlan] = None,
+            max_steps: Optional[int] = None,
+            log_sink: Optional[AbstractLogSink] = None,
+            timer: Optional[TimingRecorder] = None,
     ):
+        if plan is None:
+            plan = compile_workflow(workflow_data)
         self.workflow_data = workflow_data
-        self.authentication_class = authentication_class
+        self.plan = plan
 
         self.initial_balance = None
         self.new_balance = None
@@ -97,59 +122,197 @@ class Workflow(WorkflowParamExtractorMixin,
 
         self.authentication_class = authentication_class
 
-        self.logs: list = []
+        self.max_steps = max_steps
+        self.executed_steps = 0
+
+        self.log_sink = log_sink if log_sink is not None else MemoryLogSink()
+        # Latest output of every executed step, a step that runs more than
+        # once overwrites its previous output.
+        self.outputs: dict = {}
+
+        # Latency histograms of the run, nothing is timed without one.
+        self.timer = timer
+
+    @property
+    def logs(self):
+        return self.log_sink.get_logs()
+
+    def execute_action(self, action, **params):
+        # Actions are resolved when the plan is compiled, a step without a
+        # handler comes from a plan built by hand.
+        if action is None:
+            raise InvalidActionException
+        if self.timer is None:
+            return action(self, **params)
+        started = self.timer.clock()
+        try:
+            return action(self, **params)
+        finally:
+            self.timer.record(ACTION_TIMING % action.name, started)
+
+    def execute_step(self, current_step):
+        if not current_step.action:
+            return
+        if self.timer is None:
+            self.perform_step(current_step)
+            return
+        started = self.timer.clock()
+        try:
+            self.perform_step(current_step)
+        finally:
+            self.timer.record(STEP_TIMING, started)
 
-    def execute_action(self, action_name, **params):
-        if action_method := getattr(self, action_name, None):
-            return action_method(**params)
-        raise InvalidActionException
+    def perform_step(self, current_step):
+        params = self.get_params(current_step)
+        output = self.execute_action(current_step.handler, **params)
+        self.record_step(current_step, params, output)
+
+    def record_step(self, current_step, params, output):
+        self.outputs[current_step.id] = output
+        self.log_sink.write(StepLog(
+            params=self.hide_secret_params(params),
+            id=current_step.id,
+            action=current_step.action,
+            output=output,
+        ))
 
     def process_step(self, current_step):
-        if action := current_step.get('action'):
-            params = self.get_params(current_step)
-            output = self.execute_action(action, **params)
-            self.logs.append({
-                'params': self.hide_secret_params(params),
-                'id': current_step['id'],
-                'action': action,
-                'output': output,
-            })
-        self.run_transitions(current_step['transitions'])
+        if self.timer is None:
+            self.execute_step(current_step)
+            self.run_transitions(current_step.transitions)
+            return
+        started = self.timer.clock()
+        try:
+            self.execute_step(current_step)
+            self.run_transitions(current_step.transitions)
+        finally:
+            self.timer.record(RUN_TIMING, started)
 
     def run_transitions(self, transitions):
-        for transition in transitions:
-            if self.check_conditions(transition['condition']):
-                if next_step := self.get_step(transition['target']):
-                    self.process_step(next_step)
+        for next_step in self.iter_transitions(transitions):
+            self.execute_step(next_step)
+
+    def iter_transitions(self, transitions):
+        # Depth first over an explicit stack of (transitions, next_index),
+        # exhausted entries are dropped before their child runs so linear
+        # chains keep a single pending entry. Conditions are only checked
+        # once the previously yielded step has been executed.
+        pending = [(transitions, 0)]
+        while pending:
+            transitions, index = pending.pop()
+            if index == 0 and self.run_branches(transitions):
+                continue
+            while index < len(transitions):
+                transition = transitions[index]
+                index += 1
+                if not self.check_conditions(transition.conditions):
+                    continue
+                if next_step := transition.target:
+                    if index < len(transitions):
+                        pending.append((transitions, index))
+                    self.count_step()
+                    yield next_step
+                    pending.append((next_step.transitions, 0))
+                    break
+
+    def run_branches(self, transitions):
+        # Engines able to run the branches of a step on their own return
+        # True once they did, the sequential engine never does.
+        return False
+
+    def count_step(self):
+        if self.max_steps is not None and self.executed_steps >= self.max_steps:
+            raise MaxStepsExceededException(
+                'Workflow exceeded the limit of %s executed steps' % self.max_steps
+            )
+        self.executed_steps += 1
 
     def get_step_output(self, from_id, field_id):
-        for log in self.logs:
-            if log['id'] == from_id:
-                return log['output'][field_id]
+        if (output := self.outputs.get(from_id)) is not None:
+            return output[field_id]
         return None
 
     def check_conditions(self, conditions):
-        condition_results = []
+        if self.timer is None:
+            return self.evaluate_conditions(conditions)
+        started = self.timer.clock()
+        try:
+            return self.evaluate_conditions(conditions)
+        finally:
+            self.timer.record(CONDITIONS_TIMING, started)
+
+    def evaluate_conditions(self, conditions):
         for condition in conditions:
             step_output = self.get_step_output(
-                from_id=condition['from_id'],
-                field_id=condition['field_id']
+                from_id=condition.from_id,
+                field_id=condition.field_id
             )
-            operator = condition['operator']
-            if operator == 'gte':
-                operator = 'ge'
-            if operator == 'lte':
-                operator = 'le'
-            condition_value = condition['value']
-            is_success = getattr(step_output, f'__{operator}__')(condition_value)
-            condition_results.append(is_success)
-        return all(condition_results)
+            if not condition(step_output):
+                return False
+        return True
 
     def get_step(self, step_id):
-        for step in self.workflow_data['steps']:
-            if step['id'] == step_id:
-                return step
-        return None
+        return self.plan.get_step(step_id)
 
     def run_trigger(self):
-        self.process_step(self.workflow_data['trigger'])
+        try:
+            self.process_step(self.plan.trigger)
+        finally:
+            self.log_sink.close()
+
+
+class AsyncWorkflow(Workflow):
+
+    __slots__ = ()
+
+    async def aexecute_action(self, action, **params):
+        # Actions with a coroutine counterpart await it, the others run as
+        # they are.
+        if action is None or action.async_func is None:
+            return self.execute_action(action, **params)
+        if self.timer is None:
+            return await action.async_func(self, **params)
+        started = self.timer.clock()
+        try:
+            return await action.async_func(self, **params)
+        finally:
+            self.timer.record(ACTION_TIMING % action.name, started)
+
+    async def aexecute_step(self, current_step):
+        if not current_step.action:
+            return
+        if self.timer is None:
+            await self.aperform_step(current_step)
+            return
+        started = self.timer.clock()
+        try:
+            await self.aperform_step(current_step)
+        finally:
+            self.timer.record(STEP_TIMING, started)
+
+    async def aperform_step(self, current_step):
+        params = self.get_params(current_step)
+        output = await self.aexecute_action(current_step.handler, **params)
+        self.record_step(current_step, params, output)
+
+    async def aprocess_step(self, current_step):
+        if self.timer is None:
+            await self.aexecute_step(current_step)
+            await self.arun_transitions(current_step.transitions)
+            return
+        started = self.timer.clock()
+        try:
+            await self.aexecute_step(current_step)
+            await self.arun_transitions(current_step.transitions)
+        finally:
+            self.timer.record(RUN_TIMING, started)
+
+    async def arun_transitions(self, transitions):
+        for next_step in self.iter_transitions(transitions):
+            await self.aexecute_step(next_step)
+
+    async def arun_trigger(self):
+        try:
+            await self.aprocess_step(self.plan.trigger)
+        finally:
+            self.log_sink.close()